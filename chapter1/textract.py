@@ -1,32 +1,59 @@
 # Import the required libraries
+import os
+import sys
 from azure.ai.textanalytics import TextAnalyticsClient
 from azure.core.credentials import AzureKeyCredential
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.text_analytics_cache import TextAnalyticsCache
+from common.rate_limiter import get_rate_limiter
+
+# Results are cached by the SDK's default API version and the "latest" model
+MODEL_VERSION = "sdk/latest"
+
+# Module level so the rate limiter can be keyed on it
+endpoint = "<YOUR_ENDPOINT_HERE>"
+
 # Function to authenticate the Text Analytics client
 def authenticate_client():
     key = "<YOUR_AUTHENTICATION_KEY_HERE>"
-    endpoint = "<YOUR_ENDPOINT_HERE>"
     return TextAnalyticsClient(endpoint=endpoint, credential=AzureKeyCredential(key))
 
 # Function to analyze sentiment
-def sentiment_analysis(client):
+def sentiment_analysis(client, cache):
     # Prompt the user to enter a sentence
     user_input = input("Enter a sentence to analyze sentiment: ")
 
-    # Analyze the sentiment of the user's input
-    response = client.analyze_sentiment(documents=[user_input])[0]
+    # Reuse an earlier result for the same sentence, otherwise ask the service
+    result = cache.get("sentiment", MODEL_VERSION, None, user_input)
+    if result is None:
+        # The shared limiter paces calls and retries them when the service returns 429
+        response = get_rate_limiter(endpoint).call(client.analyze_sentiment, documents=[user_input])[0]
+        result = {
+            "sentiment": response.sentiment,
+            "confidenceScores": {
+                "positive": response.confidence_scores.positive,
+                "neutral": response.confidence_scores.neutral,
+                "negative": response.confidence_scores.negative,
+            },
+        }
+        cache.set("sentiment", MODEL_VERSION, None, user_input, result)
+
     print("Sentiment analysis result:")
-    print("Overall sentiment:", response.sentiment)
+    print("Overall sentiment:", result["sentiment"])
     print("Scores: positive={0:.2f}; neutral={1:.2f}; negative={2:.2f}".format(
-        response.confidence_scores.positive,
-        response.confidence_scores.neutral,
-        response.confidence_scores.negative,
+        result["confidenceScores"]["positive"],
+        result["confidenceScores"]["neutral"],
+        result["confidenceScores"]["negative"],
     ))
 
 # Main function
 def main():
     client = authenticate_client()
-    sentiment_analysis(client)
+    cache = TextAnalyticsCache()
+    sentiment_analysis(client, cache)
+    cache.print_stats()
+    cache.close()
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,11 @@
 from azure.cognitiveservices.vision.computervision import ComputerVisionClient
 from azure.cognitiveservices.vision.computervision.models import OperationStatusCodes
 from msrest.authentication import CognitiveServicesCredentials
-import time
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.lro import OperationFailed, OperationTimeout, wait_for_operation
 
 # Replace with your Azure Cognitive Services key and endpoint
 subscription_key = "YOUR_SUBSCRIPTION_KEY"
@@ -21,12 +25,20 @@ operation_location = read_response.headers["Operation-Location"]
 # Extract the operation ID from the operation location
 operation_id = operation_location.split("/")[-1]
 
-# Wait for the asynchronous operation to complete
-while True:
-    read_result = computervision_client.get_read_result(operation_id)
-    if read_result.status not in ['notStarted', 'running']:
-        break
-    time.sleep(1)
+# Wait for the asynchronous operation to complete. Most reads finish in a few seconds,
+# so polling starts at 0.5s and backs off to 5s for large documents.
+try:
+    read_result = wait_for_operation(
+        lambda: computervision_client.get_read_result(operation_id),
+        lambda result: result.status,
+        success_states=[OperationStatusCodes.succeeded],
+        failure_states=[OperationStatusCodes.failed],
+        initial_delay=0.5,
+        max_delay=5,
+        timeout=300
+    )
+except (OperationFailed, OperationTimeout) as e:
+    read_result = e.result
 
 # Print the detected text line by line
 if read_result.status == OperationStatusCodes.succeeded:
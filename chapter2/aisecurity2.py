@@ -1,8 +1,14 @@
+import os
+import sys
 from azure.ai.textanalytics import TextAnalyticsClient
 from azure.core.credentials import AzureKeyCredential
 from azure.identity import DefaultAzureCredential
 from azure.keyvault.secrets import SecretClient
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.text_analytics_cache import TextAnalyticsCache
+from common.rate_limiter import get_rate_limiter
+
 credential = DefaultAzureCredential()
 
 key_vault_name = "<YOUR_KEY_VAULT_NAME_HERE>"  
@@ -18,9 +24,35 @@ documents = [
     "Microsoft was founded by Bill Gates and Paul Allen on April 4, 1975, to develop and sell BASIC interpreters for the Altair 8800."
 ]
 
-response = text_analytics_client.recognize_entities(documents=documents)
+# Only documents that have not been analyzed before are sent to the service
+cache = TextAnalyticsCache()
+model_version = "sdk/latest"
+entities_by_index = {}
+uncached = []
+for index, document in enumerate(documents):
+    cached_entities = cache.get("entities", model_version, None, document)
+    if cached_entities is None:
+        uncached.append(index)
+    else:
+        entities_by_index[index] = cached_entities
+
+if uncached:
+    response = get_rate_limiter(ta_endpoint).call(text_analytics_client.recognize_entities, documents=[documents[index] for index in uncached])
+    for index, doc in zip(uncached, response):
+        if doc.is_error:
+            print(f"Document {index} failed: {doc.error.message}")
+            continue
+        entities = [
+            {"text": entity.text, "category": entity.category, "subcategory": entity.subcategory, "confidence_score": entity.confidence_score}
+            for entity in doc.entities
+        ]
+        cache.set("entities", model_version, None, documents[index], entities)
+        entities_by_index[index] = entities
+
+for index in sorted(entities_by_index):
+    print(f"Entities in document {index}:")
+    for entity in entities_by_index[index]:
+        print(f"...Entity: {entity['text']}, Category: {entity['category']}, Subcategory: {entity['subcategory']}, Confidence Score: {entity['confidence_score']}")
 
-for doc in response:
-    print(f"Entities in document {doc.id}:")
-    for entity in doc.entities:
-        print(f"...Entity: {entity.text}, Category: {entity.category}, Subcategory: {entity.subcategory}, Confidence Score: {entity.confidence_score}")
\ No newline at end of file
+cache.print_stats()
+cache.close()
@@ -1,8 +1,19 @@
+import os
+import sys
+import asyncio
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.text_analytics_cache import TextAnalyticsCache
+from common.async_http import AsyncHttpClient
+from common.rate_limiter import get_rate_limiter
 
 subscription_key = '<YOUR_SUBSCRIPTION_KEY_HERE>'
 endpoint = '<YOUR_ENDPOINT_HERE>' + '/text/analytics/v3.1/'
+model_version = 'v3.1/latest'
 
 headers = {
     'Ocp-Apim-Subscription-Key': subscription_key,
@@ -20,21 +31,155 @@ body = {
     ]
 }
 
+# Endpoint path and maximum documents per request for each feature
+FEATURES = {
+    'keyPhrases': ('keyPhrases', 10),
+    'language': ('languages', 1000),
+    'entities': ('entities/recognition/general', 5),
+    'sentiment': ('sentiment', 10),
+}
+
+cache = TextAnalyticsCache()
+
+# One pooled session shared by every request, so concurrent calls reuse connections
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=16))
+
+# Shared admission control for this Language resource; learns the allowed rate from 429s
+rate_limiter = get_rate_limiter(endpoint)
+
+def analyze(operation, documents):
+    """
+    Runs one Text Analytics operation, sending only documents without a cached result.
+
+    Args:
+        operation (str): Endpoint path under /text/analytics/v3.1/ (e.g., 'keyPhrases').
+        documents (list): Documents with 'id', 'language' and 'text' keys.
+
+    Returns:
+        dict: Document ID to result, in the shape returned by the service.
+    """
+    results, missing = cache.split_documents(operation, model_version, documents)
+    if missing:
+        response = rate_limiter.send(lambda: session.post(endpoint + operation, headers=headers, json={"documents": missing}))
+        response.raise_for_status()
+        returned = response.json()['documents']
+        cache.store_documents(operation, model_version, missing, returned)
+        results.update({document['id']: document for document in returned})
+    return results
+
+def plan_feature_jobs(documents, features):
+    """
+    Splits documents into (feature, operation, batch) jobs sized to each endpoint's limit.
+    """
+    jobs = []
+    for feature in features:
+        operation, max_documents = FEATURES[feature]
+        for start in range(0, len(documents), max_documents):
+            jobs.append((feature, operation, documents[start:start + max_documents]))
+    return jobs
+
+def merge_feature_results(documents, responses):
+    """
+    Merges per-feature results into one record per document, in input order.
+    """
+    records = {document['id']: {'id': document['id']} for document in documents}
+    for feature, results in responses:
+        for document_id, result in results.items():
+            record = records[document_id]
+            if feature == 'keyPhrases':
+                record['keyPhrases'] = result['keyPhrases']
+            elif feature == 'language':
+                record['detectedLanguage'] = result['detectedLanguage']
+            elif feature == 'entities':
+                record['entities'] = result['entities']
+            elif feature == 'sentiment':
+                record['sentiment'] = result['sentiment']
+                record['confidenceScores'] = result['confidenceScores']
+    return [records[document['id']] for document in documents]
+
+def analyze_features(documents, features=tuple(FEATURES), max_workers=8):
+    """
+    Runs several features over the same documents in one pass.
+
+    Every (feature, batch) request is sent concurrently over the shared session,
+    so wall time is close to the slowest feature rather than the sum of them.
+
+    Args:
+        documents (list): Documents with 'id', 'language' and 'text' keys.
+        features (iterable): Feature names from FEATURES.
+        max_workers (int): Maximum number of requests in flight at once.
+
+    Returns:
+        list: One merged record per document, in input order.
+    """
+    jobs = plan_feature_jobs(documents, features)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        responses = list(executor.map(lambda job: (job[0], analyze(job[1], job[2])), jobs))
+    return merge_feature_results(documents, responses)
+
+async def analyze_async(client, operation, documents):
+    """
+    Async version of analyze() that sends the request through an AsyncHttpClient.
+    """
+    results, missing = cache.split_documents(operation, model_version, documents)
+    if missing:
+        returned = (await client.post_json(endpoint + operation, headers=headers, json={"documents": missing}))['documents']
+        cache.store_documents(operation, model_version, missing, returned)
+        results.update({document['id']: document for document in returned})
+    return results
+
+async def analyze_features_async(documents, features=tuple(FEATURES), client=None):
+    """
+    Async entry point for analyze_features(); all requests are in flight at once.
+
+    Args:
+        documents (list): Documents with 'id', 'language' and 'text' keys.
+        features (iterable): Feature names from FEATURES.
+        client (AsyncHttpClient, optional): Client to reuse. A new one is opened if omitted.
+
+    Returns:
+        list: One merged record per document, in input order.
+    """
+    if client is None:
+        async with AsyncHttpClient(rate_limiter=rate_limiter) as client:
+            return await analyze_features_async(documents, features, client)
+
+    async def run(job):
+        return job[0], await analyze_async(client, job[1], job[2])
+
+    responses = await asyncio.gather(*(run(job) for job in plan_feature_jobs(documents, features)))
+    return merge_feature_results(documents, responses)
+
 def key_phrase_extraction():
-    key_phrase_url = endpoint + 'keyPhrases'
-    response = requests.post(key_phrase_url, headers=headers, json=body)
-    key_phrases = response.json()
-    phrases = key_phrases['documents'][0]['keyPhrases']
+    key_phrases = analyze('keyPhrases', body['documents'])
+    phrases = key_phrases['1']['keyPhrases']
     print("\nKey Phrases:")
     print(phrases)
 
 def language_detection():
-    language_url = endpoint + 'languages'
-    response = requests.post(language_url, headers=headers, json=body)
-    languages = response.json()
-    detected_language = languages['documents'][0]['detectedLanguage']
+    languages = analyze('languages', body['documents'])
+    detected_language = languages['1']['detectedLanguage']
     print("\nDetected Language:")
     print(detected_language)
 
+def combined_analysis():
+    records = analyze_features(body['documents'])
+    print("\nCombined Analysis:")
+    print(json.dumps(records, indent=2))
+
+def combined_analysis_async():
+    records = asyncio.run(analyze_features_async(body['documents']))
+    print("\nCombined Analysis (async):")
+    print(json.dumps(records, indent=2))
+
+# Set to True to run the combined analysis through the asyncio client
+run_async = False
+
 key_phrase_extraction()
 language_detection()
+if run_async:
+    combined_analysis_async()
+else:
+    combined_analysis()
+cache.print_stats()
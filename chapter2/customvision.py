@@ -1,7 +1,13 @@
 from azure.cognitiveservices.vision.customvision.training import CustomVisionTrainingClient
-from azure.cognitiveservices.vision.customvision.training.models import ImageFileCreateBatch, ImageFileCreateEntry, Region
+from azure.cognitiveservices.vision.customvision.training.models import Region
 from msrest.authentication import ApiKeyCredentials
-import time
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.custom_vision_upload import iter_numbered_images, print_upload_summary, upload_images_parallel
+from common.image_dedup import ImageIndex, dedupe_images, print_dedup_stats, save_unmerged_regions
+from common.lro import wait_for_operation
 
 # Replace with your training key and endpoint
 credentials = ApiKeyCredentials(in_headers={"Training-key": "<YOUR_TRAINING_KEY_HERE>"})
@@ -18,31 +24,38 @@ project = trainer.create_project("My Object Detection Project", domain_id=obj_de
 fork_tag = trainer.create_tag(project.id, "fork")
 scissors_tag = trainer.create_tag(project.id, "scissors")
 
-# Upload and tag images
-image_list = []
-for image_num in range(1, 31):  # Assuming you have 20 images for each tag
-    file_name = f"image_{image_num}.jpg"
-    with open(f"flowers/{file_name}", "rb") as image_contents:
-        image_list.append(ImageFileCreateEntry(name=file_name, contents=image_contents.read(), regions=[
-            Region(tag_id=fork_tag.id, left=0.1, top=0.1, width=0.8, height=0.8)
-        ]))
-
-    file_name = f"image_{image_num}.jpg"
-    with open(f"flowers/{file_name}", "rb") as image_contents:
-        image_list.append(ImageFileCreateEntry(name=file_name, contents=image_contents.read(), regions=[
-            Region(tag_id=scissors_tag.id, left=0.1, top=0.1, width=0.8, height=0.8)
-        ]))
-
-batch = ImageFileCreateBatch(images=image_list)
-upload_result = trainer.create_images_from_files(project.id, batch=batch)
+# Upload and tag images. Each file is read once, when its batch is uploaded, and tagged with both regions
+regions = [
+    Region(tag_id=fork_tag.id, left=0.1, top=0.1, width=0.8, height=0.8),
+    Region(tag_id=scissors_tag.id, left=0.1, top=0.1, width=0.8, height=0.8)
+]
+images = iter_numbered_images("flowers", 30, regions)  # Assuming you have 30 images
+
+# Merge copies and near-identical frames, and skip images this project already has
+image_index = ImageIndex(project.id)
+images, dedup_stats = dedupe_images(images, index=image_index)
+upload_result = upload_images_parallel(trainer, project.id, images, batch_size=64, max_workers=4, preprocess="custom_vision")
+print_dedup_stats(dedup_stats)
+if dedup_stats["unmerged"]:
+    # Their labels are not in the project yet; keep them so they can be added to the matching images
+    save_unmerged_regions(dedup_stats, "unmerged_regions.jsonl")
+    print("Regions of skipped duplicates written to unmerged_regions.jsonl.")
+print_upload_summary(upload_result)
+image_index.commit_uploaded(path for path, _ in upload_result["failures"])
+image_index.close()
 
 # Train the model
 print("Training...")
 iteration = trainer.train_project(project.id)
-while (iteration.status != "Completed"):
-    iteration = trainer.get_iteration(project.id, iteration.id)
-    print("Training status: " + iteration.status)
-    time.sleep(1)
+iteration = wait_for_operation(
+    lambda: trainer.get_iteration(project.id, iteration.id),
+    lambda it: it.status,
+    success_states=["Completed"],
+    failure_states=["Failed"],
+    initial_delay=5,
+    max_delay=60,
+    on_progress=lambda status, it, elapsed: print("Training status: " + status)
+)
 
 # Publish the model
 trainer.publish_iteration(project.id, iteration.id, "myModel", "<YOUR_MODEL_ID_HERE>")
@@ -0,0 +1,232 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.text_analytics_cache import make_cache_key
+from common.async_http import AsyncHttpClient, gather_limited
+from common.latency import percentile
+from common.rate_limiter import get_rate_limiter
+
+# The v3.0 sentiment endpoint accepts at most 10 documents per request
+MAX_DOCUMENTS_PER_REQUEST = 10
+
+# Cache namespace for results from this endpoint
+SENTIMENT_MODEL_VERSION = "v3.0/latest"
+
+_thread_local = threading.local()
+
+def get_session():
+    """
+    Returns the requests.Session owned by the current worker thread.
+
+    Each worker keeps one session for its lifetime, so the pool never holds
+    more open connections than it has workers.
+    """
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _thread_local.session = session
+    return session
+
+def dataframe_to_documents(df, text_column="feedback", language="en"):
+    """
+    Converts a DataFrame of feedback rows into Text Analytics documents.
+
+    Args:
+        df (DataFrame): Feedback rows.
+        text_column (str): Name of the column holding the feedback text.
+        language (str): Language code sent with every document.
+
+    Returns:
+        list: Documents in row order, with the row index as the document ID.
+    """
+    return [{"id": str(i), "language": language, "text": row[text_column]} for i, row in df.iterrows()]
+
+def chunk_documents(documents, batch_size=MAX_DOCUMENTS_PER_REQUEST):
+    """
+    Splits documents into service-sized batches.
+
+    Args:
+        documents (list): Documents to split.
+        batch_size (int): Maximum number of documents per batch.
+
+    Yields:
+        list: A batch of at most batch_size documents.
+    """
+    if batch_size < 1 or batch_size > MAX_DOCUMENTS_PER_REQUEST:
+        raise ValueError(f"batch_size must be between 1 and {MAX_DOCUMENTS_PER_REQUEST}.")
+    for start in range(0, len(documents), batch_size):
+        yield documents[start:start + batch_size]
+
+def score_batch(sentiment_url, headers, batch):
+    """
+    Sends a single batch to the sentiment endpoint.
+
+    Args:
+        sentiment_url (str): Full URL of the sentiment endpoint.
+        headers (dict): Request headers, including the subscription key.
+        batch (list): Documents to score.
+
+    Returns:
+        tuple: The response JSON and the request latency in seconds.
+    """
+    started = time.perf_counter()
+    # Admission follows the endpoint's learned rate; throttled batches wait and retry
+    rate_limiter = get_rate_limiter(sentiment_url)
+    response = rate_limiter.send(lambda: get_session().post(sentiment_url, headers=headers, json={"documents": batch}))
+    response.raise_for_status()
+    return response.json(), time.perf_counter() - started
+
+def split_cached(documents, cache):
+    """
+    Removes cached documents and in-call repeats from the documents to send.
+
+    Returns:
+        tuple: Cached results by document ID, the documents to send, and a map
+            from each repeated document's ID to the ID of the copy being sent.
+    """
+    if cache is None:
+        return {}, documents, {}
+    cached, missing = cache.split_documents("sentiment", SENTIMENT_MODEL_VERSION, documents)
+    to_send = []
+    duplicates = {}
+    first_by_key = {}
+    for document in missing:
+        key = make_cache_key("sentiment", SENTIMENT_MODEL_VERSION, document.get("language"), document["text"])
+        if key in first_by_key:
+            duplicates[document["id"]] = first_by_key[key]
+        else:
+            first_by_key[key] = document["id"]
+            to_send.append(document)
+    return cached, to_send, duplicates
+
+def assemble_results(documents, cached, to_send, duplicates, responses, cache):
+    """
+    Combines cached results and batch responses into one response in input order.
+
+    Returns:
+        tuple: A combined response dict and the list of per-batch latencies.
+    """
+    scored = dict(cached)
+    errors = []
+    latencies = []
+    model_version = None
+    fresh = []
+    for result, latency in responses:
+        latencies.append(latency)
+        model_version = result.get("modelVersion", model_version)
+        for document in result.get("documents", []):
+            scored[document["id"]] = document
+        fresh.extend(result.get("documents", []))
+        errors.extend(result.get("errors", []))
+    if cache is not None and fresh:
+        # Once for every batch, so the documents are indexed and written a single time
+        cache.store_documents("sentiment", SENTIMENT_MODEL_VERSION, to_send, fresh)
+
+    for document_id, source_id in duplicates.items():
+        if source_id in scored:
+            scored[document_id] = dict(scored[source_id], id=document_id)
+
+    ordered = [scored[doc["id"]] for doc in documents if doc["id"] in scored]
+    combined = {"documents": ordered, "errors": errors}
+    if model_version is not None:
+        combined["modelVersion"] = model_version
+    return combined, latencies
+
+def score_documents(documents, sentiment_url, headers, batch_size=MAX_DOCUMENTS_PER_REQUEST, max_workers=4, executor=None, cache=None):
+    """
+    Scores documents in concurrent batches and reassembles the results in input order.
+
+    Args:
+        documents (list): Documents to score.
+        sentiment_url (str): Full URL of the sentiment endpoint.
+        headers (dict): Request headers, including the subscription key.
+        batch_size (int): Maximum number of documents per request.
+        max_workers (int): Maximum number of requests in flight at once.
+        executor (ThreadPoolExecutor, optional): Pool to reuse across calls, so its
+            workers keep their sessions. A pool of max_workers is created if omitted.
+        cache (TextAnalyticsCache, optional): Result cache. Cached documents and
+            repeats of a document already in this call are not sent to the service.
+
+    Returns:
+        tuple: A combined response dict ({"documents": [...], "errors": [...]})
+            and the list of per-batch latencies in seconds.
+    """
+    cached, to_send, duplicates = split_cached(documents, cache)
+    batches = list(chunk_documents(to_send, batch_size))
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            responses = list(pool.map(lambda batch: score_batch(sentiment_url, headers, batch), batches))
+    else:
+        responses = list(executor.map(lambda batch: score_batch(sentiment_url, headers, batch), batches))
+    return assemble_results(documents, cached, to_send, duplicates, responses, cache)
+
+async def score_batch_async(client, sentiment_url, headers, batch):
+    """
+    Async version of score_batch() that sends the batch through an AsyncHttpClient.
+    """
+    started = time.perf_counter()
+    result = await client.post_json(sentiment_url, headers=headers, json={"documents": batch})
+    return result, time.perf_counter() - started
+
+async def score_documents_async(documents, sentiment_url, headers, batch_size=MAX_DOCUMENTS_PER_REQUEST, max_in_flight=100, client=None, cache=None):
+    """
+    Async entry point for score_documents(); keeps up to max_in_flight batches in flight.
+
+    Args:
+        documents (list): Documents to score.
+        sentiment_url (str): Full URL of the sentiment endpoint.
+        headers (dict): Request headers, including the subscription key.
+        batch_size (int): Maximum number of documents per request.
+        max_in_flight (int): Maximum number of requests in flight at once.
+        client (AsyncHttpClient, optional): Client to reuse. A new one is opened if omitted.
+        cache (TextAnalyticsCache, optional): Result cache, as for score_documents().
+
+    Returns:
+        tuple: A combined response dict and the list of per-batch latencies in seconds.
+    """
+    if client is None:
+        async with AsyncHttpClient(max_per_host=max_in_flight, rate_limiter=get_rate_limiter(sentiment_url)) as client:
+            return await score_documents_async(documents, sentiment_url, headers, batch_size, max_in_flight, client, cache)
+
+    cached, to_send, duplicates = split_cached(documents, cache)
+    batches = chunk_documents(to_send, batch_size)
+    responses = await gather_limited((score_batch_async(client, sentiment_url, headers, batch) for batch in batches), max_in_flight)
+    return assemble_results(documents, cached, to_send, duplicates, responses, cache)
+
+def throughput_report(num_documents, elapsed, latencies):
+    """
+    Summarizes a scoring run.
+
+    Args:
+        num_documents (int): Number of documents scored.
+        elapsed (float): Wall time of the run in seconds.
+        latencies (list): Per-batch latencies in seconds.
+
+    Returns:
+        dict: docs/sec and p50/p99 per-batch latency in milliseconds.
+    """
+    return {
+        "documents": num_documents,
+        "batches": len(latencies),
+        "elapsed_s": elapsed,
+        "docs_per_sec": num_documents / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+def print_throughput_report(report):
+    """
+    Prints a throughput report produced by throughput_report().
+
+    Args:
+        report (dict): The report to print.
+    """
+    print(f"Scored {report['documents']} documents in {report['batches']} batches "
+          f"in {report['elapsed_s']:.2f}s ({report['docs_per_sec']:.1f} docs/sec)")
+    print(f"Per-batch latency: p50={report['p50_ms']:.1f}ms p99={report['p99_ms']:.1f}ms")
@@ -0,0 +1,90 @@
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from batch_sentiment import MAX_DOCUMENTS_PER_REQUEST, score_documents, throughput_report, print_throughput_report
+
+class StubSentimentHandler(BaseHTTPRequestHandler):
+    """
+    Minimal stand-in for the v3.0 sentiment endpoint.
+
+    Sleeps for a fixed service time plus jitter, then labels every document positive.
+    """
+    protocol_version = 'HTTP/1.1'
+    service_time = 0.05
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length))
+        documents = payload.get('documents', [])
+        if len(documents) > MAX_DOCUMENTS_PER_REQUEST:
+            self.send_response(400)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        time.sleep(self.service_time + random.uniform(0, self.service_time / 2))
+        body = json.dumps({
+            "documents": [
+                {
+                    "id": doc["id"],
+                    "sentiment": "positive",
+                    "confidenceScores": {"positive": 0.9, "neutral": 0.05, "negative": 0.05},
+                    "sentences": [],
+                    "warnings": []
+                }
+                for doc in documents
+            ],
+            "errors": [],
+            "modelVersion": "stub"
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+def start_stub_server():
+    """
+    Starts the stub sentiment server on a free local port.
+
+    Returns:
+        StubServer: The running server.
+    """
+    server = StubServer(('127.0.0.1', 0), StubSentimentHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    """
+    Scores a synthetic feedback set against the stub server at several concurrency limits.
+    """
+    num_documents = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    documents = [{"id": str(i), "language": "en", "text": f"Feedback number {i}"} for i in range(num_documents)]
+
+    server = start_stub_server()
+    sentiment_url = f"http://127.0.0.1:{server.server_address[1]}/text/analytics/v3.0/sentiment"
+    headers = {"Ocp-Apim-Subscription-Key": "stub"}
+
+    try:
+        for max_workers in (1, 4, 16, 32):
+            print(f"\nmax_workers={max_workers}")
+            started = time.perf_counter()
+            result, latencies = score_documents(documents, sentiment_url, headers, max_workers=max_workers)
+            elapsed = time.perf_counter() - started
+            assert [doc["id"] for doc in result["documents"]] == [doc["id"] for doc in documents]
+            print_throughput_report(throughput_report(num_documents, elapsed, latencies))
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
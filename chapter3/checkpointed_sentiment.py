@@ -0,0 +1,129 @@
+import base64
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from azure.storage.blob import BlobBlock
+from batch_sentiment import MAX_DOCUMENTS_PER_REQUEST, score_documents
+from streaming_sentiment import iter_blob_lines, iter_feedback_documents
+
+# Rows per checkpointed range; each range is scored, uploaded and recorded before the next one starts
+DEFAULT_RANGE_SIZE = 1000
+
+def manifest_blob_name(output_blob_name):
+    return f"{output_blob_name}.manifest.json"
+
+def part_blob_name(output_blob_name, start, end):
+    return f"{output_blob_name}.parts/{start:010d}-{end:010d}.ndjson"
+
+def load_manifest(output_container_client, output_blob_name, input_etag, range_size):
+    """
+    Loads the checkpoint manifest for a run, or starts a new one.
+
+    A manifest written for a different version of the input blob, or with a
+    different range size, cannot be reused and is replaced.
+
+    Args:
+        output_container_client (ContainerClient): Container holding the outputs.
+        output_blob_name (str): Name of the final output blob.
+        input_etag (str): ETag of the input blob being scored.
+        range_size (int): Number of rows per checkpointed range.
+
+    Returns:
+        dict: The manifest.
+    """
+    manifest_client = output_container_client.get_blob_client(manifest_blob_name(output_blob_name))
+    if manifest_client.exists():
+        manifest = json.loads(manifest_client.download_blob().readall())
+        if manifest.get("input_etag") == input_etag and manifest.get("range_size") == range_size:
+            return manifest
+        print("Existing checkpoint does not match the current input. Starting over.")
+    return {"input_etag": input_etag, "range_size": range_size, "ranges": [], "completed": False}
+
+def save_manifest(output_container_client, output_blob_name, manifest):
+    manifest_client = output_container_client.get_blob_client(manifest_blob_name(output_blob_name))
+    manifest_client.upload_blob(json.dumps(manifest, indent=2), overwrite=True)
+
+def score_range(documents, sentiment_url, headers, batch_size, executor, cache=None):
+    """
+    Scores one range of documents and serializes the results as NDJSON.
+
+    Returns:
+        tuple: The NDJSON bytes and the per-batch latencies in seconds.
+    """
+    result, latencies = score_documents(documents, sentiment_url, headers, batch_size=batch_size, executor=executor, cache=cache)
+    lines = [json.dumps(document) for document in result["documents"]]
+    lines += [json.dumps({"id": error.get("id"), "error": error.get("error")}) for error in result["errors"]]
+    return ("\n".join(lines) + "\n").encode("utf-8"), latencies
+
+def merge_parts(output_container_client, output_blob_name, manifest):
+    """
+    Concatenates the partial outputs, in row order, into the final output blob.
+    """
+    output_blob_client = output_container_client.get_blob_client(output_blob_name)
+    block_list = []
+    for index, entry in enumerate(sorted(manifest["ranges"], key=lambda r: r["start"])):
+        data = output_container_client.get_blob_client(entry["blob"]).download_blob().readall()
+        block_id = base64.b64encode(f"{index:010d}".encode("utf-8")).decode("utf-8")
+        output_blob_client.stage_block(block_id=block_id, data=data)
+        block_list.append(BlobBlock(block_id=block_id))
+    output_blob_client.commit_block_list(block_list)
+
+def run_checkpointed(input_blob_client, output_container_client, output_blob_name, sentiment_url, headers,
+                     range_size=DEFAULT_RANGE_SIZE, batch_size=MAX_DOCUMENTS_PER_REQUEST, max_workers=4, cache=None):
+    """
+    Scores a CSV blob in checkpointed row ranges, skipping ranges finished by an earlier run.
+
+    Each range is uploaded as its own partial NDJSON blob and recorded in a
+    manifest blob next to the output. A restarted run re-reads the input but
+    only sends the rows of unfinished ranges to the service. When every range
+    is done, the parts are merged into output_blob_name.
+
+    Args:
+        input_blob_client (BlobClient): Client for the input CSV blob.
+        output_container_client (ContainerClient): Container for the parts, manifest and output.
+        output_blob_name (str): Name of the final NDJSON output blob.
+        sentiment_url (str): Full URL of the sentiment endpoint.
+        headers (dict): Request headers, including the subscription key.
+        range_size (int): Number of rows per checkpointed range.
+        batch_size (int): Maximum number of documents per request.
+        max_workers (int): Maximum number of requests in flight at once.
+        cache (TextAnalyticsCache, optional): Result cache consulted before each request.
+
+    Returns:
+        tuple: The number of documents scored in this run, the number of
+            documents skipped, the wall time in seconds, and the per-batch latencies.
+    """
+    input_etag = input_blob_client.get_blob_properties().etag
+    manifest = load_manifest(output_container_client, output_blob_name, input_etag, range_size)
+    finished = {entry["start"] for entry in manifest["ranges"]}
+
+    documents = iter_feedback_documents(iter_blob_lines(input_blob_client))
+    scored = 0
+    skipped = 0
+    latencies = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        start = 0
+        while True:
+            window = list(islice(documents, range_size))
+            if not window:
+                break
+            end = start + len(window)
+            if start in finished:
+                skipped += len(window)
+            else:
+                data, range_latencies = score_range(window, sentiment_url, headers, batch_size, executor, cache)
+                blob_name = part_blob_name(output_blob_name, start, end)
+                output_container_client.get_blob_client(blob_name).upload_blob(data, overwrite=True)
+                manifest["ranges"].append({"start": start, "end": end, "blob": blob_name})
+                save_manifest(output_container_client, output_blob_name, manifest)
+                scored += len(window)
+                latencies.extend(range_latencies)
+                print(f"Checkpointed rows {start}-{end - 1}.")
+            start = end
+
+    merge_parts(output_container_client, output_blob_name, manifest)
+    manifest["completed"] = True
+    save_manifest(output_container_client, output_blob_name, manifest)
+    return scored, skipped, time.perf_counter() - started, latencies
@@ -1,8 +1,24 @@
-import requests
 import os
+import sys
+import asyncio
 import json
+import time
 import pandas as pd
 from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient
+from batch_sentiment import (
+    MAX_DOCUMENTS_PER_REQUEST,
+    dataframe_to_documents,
+    score_documents,
+    score_documents_async,
+    throughput_report,
+    print_throughput_report
+)
+from streaming_sentiment import stream_sentiment
+from checkpointed_sentiment import DEFAULT_RANGE_SIZE, run_checkpointed
+from local_blob_storage import LocalBlobServiceClient
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.text_analytics_cache import TextAnalyticsCache
 
 endpoint = 'YOUR_TEXT_ANALYTICS_ENDPOINT'
 key = 'YOUR_TEXT_ANALYTICS_KEY'
@@ -16,24 +32,90 @@ input_container_name = 'input'
 output_container_name = 'output'
 input_blob_name = 'customer-feedback.csv'
 output_blob_name = 'sentiment-analysis-results.json'
+streaming_output_blob_name = 'sentiment-analysis-results.ndjson'
+
+# Documents per request (the service allows at most 10) and requests in flight at once
+batch_size = MAX_DOCUMENTS_PER_REQUEST
+max_workers = 4
+
+# 'batch' downloads the CSV and scores it in memory.
+# 'streaming' streams blob-to-blob as NDJSON; use for large exports.
+# 'checkpointed' streams like 'streaming' but records finished row ranges so a restart resumes.
+run_mode = 'batch'
+range_size = DEFAULT_RANGE_SIZE
+
+# In 'batch' mode, score through the asyncio client with up to max_in_flight requests at once
+use_async = False
+max_in_flight = 100
+
+# Set to a directory to run against local files instead of the storage account
+local_storage_root = None
+
+# Repeated feedback text is answered from this cache instead of being re-scored
+cache_path = 'text_analytics_cache.sqlite'
+
+def run_batch(blob_service_client, cache):
+    input_blob_client = blob_service_client.get_blob_client(container=input_container_name, blob=input_blob_name)
+
+    downloaded_blob = input_blob_client.download_blob().readall()
+    with open('customer-feedback.csv', 'wb') as f:
+        f.write(downloaded_blob)
+
+    df = pd.read_csv('customer-feedback.csv')
+    documents = dataframe_to_documents(df)
+
+    started = time.perf_counter()
+    if use_async:
+        sentiments, latencies = asyncio.run(score_documents_async(documents, sentiment_url, headers, batch_size=batch_size, max_in_flight=max_in_flight, cache=cache))
+    else:
+        sentiments, latencies = score_documents(documents, sentiment_url, headers, batch_size=batch_size, max_workers=max_workers, cache=cache)
+    print_throughput_report(throughput_report(len(documents), time.perf_counter() - started, latencies))
+
+    print(json.dumps(sentiments, indent=2))
+    with open('sentiment-analysis-results.json', 'w') as f:
+        json.dump(sentiments, f)
+
+    output_blob_client = blob_service_client.get_blob_client(container=output_container_name, blob=output_blob_name)
+    with open('sentiment-analysis-results.json', 'rb') as data:
+        output_blob_client.upload_blob(data, overwrite=True)
+
+    print("Sentiment analysis results have been uploaded to the output container.")
+
+def run_streaming(blob_service_client, cache):
+    input_blob_client = blob_service_client.get_blob_client(container=input_container_name, blob=input_blob_name)
+    output_blob_client = blob_service_client.get_blob_client(container=output_container_name, blob=streaming_output_blob_name)
+
+    num_documents, elapsed, latencies = stream_sentiment(input_blob_client, output_blob_client, sentiment_url, headers, batch_size=batch_size, max_workers=max_workers, cache=cache)
+    print_throughput_report(throughput_report(num_documents, elapsed, latencies))
+    print("Streaming sentiment analysis results have been uploaded to the output container.")
 
-blob_service_client = BlobServiceClient(account_url=f"https://{storage_account_name}.blob.core.windows.net", credential=storage_account_key)
-input_blob_client = blob_service_client.get_blob_client(container=input_container_name, blob=input_blob_name)
+def run_resumable(blob_service_client, cache):
+    input_blob_client = blob_service_client.get_blob_client(container=input_container_name, blob=input_blob_name)
+    output_container_client = blob_service_client.get_container_client(output_container_name)
 
-downloaded_blob = input_blob_client.download_blob().readall()
-with open('customer-feedback.csv', 'wb') as f:
-    f.write(downloaded_blob)
+    scored, skipped, elapsed, latencies = run_checkpointed(input_blob_client, output_container_client, streaming_output_blob_name, sentiment_url, headers,
+                                                           range_size=range_size, batch_size=batch_size, max_workers=max_workers, cache=cache)
+    print(f"Skipped {skipped} documents already scored by a previous run.")
+    print_throughput_report(throughput_report(scored, elapsed, latencies))
+    print("Checkpointed sentiment analysis results have been uploaded to the output container.")
 
-df = pd.read_csv('customer-feedback.csv')
-documents = {"documents": [{"id": str(i), "language": "en", "text": row["feedback"]} for i, row in df.iterrows()]}
-response = requests.post(sentiment_url, headers=headers, json=documents)
-sentiments = response.json()
-print(json.dumps(sentiments, indent=2))
-with open('sentiment-analysis-results.json', 'w') as f:
-    json.dump(sentiments, f)
+def main():
+    if local_storage_root:
+        blob_service_client = LocalBlobServiceClient(local_storage_root)
+    else:
+        blob_service_client = BlobServiceClient(account_url=f"https://{storage_account_name}.blob.core.windows.net", credential=storage_account_key)
 
-output_blob_client = blob_service_client.get_blob_client(container=output_container_name, blob=output_blob_name)
-with open('sentiment-analysis-results.json', 'rb') as data:
-    output_blob_client.upload_blob(data, overwrite=True)
+    cache = TextAnalyticsCache(cache_path)
+    try:
+        if run_mode == 'streaming':
+            run_streaming(blob_service_client, cache)
+        elif run_mode == 'checkpointed':
+            run_resumable(blob_service_client, cache)
+        else:
+            run_batch(blob_service_client, cache)
+        cache.print_stats()
+    finally:
+        cache.close()
 
-print("Sentiment analysis results have been uploaded to the output container.") 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import shutil
+
+class LocalDownloader:
+    """
+    Mimics the StorageStreamDownloader returned by BlobClient.download_blob().
+    """
+
+    def __init__(self, path, chunk_size=4 * 1024 * 1024):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def readall(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def chunks(self):
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+class LocalBlobProperties:
+    """
+    The subset of BlobProperties used by the chapter3 scripts.
+    """
+
+    def __init__(self, name, size, etag):
+        self.name = name
+        self.size = size
+        self.etag = etag
+
+class LocalBlobClient:
+    """
+    A BlobClient stand-in that stores the blob as a file under a container directory.
+    """
+
+    def __init__(self, container_dir, blob_name):
+        self.blob_name = blob_name
+        self.path = os.path.join(container_dir, *blob_name.split("/"))
+        self.staged_dir = self.path + ".staged"
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def get_blob_properties(self):
+        if not self.exists():
+            raise FileNotFoundError(self.path)
+        stat = os.stat(self.path)
+        etag = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8")).hexdigest()
+        return LocalBlobProperties(self.blob_name, stat.st_size, etag)
+
+    def download_blob(self):
+        if not self.exists():
+            raise FileNotFoundError(self.path)
+        return LocalDownloader(self.path)
+
+    def upload_blob(self, data, overwrite=False):
+        if self.exists() and not overwrite:
+            raise FileExistsError(self.path)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        elif hasattr(data, "read"):
+            data = data.read()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Write to a temporary file first so an interrupted upload never leaves a partial blob
+        temp_path = self.path + ".uploading"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+
+    def stage_block(self, block_id, data):
+        os.makedirs(self.staged_dir, exist_ok=True)
+        block_name = hashlib.sha1(block_id.encode("utf-8")).hexdigest()
+        with open(os.path.join(self.staged_dir, block_name), "wb") as f:
+            f.write(data)
+
+    def commit_block_list(self, block_list):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".uploading"
+        with open(temp_path, "wb") as out:
+            for block in block_list:
+                block_name = hashlib.sha1(block.id.encode("utf-8")).hexdigest()
+                with open(os.path.join(self.staged_dir, block_name), "rb") as f:
+                    out.write(f.read())
+        os.replace(temp_path, self.path)
+        shutil.rmtree(self.staged_dir, ignore_errors=True)
+
+    def delete_blob(self):
+        os.remove(self.path)
+
+class LocalContainerClient:
+    """
+    A ContainerClient stand-in backed by a directory.
+    """
+
+    def __init__(self, root_dir, container_name):
+        self.container_name = container_name
+        self.container_dir = os.path.join(root_dir, container_name)
+        os.makedirs(self.container_dir, exist_ok=True)
+
+    def get_blob_client(self, blob):
+        return LocalBlobClient(self.container_dir, blob)
+
+class LocalBlobServiceClient:
+    """
+    A BlobServiceClient stand-in that maps each container to a subdirectory of root_dir.
+
+    Use it to run the chapter3 jobs against local files, for example:
+        blob_service_client = LocalBlobServiceClient("local-storage")
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def get_container_client(self, container):
+        return LocalContainerClient(self.root_dir, container)
+
+    def get_blob_client(self, container, blob):
+        return self.get_container_client(container).get_blob_client(blob)
@@ -0,0 +1,141 @@
+import base64
+import codecs
+import csv
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from azure.storage.blob import BlobBlock
+from batch_sentiment import MAX_DOCUMENTS_PER_REQUEST, score_documents
+
+# Staged blocks are committed once they reach this size
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+def iter_blob_lines(blob_client, encoding="utf-8"):
+    """
+    Streams a blob as text lines without downloading it in full.
+
+    Args:
+        blob_client (BlobClient): Client for the blob to read.
+        encoding (str): Text encoding of the blob.
+
+    Yields:
+        str: One line of text, including its line ending.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    for chunk in blob_client.download_blob().chunks():
+        pending += decoder.decode(chunk)
+        # The last piece may be an incomplete line; keep it for the next chunk
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+def iter_feedback_documents(lines, text_column="feedback", language="en"):
+    """
+    Parses CSV lines incrementally into Text Analytics documents.
+
+    Quoted fields that span several lines are handled by the csv module.
+
+    Args:
+        lines (iterable): Text lines of a CSV file with a header row.
+        text_column (str): Name of the column holding the feedback text.
+        language (str): Language code sent with every document.
+
+    Yields:
+        dict: A document whose ID is the zero-based data row number.
+    """
+    reader = csv.DictReader(lines)
+    for row_number, row in enumerate(reader):
+        yield {"id": str(row_number), "language": language, "text": row[text_column]}
+
+class NdjsonBlockWriter:
+    """
+    Writes NDJSON records to a block blob through staged block uploads.
+
+    At most one block of data is held in memory at a time.
+    """
+
+    def __init__(self, blob_client, block_size=DEFAULT_BLOCK_SIZE):
+        self.blob_client = blob_client
+        self.block_size = block_size
+        self.buffer = bytearray()
+        self.block_list = []
+
+    def write(self, record):
+        """
+        Appends a record as one JSON line, staging a block when the buffer is full.
+
+        Args:
+            record (dict): The record to write.
+        """
+        self.buffer += json.dumps(record).encode("utf-8") + b"\n"
+        if len(self.buffer) >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Stages the buffered data as a new block.
+        """
+        if not self.buffer:
+            return
+        block_id = base64.b64encode(uuid.uuid4().hex.encode("utf-8")).decode("utf-8")
+        self.blob_client.stage_block(block_id=block_id, data=bytes(self.buffer))
+        self.block_list.append(BlobBlock(block_id=block_id))
+        self.buffer = bytearray()
+
+    def close(self):
+        """
+        Stages any remaining data and commits the block list.
+        """
+        self.flush()
+        self.blob_client.commit_block_list(self.block_list)
+
+def stream_sentiment(input_blob_client, output_blob_client, sentiment_url, headers,
+                     batch_size=MAX_DOCUMENTS_PER_REQUEST, max_workers=4, block_size=DEFAULT_BLOCK_SIZE, cache=None):
+    """
+    Scores a CSV blob and writes NDJSON results to another blob without local files.
+
+    Documents are read in windows of batch_size * max_workers rows, so peak memory
+    depends on the batch settings rather than on the size of the input.
+
+    Args:
+        input_blob_client (BlobClient): Client for the input CSV blob.
+        output_blob_client (BlobClient): Client for the output NDJSON blob.
+        sentiment_url (str): Full URL of the sentiment endpoint.
+        headers (dict): Request headers, including the subscription key.
+        batch_size (int): Maximum number of documents per request.
+        max_workers (int): Maximum number of requests in flight at once.
+        block_size (int): Size in bytes at which output blocks are staged.
+        cache (TextAnalyticsCache, optional): Result cache consulted before each request.
+
+    Returns:
+        tuple: The number of documents scored, the wall time in seconds,
+            and the list of per-batch latencies in seconds.
+    """
+    documents = iter_feedback_documents(iter_blob_lines(input_blob_client))
+    writer = NdjsonBlockWriter(output_blob_client, block_size=block_size)
+    window_size = batch_size * max_workers
+
+    num_documents = 0
+    latencies = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            window = list(islice(documents, window_size))
+            if not window:
+                break
+            result, window_latencies = score_documents(window, sentiment_url, headers, batch_size=batch_size, executor=executor, cache=cache)
+            for document in result["documents"]:
+                writer.write(document)
+            for error in result["errors"]:
+                writer.write({"id": error.get("id"), "error": error.get("error")})
+            num_documents += len(window)
+            latencies.extend(window_latencies)
+
+    writer.close()
+    return num_documents, time.perf_counter() - started, latencies
@@ -1,16 +1,16 @@
 import os
 import sys
-import time
 import uuid
 from dotenv import load_dotenv
 from azure.cognitiveservices.vision.customvision.training import CustomVisionTrainingClient
-from azure.cognitiveservices.vision.customvision.training.models import (
-    ImageFileCreateBatch,
-    ImageFileCreateEntry,
-    Region
-)
+from azure.cognitiveservices.vision.customvision.training.models import Region
 from msrest.authentication import ApiKeyCredentials
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.custom_vision_upload import iter_numbered_images, print_upload_summary, upload_images_parallel
+from common.image_dedup import ImageIndex, dedupe_images, print_dedup_stats, save_unmerged_regions
+from common.lro import OperationFailed, wait_for_operation
+
 def get_custom_vision_credentials():
     """
     Retrieves Azure Custom Vision credentials from environment variables.
@@ -91,52 +91,59 @@ def create_tags(trainer, project_id, tag_names):
         tags[tag_name] = tag.id
     return tags
 
-def upload_images(trainer, project_id, tag_id, images_folder, num_images):
+def upload_images(trainer, project_id, tag_ids, images_folder, num_images, batch_size=64, max_workers=4, index=None):
     """
     Uploads images to the project with specified tags.
 
+    Images are deduplicated first: copies and near-identical frames are merged
+    into one entry carrying every tag's region, and images already in the
+    project index are skipped. The rest are read lazily, downscaled and
+    recompressed for Custom Vision, and uploaded in batches of batch_size,
+    max_workers batches at a time; images that fail with a transient status
+    are retried.
+
     Args:
         trainer (CustomVisionTrainingClient): Initialized training client.
         project_id (str): ID of the project.
-        tag_id (str): ID of the tag.
+        tag_ids (str or list): ID of the tag, or IDs of every tag the images get.
         images_folder (str): Path to the folder containing images.
         num_images (int): Number of images to upload.
+        batch_size (int): Images per upload request (at most 64).
+        max_workers (int): Number of batches uploaded concurrently.
+        index (ImageIndex, optional): Local index of images already in the project.
 
     Returns:
-        None
-    """
-    image_list = []
-    for image_num in range(1, num_images + 1):
-        file_name = f"image_{image_num}.jpg"
-        image_path = os.path.join(images_folder, file_name)
-        if not os.path.exists(image_path):
-            print(f"Warning: {image_path} does not exist. Skipping.")
-            continue
-        with open(image_path, "rb") as image_file:
-            image_data = image_file.read()
-            # Define the bounding box for the object in the image
-            # For simplicity, assuming the object occupies the center 80% of the image
-            # Modify these values based on actual object location
-            regions = [
-                Region(tag_id=tag_id, left=0.1, top=0.1, width=0.8, height=0.8)
-            ]
-            image_entry = ImageFileCreateEntry(name=file_name, contents=image_data, regions=regions)
-            image_list.append(image_entry)
-
-    if not image_list:
+        dict: Upload summary from upload_images_parallel().
+    """
+    if isinstance(tag_ids, str):
+        tag_ids = [tag_ids]
+    images = []
+    for tag_id in tag_ids:
+        # Define the bounding box for the object in the image
+        # For simplicity, assuming the object occupies the center 80% of the image
+        # Modify these values based on actual object location
+        regions = [
+            Region(tag_id=tag_id, left=0.1, top=0.1, width=0.8, height=0.8)
+        ]
+        images.extend(iter_numbered_images(images_folder, num_images, regions))
+
+    # Images are hashed as the upload pulls them, so the counts are complete once it returns
+    images, dedup_stats = dedupe_images(images, index=index)
+    summary = upload_images_parallel(trainer, project_id, images, batch_size=batch_size, max_workers=max_workers,
+                                     preprocess="custom_vision")
+    print_dedup_stats(dedup_stats)
+    if dedup_stats["unmerged"]:
+        # Their labels are not in the project yet; keep them so they can be added to the matching images
+        save_unmerged_regions(dedup_stats, "unmerged_regions.jsonl")
+        print("Regions of skipped duplicates written to unmerged_regions.jsonl.")
+    if index is not None:
+        index.commit_uploaded(path for path, _ in summary["failures"])
+
+    if not summary["uploaded"] and not summary["duplicates"] and not summary["failed"]:
         print("No images to upload.")
-        return
-
-    batch = ImageFileCreateBatch(images=image_list)
-    upload_result = trainer.create_images_from_files(project_id, batch=batch)
-
-    if upload_result.is_batch_successful:
-        print(f"Successfully uploaded {len(upload_result.images)} images for tag.")
     else:
-        print("Some images failed to upload:")
-        for image in upload_result.images:
-            if image.status != "OK":
-                print(f"Image {image.name} failed to upload. Error: {image.status}")
+        print_upload_summary(summary)
+    return summary
 
 def train_model(trainer, project_id):
     """
@@ -152,10 +159,20 @@ def train_model(trainer, project_id):
     print("Training the model...")
     iteration = trainer.train_project(project_id)
 
-    while iteration.status != "Completed":
-        iteration = trainer.get_iteration(project_id, iteration.id)
-        print(f"Training status: {iteration.status}")
-        time.sleep(1)
+    # Training takes minutes, so poll with backoff (5s growing to 60s) rather than every second
+    try:
+        iteration = wait_for_operation(
+            lambda: trainer.get_iteration(project_id, iteration.id),
+            lambda it: it.status,
+            success_states=["Completed"],
+            failure_states=["Failed"],
+            initial_delay=5,
+            max_delay=60,
+            on_progress=lambda status, it, elapsed: print(f"Training status: {status} ({elapsed:.0f}s)")
+        )
+    except OperationFailed:
+        print("Training failed.")
+        sys.exit(1)
 
     print("Training completed.")
     return iteration
@@ -198,9 +215,11 @@ def main():
     images_folder = "flowers"  # Replace with your images folder
     num_images_per_tag = 30  # Minimum 30 images per tag
 
-    for tag_name, tag_id in tags.items():
-        print(f"Uploading images for tag '{tag_name}'...")
-        upload_images(trainer, project.id, tag_id, images_folder, num_images_per_tag)
+    # One pass for all tags, so an image used by several tags is uploaded once with all its regions
+    print(f"Uploading images for tags {list(tags)}...")
+    index = ImageIndex(project.id)
+    upload_images(trainer, project.id, list(tags.values()), images_folder, num_images_per_tag, index=index)
+    index.close()
 
     iteration = train_model(trainer, project.id)
 
@@ -4,6 +4,9 @@ from os.path import join as join_paths
 from azure.ai.vision import ImageAnalysisClient, ImageAnalysisApiKeyCredential, ImageAnalysisOptions
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.image_preprocessing import preprocess_file
+
 def execute_main_process():
     """
     Main function to execute the OCR process based on user input.
@@ -52,9 +55,8 @@ def process_text_extraction(path_to_image, endpoint, key):
         credential = ImageAnalysisApiKeyCredential(key)
         client = ImageAnalysisClient(endpoint=endpoint, credential=credential)
         
-        # Read the image data
-        with open(path_to_image, "rb") as image_file:
-            image_data = image_file.read()
+        # Read the image data, downscaled to what Read uses and without EXIF
+        image_data, _ = preprocess_file(path_to_image, "read")
         
         # Set up the image analysis options
         options = ImageAnalysisOptions(visual_features=["Read"])
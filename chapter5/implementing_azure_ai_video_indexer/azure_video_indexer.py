@@ -1,11 +1,21 @@
 import os
 import sys
-import time
 import uuid
+import asyncio
 import requests
 import json
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.async_http import AsyncHttpClient
+from common.lro import OperationFailed, wait_for_operation, wait_for_operation_async
+from common.resumable_upload import ResumableBlobUpload, print_progress
+from common.token_manager import TokenManager, resolve_token, resolve_token_async
+from common.video_insights_store import DEFAULT_STORE_PATH, InsightsStore
+
+# One token manager per API key, shared by every caller in the process
+_token_managers = {}
+
 def get_video_indexer_credentials():
     """
     Retrieves Azure Video Indexer credentials from environment variables.
@@ -21,37 +31,76 @@ def get_video_indexer_credentials():
 
     return account_id, api_key, location
 
-def get_access_token(api_key, location):
+def fetch_access_token(api_key, location, account_id, permission="Contributor"):
     """
-    Obtains an access token for the Video Indexer API.
+    Requests a new access token for the Video Indexer API.
 
     Args:
         api_key (str): Azure Video Indexer API key.
         location (str): Location of the Video Indexer account.
+        account_id (str): Azure Video Indexer Account ID.
+        permission (str): "Contributor" for a token that can upload and edit, "Reader" for read-only.
 
     Returns:
         str: Access token.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails.
     """
-    url = f"https://api.videoindexer.ai/Auth/{location}/Accounts/{account_id}/AccessToken?allowEdit=true"
+    url = f"https://api.videoindexer.ai/Auth/{location}/Accounts/{account_id}/AccessToken"
     headers = {
         'Ocp-Apim-Subscription-Key': api_key
     }
+    params = {'allowEdit': 'true' if permission == "Contributor" else 'false'}
+
+    response = requests.get(url, headers=headers, params=params)
+    response.raise_for_status()
+    return response.text.strip('"')  # Remove quotes from the token
+
+def get_token_manager(api_key):
+    """
+    Returns the process-wide token manager for an API key.
+
+    Tokens are cached per (location, account_id, permission) and refreshed in
+    the background a few minutes before they expire (they last one hour).
+    """
+    # setdefault is atomic, so concurrent first calls still share one manager
+    return _token_managers.setdefault(api_key, TokenManager(
+        lambda location, account_id, permission: fetch_access_token(api_key, location, account_id, permission)
+    ))
 
+def get_access_token(api_key, location, account_id, permission="Contributor"):
+    """
+    Obtains an access token for the Video Indexer API.
+
+    The result can be passed wherever an access_token is expected. It resolves
+    to a cached token right before each request, so a long run never sends an
+    expired token.
+
+    Args:
+        api_key (str): Azure Video Indexer API key.
+        location (str): Location of the Video Indexer account.
+        account_id (str): Azure Video Indexer Account ID.
+        permission (str): "Contributor" or "Reader".
+
+    Returns:
+        TokenProvider: Callable returning the current access token.
+    """
+    provider = get_token_manager(api_key).provider(location, account_id, permission)
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        access_token = response.text.strip('"')  # Remove quotes from the token
-        return access_token
+        provider()  # Fetch the first token now, so bad credentials fail here
+        return provider
     except requests.exceptions.RequestException as e:
         print(f"An error occurred while obtaining the access token: {e}")
         sys.exit(1)
 
-def upload_video(access_token, account_id, video_path, video_name):
+def upload_video(access_token, location, account_id, video_path, video_name):
     """
     Uploads a video to Azure Video Indexer.
 
     Args:
-        access_token (str): Access token for authentication.
+        access_token (str or TokenProvider): Access token for authentication.
+        location (str): Location of the Video Indexer account.
         account_id (str): Azure Video Indexer Account ID.
         video_path (str): Path to the video file.
         video_name (str): Name to assign to the uploaded video.
@@ -59,18 +108,16 @@ def upload_video(access_token, account_id, video_path, video_name):
     Returns:
         str: Video ID.
     """
-    upload_url = f"https://api.videoindexer.ai/{location}/Accounts/{account_id}/Videos?accessToken={access_token}&name={video_name}&privacy=Private"
-
-    headers = {
-        'Content-Type': 'multipart/form-data'
-    }
+    upload_url = f"https://api.videoindexer.ai/{location}/Accounts/{account_id}/Videos"
+    params = {'accessToken': resolve_token(access_token), 'name': video_name, 'privacy': 'Private'}
 
     try:
         with open(video_path, 'rb') as video_file:
             files = {
                 'file': (os.path.basename(video_path), video_file, 'video/mp4')
             }
-            response = requests.post(upload_url, headers=headers, files=files)
+            # requests sets the multipart Content-Type itself, including the boundary
+            response = requests.post(upload_url, params=params, files=files)
             response.raise_for_status()
             video_id = response.json()['id']
             print(f"Video '{video_name}' uploaded successfully with Video ID: {video_id}")
@@ -82,38 +129,133 @@ def upload_video(access_token, account_id, video_path, video_name):
         print(f"An error occurred while uploading the video: {e}")
         sys.exit(1)
 
-def check_video_processing(access_token, account_id, video_id):
+def upload_video_resumable(access_token, location, account_id, video_path, video_name, blob_sas_url,
+                           chunk_size=8 * 1024 * 1024, on_progress=print_progress):
+    """
+    Uploads a large video resumably, then indexes it from Blob Storage.
+
+    The file is staged to the blob in chunks; if the transfer is interrupted,
+    calling this again resumes from the last stored chunk. Video Indexer then
+    fetches the video from the blob through videoUrl.
+
+    Args:
+        access_token (str or TokenProvider): Access token for authentication.
+        location (str): Location of the Video Indexer account.
+        account_id (str): Azure Video Indexer Account ID.
+        video_path (str): Path to the video file.
+        video_name (str): Name to assign to the uploaded video.
+        blob_sas_url (str): Blob URL with a SAS token allowing read and write.
+        chunk_size (int): Bytes per chunk.
+        on_progress (callable, optional): Called as on_progress(uploaded_bytes, total_bytes).
+
+    Returns:
+        str: Video ID.
+    """
+    upload_url = f"https://api.videoindexer.ai/{location}/Accounts/{account_id}/Videos"
+
+    try:
+        ResumableBlobUpload(video_path, blob_sas_url, chunk_size=chunk_size, content_type='video/mp4',
+                            on_progress=on_progress).upload()
+        # Resolved after the upload, which can outlast a token
+        params = {'accessToken': resolve_token(access_token), 'name': video_name, 'privacy': 'Private', 'videoUrl': blob_sas_url}
+        response = requests.post(upload_url, params=params)
+        response.raise_for_status()
+        video_id = response.json()['id']
+        print(f"Video '{video_name}' uploaded successfully with Video ID: {video_id}")
+        return video_id
+    except FileNotFoundError:
+        print(f"Error: The file {video_path} was not found.")
+        sys.exit(1)
+    except requests.exceptions.RequestException as e:
+        print(f"An error occurred while uploading the video: {e}. Run again to resume the upload.")
+        sys.exit(1)
+
+def check_video_processing(access_token, location, account_id, video_id):
     """
     Checks the processing status of the uploaded video.
 
     Args:
-        access_token (str): Access token for authentication.
+        access_token (str or TokenProvider): Access token for authentication.
+        location (str): Location of the Video Indexer account.
         account_id (str): Azure Video Indexer Account ID.
         video_id (str): ID of the uploaded video.
 
     Returns:
         dict: Video index information.
     """
-    while True:
-        status_url = f"https://api.videoindexer.ai/{location}/Accounts/{account_id}/Videos/{video_id}/Index?accessToken={access_token}"
-        try:
-            response = requests.get(status_url)
-            response.raise_for_status()
-            video_index = response.json()
-
-            status = video_index.get('state', 'Processing')
-            print(f"Video processing status: {status}")
-
-            if status.lower() == 'processed':
-                return video_index
-            elif status.lower() in ['failed', 'error']:
-                print("Video processing failed.")
-                sys.exit(1)
-            else:
-                time.sleep(10)  # Wait for 10 seconds before checking again
-        except requests.exceptions.RequestException as e:
-            print(f"An error occurred while checking video status: {e}")
-            sys.exit(1)
+    status_url = f"https://api.videoindexer.ai/{location}/Accounts/{account_id}/Videos/{video_id}/Index"
+
+    def poll():
+        response = requests.get(status_url, params={'accessToken': resolve_token(access_token)})
+        response.raise_for_status()
+        return response.json()
+
+    try:
+        # Indexing takes minutes: poll after 10s, then back off to once a minute
+        return wait_for_operation(
+            poll,
+            lambda video_index: video_index.get('state', 'Processing'),
+            success_states=['processed'],
+            failure_states=['failed', 'error'],
+            initial_delay=10,
+            max_delay=60,
+            on_progress=lambda status, video_index, elapsed: print(f"Video processing status: {status}")
+        )
+    except OperationFailed:
+        print("Video processing failed.")
+        sys.exit(1)
+    except requests.exceptions.RequestException as e:
+        print(f"An error occurred while checking video status: {e}")
+        sys.exit(1)
+
+async def check_video_processing_async(client, access_token, location, account_id, video_id, poll_interval=10):
+    """
+    Async version of check_video_processing() that shares a connection pool with other polls.
+
+    Args:
+        client (AsyncHttpClient): Shared async HTTP client.
+        access_token (str or TokenProvider): Access token for authentication.
+        location (str): Location of the Video Indexer account.
+        account_id (str): Azure Video Indexer Account ID.
+        video_id (str): ID of the uploaded video.
+        poll_interval (int): Seconds before the second status check; later checks back off up to a minute.
+
+    Returns:
+        dict: Video index information.
+
+    Raises:
+        RuntimeError: If processing fails.
+    """
+    status_url = f"https://api.videoindexer.ai/{location}/Accounts/{account_id}/Videos/{video_id}/Index"
+
+    async def poll():
+        return await client.get_json(status_url, params={'accessToken': await resolve_token_async(access_token)})
+
+    try:
+        return await wait_for_operation_async(
+            poll,
+            lambda video_index: video_index.get('state', 'Processing'),
+            success_states=['processed'],
+            failure_states=['failed', 'error'],
+            initial_delay=poll_interval,
+            max_delay=60,
+            on_progress=lambda status, video_index, elapsed: print(f"Video {video_id} processing status: {status}")
+        )
+    except OperationFailed:
+        raise RuntimeError(f"Video {video_id} processing failed.")
+
+async def check_videos_processing_async(access_token, location, account_id, video_ids, poll_interval=10):
+    """
+    Async entry point that waits for many videos at once over one connection pool.
+
+    Returns:
+        list: Video index information (or the exception raised) per video, in input order.
+    """
+    async with AsyncHttpClient() as client:
+        return await asyncio.gather(
+            *(check_video_processing_async(client, access_token, location, account_id, video_id, poll_interval) for video_id in video_ids),
+            return_exceptions=True
+        )
 
 def analyze_video(video_index):
     """
@@ -163,16 +305,17 @@ def main():
     Main function to execute the Azure AI Video Indexer workflow.
     """
     account_id, api_key, location = get_video_indexer_credentials()
-    access_token = get_access_token(api_key, location)
+    access_token = get_access_token(api_key, location, account_id)
 
     print("\nOptions:")
     print("1: Upload and Index a Video from Local System")
-    print("2: Exit")
+    print("2: Upload a Large Video Resumably through Blob Storage and Index It")
+    print("3: Exit")
     print()
 
     user_choice = input("Choose an option: ").strip()
 
-    if user_choice == '1':
+    if user_choice in ('1', '2'):
         video_path = input("Enter the path to the video file (e.g., videos/sample_video.mp4): ").strip()
         video_name = input("Enter a name for the video: ").strip()
 
@@ -180,9 +323,15 @@ def main():
             print("Error: Video path and name must be provided.")
             sys.exit(1)
 
-        video_id = upload_video(access_token, account_id, video_path, video_name)
-        video_index = check_video_processing(access_token, account_id, video_id)
+        if user_choice == '1':
+            video_id = upload_video(access_token, location, account_id, video_path, video_name)
+        else:
+            blob_sas_url = input("Enter a blob SAS URL (read/write) to stage the video in: ").strip()
+            video_id = upload_video_resumable(access_token, location, account_id, video_path, video_name, blob_sas_url)
+        video_index = check_video_processing(access_token, location, account_id, video_id)
         analyze_video(video_index)
+        InsightsStore().add(video_index)
+        print(f"\nInsights saved to {DEFAULT_STORE_PATH}/; query them with common/video_insights_store.py.")
 
     else:
         print("Exiting...")
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import mimetypes
+import os
+import sys
+import time
+
+import aiohttp
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from azure_video_indexer import get_access_token, get_video_indexer_credentials
+from common.async_http import AsyncHttpClient
+from common.lro import PollSchedule
+from common.token_manager import TokenProvider, resolve_token_async
+from common.video_insights_store import InsightsStore
+
+API_URL = "https://api.videoindexer.ai"
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".wmv", ".m4v", ".mpg", ".mpeg")
+
+# An upload may take as long as sending the file at this rate, plus UPLOAD_TIMEOUT_BASE seconds,
+# so large videos are not cut off by the client's default 60s limit
+MIN_UPLOAD_BYTES_PER_SECOND = 256 * 1024
+UPLOAD_TIMEOUT_BASE = 60
+
+def upload_timeout(video_path, min_rate=MIN_UPLOAD_BYTES_PER_SECOND, base=UPLOAD_TIMEOUT_BASE):
+    """
+    Returns the aiohttp timeout for uploading one video, scaled to its size.
+    """
+    return aiohttp.ClientTimeout(total=base + os.path.getsize(video_path) / min_rate, sock_connect=30)
+
+def iter_video_paths(source):
+    """
+    Lists the videos to index.
+
+    Args:
+        source (str): A directory of videos, or a manifest file with one path per line.
+
+    Yields:
+        str: Video paths.
+    """
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for file_name in sorted(files):
+                if file_name.lower().endswith(VIDEO_EXTENSIONS):
+                    yield os.path.join(root, file_name)
+        return
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as manifest:
+        for line in manifest:
+            path = line.strip()
+            if path:
+                yield path if os.path.isabs(path) else os.path.join(base, path)
+
+def video_name_for(video_path, root=None):
+    """
+    Names a video after its path relative to root, without the extension.
+
+    Subfolders are joined with '__', so videos with the same file name in
+    different folders get different names (and insight files).
+    """
+    if root is None:
+        return os.path.splitext(os.path.basename(video_path))[0]
+    relative = os.path.splitext(os.path.relpath(video_path, root))[0]
+    return "__".join(part for part in relative.split(os.sep) if part not in ("", os.curdir, os.pardir))
+
+async def upload_video_async(client, access_token, location, account_id, video_path, video_name, api_url=API_URL):
+    """
+    Uploads a video as multipart/form-data, streaming it from disk.
+
+    Returns:
+        str: Video ID.
+    """
+    upload_url = f"{api_url}/{location}/Accounts/{account_id}/Videos"
+    params = {'accessToken': await resolve_token_async(access_token), 'name': video_name, 'privacy': 'Private'}
+
+    def form():
+        # A fresh form per attempt, since a streamed file cannot be sent twice
+        data = aiohttp.FormData()
+        content_type = mimetypes.guess_type(video_path)[0] or 'application/octet-stream'
+        data.add_field('file', open(video_path, 'rb'), filename=os.path.basename(video_path), content_type=content_type)
+        return data
+
+    result = await client.post_json(upload_url, params=params, data=form,
+                                   timeout=upload_timeout(video_path))
+    return result['id']
+
+class VideoTracker:
+    """
+    Tracks the processing state of many videos in one polling loop.
+
+    Each video keeps its own backoff schedule; the loop sleeps until the next
+    video is due, polls every due video at once, and wakes early when a new
+    upload is added.
+    """
+
+    def __init__(self, client, access_token, location, account_id, on_complete,
+                 initial_delay=10, max_delay=60, api_url=API_URL):
+        self.client = client
+        self.access_token = access_token
+        self.location = location
+        self.account_id = account_id
+        self.on_complete = on_complete
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.api_url = api_url
+        self.pending = {}
+        self.added = asyncio.Event()
+        self.closed = False
+        self.polls = 0
+
+    def add(self, video_id, video_name):
+        schedule = PollSchedule(self.initial_delay, self.max_delay)
+        self.pending[video_id] = (video_name, schedule, time.monotonic() + schedule.next_delay())
+        self.added.set()
+
+    def close(self):
+        """
+        Signals that no more videos will be added; run() returns once all pending videos finish.
+        """
+        self.closed = True
+        self.added.set()
+
+    async def _poll(self, video_id):
+        url = f"{self.api_url}/{self.location}/Accounts/{self.account_id}/Videos/{video_id}/Index"
+        self.polls += 1
+        try:
+            access_token = await resolve_token_async(self.access_token)
+            return video_id, await self.client.get_json(url, params={'accessToken': access_token}), None
+        except Exception as e:
+            return video_id, None, e
+
+    async def run(self):
+        while self.pending or not self.closed:
+            now = time.monotonic()
+            due = [video_id for video_id, (_, _, due_at) in self.pending.items() if due_at <= now]
+            if not due:
+                next_due = min((due_at for _, _, due_at in self.pending.values()), default=None)
+                self.added.clear()
+                try:
+                    await asyncio.wait_for(self.added.wait(), None if next_due is None else next_due - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            for video_id, video_index, error in await asyncio.gather(*(self._poll(video_id) for video_id in due)):
+                video_name, schedule, _ = self.pending[video_id]
+                state = (video_index or {}).get('state', 'Processing').lower()
+                status = getattr(error, 'status', None)
+                if error is None and state == 'processed':
+                    del self.pending[video_id]
+                    self.on_complete(video_name, video_id, video_index, None)
+                elif error is None and state in ('failed', 'error'):
+                    del self.pending[video_id]
+                    self.on_complete(video_name, video_id, video_index, RuntimeError(f"Video {video_id} processing failed."))
+                elif status == 401 and isinstance(self.access_token, TokenProvider):
+                    # The token was revoked or expired early: fetch a new one and poll again on schedule
+                    self.access_token.invalidate()
+                    self.pending[video_id] = (video_name, schedule, time.monotonic() + schedule.next_delay())
+                elif status is not None and status < 500 and status != 429:
+                    # A client error (e.g. 404) will not go away by polling again
+                    del self.pending[video_id]
+                    self.on_complete(video_name, video_id, None, error)
+                else:
+                    # Still processing, or a transient poll error: try again on the video's schedule
+                    self.pending[video_id] = (video_name, schedule, time.monotonic() + schedule.next_delay())
+
+async def index_videos_async(access_token, location, account_id, video_paths, output_dir, max_uploads=4,
+                             initial_delay=10, max_delay=60, api_url=API_URL, store=None, root=None):
+    """
+    Uploads many videos concurrently and writes each one's insights as soon as it is indexed.
+
+    Args:
+        access_token (str or TokenProvider): Access token; pass a TokenProvider from
+            get_access_token() so runs longer than the token's lifetime keep working.
+        location (str): Location of the Video Indexer account.
+        account_id (str): Azure Video Indexer Account ID.
+        video_paths (iterable): Paths of the videos to index.
+        output_dir (str): Directory for <video name>.json insight files and summary.jsonl.
+        max_uploads (int): Maximum uploads in flight at once.
+        initial_delay (float): Seconds before a video's first status check.
+        max_delay (float): Longest wait between a video's status checks.
+        api_url (str): Video Indexer API base URL.
+        store (InsightsStore, optional): Columnar store each video's insights are also added to.
+        root (str, optional): Folder video names are taken relative to (see video_name_for());
+            by default a video is named after its file name. A video whose name is already
+            taken in this run is not uploaded and counts as failed.
+
+    Returns:
+        dict: Counts of indexed and failed videos, polls made, and elapsed seconds.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.monotonic()
+    summary = {"indexed": 0, "failed": 0}
+    names = set()
+    summary_file = open(os.path.join(output_dir, "summary.jsonl"), "a", encoding="utf-8")
+
+    def on_complete(video_name, video_id, video_index, error):
+        record = {"name": video_name, "video_id": video_id, "elapsed": round(time.monotonic() - started, 1)}
+        if error is None:
+            with open(os.path.join(output_dir, f"{video_name}.json"), "w", encoding="utf-8") as f:
+                json.dump(video_index, f)
+            if store is not None:
+                store.add(video_index)
+            summary["indexed"] += 1
+        else:
+            record["error"] = str(error)
+            summary["failed"] += 1
+        summary_file.write(json.dumps(record) + "\n")
+        summary_file.flush()
+        print(f"Video '{video_name}' {'indexed' if error is None else 'failed'} after {record['elapsed']}s")
+
+    async with AsyncHttpClient() as client:
+        tracker = VideoTracker(client, access_token, location, account_id, on_complete, initial_delay, max_delay, api_url)
+        semaphore = asyncio.Semaphore(max_uploads)
+
+        async def upload(video_path):
+            video_name = video_name_for(video_path, root)
+            if video_name in names:
+                # Its insights would overwrite those of the earlier video with this name
+                on_complete(video_name, None, None, ValueError(f"Duplicate video name for {video_path}."))
+                return
+            names.add(video_name)
+            async with semaphore:
+                try:
+                    video_id = await upload_video_async(client, access_token, location, account_id,
+                                                        video_path, video_name, api_url)
+                except Exception as e:
+                    on_complete(video_name, None, None, e)
+                    return
+            print(f"Video '{video_name}' uploaded with Video ID: {video_id}")
+            tracker.add(video_id, video_name)
+
+        async def upload_all():
+            try:
+                await asyncio.gather(*(upload(video_path) for video_path in video_paths))
+            finally:
+                tracker.close()
+
+        try:
+            await asyncio.gather(upload_all(), tracker.run())
+        finally:
+            summary_file.close()
+
+    summary["polls"] = tracker.polls
+    summary["elapsed"] = time.monotonic() - started
+    return summary
+
+def main():
+    """
+    Usage: python batch_video_indexer.py <video directory or manifest> [output directory]
+    """
+    if len(sys.argv) < 2:
+        print(main.__doc__.strip())
+        sys.exit(1)
+    source = sys.argv[1]
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else "video_insights"
+
+    account_id, api_key, location = get_video_indexer_credentials()
+    access_token = get_access_token(api_key, location, account_id)
+
+    store = InsightsStore(os.path.join(output_dir, "store"))
+    root = source if os.path.isdir(source) else os.path.dirname(os.path.abspath(source))
+    summary = asyncio.run(index_videos_async(access_token, location, account_id, list(iter_video_paths(source)), output_dir,
+                                             store=store, root=root))
+    # One part file per video was written as they finished; merge them for fast loading
+    store.compact()
+    print(f"Indexed {summary['indexed']} videos ({summary['failed']} failed) in {summary['elapsed']:.0f}s "
+          f"with {summary['polls']} status checks. Insights written to {output_dir}.")
+
+if __name__ == "__main__":
+    main()
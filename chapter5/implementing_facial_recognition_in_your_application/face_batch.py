@@ -0,0 +1,168 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from face_recognition import (
+    MAX_FACES_PER_IDENTIFY,
+    detect_faces_in_file,
+    get_face_credentials,
+    identify_face_ids,
+    initialize_face_client
+)
+from common.person_group_cache import PersonGroupCache
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif")
+
+def iter_image_paths(source):
+    """
+    Lazily lists the images to process.
+
+    Args:
+        source (str): A directory of images, or a manifest file with one path per
+            line (.txt) or one {"path": ...} object per line (.jsonl).
+
+    Yields:
+        str: Image paths.
+    """
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for file_name in sorted(files):
+                if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(root, file_name)
+        return
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as manifest:
+        for line in manifest:
+            line = line.strip()
+            if not line:
+                continue
+            path = json.loads(line)["path"] if source.endswith(".jsonl") else line
+            yield path if os.path.isabs(path) else os.path.join(base, path)
+
+def _detect(face_client, path):
+    try:
+        return path, detect_faces_in_file(face_client, path), None
+    except Exception as e:
+        return path, [], str(e)
+
+def _identify(face_client, person_group_id, face_ids):
+    try:
+        return identify_face_ids(face_client, person_group_id, face_ids), None
+    except Exception as e:
+        return [], str(e)
+
+def process_window(face_client, person_group_id, paths, person_cache, executor):
+    """
+    Detects faces in a window of images concurrently, then identifies them in chunks of 10.
+
+    Returns:
+        list: One result record per image, in input order.
+    """
+    detections = list(executor.map(lambda path: _detect(face_client, path), paths))
+
+    face_ids = [face.face_id for _, faces, _ in detections for face in faces]
+    chunks = [face_ids[i:i + MAX_FACES_PER_IDENTIFY] for i in range(0, len(face_ids), MAX_FACES_PER_IDENTIFY)]
+    identified = {}
+    identify_errors = {}
+    for chunk, (results, error) in zip(chunks, executor.map(lambda chunk: _identify(face_client, person_group_id, chunk), chunks)):
+        if error is not None:
+            # Only the faces of the failed chunk lose their identification
+            identify_errors.update((face_id, error) for face_id in chunk)
+            continue
+        for result in results:
+            identified[result.face_id] = result.candidates[0] if result.candidates else None
+
+    records = []
+    for path, faces, error in detections:
+        record = {"image": path, "faces": []}
+        error = error or next((identify_errors[face.face_id] for face in faces if face.face_id in identify_errors), None)
+        if error:
+            record["error"] = error
+        for face in faces:
+            rectangle = face.face_rectangle
+            candidate = identified.get(face.face_id)
+            record["faces"].append({
+                "face_id": face.face_id,
+                "rectangle": {"left": rectangle.left, "top": rectangle.top,
+                              "width": rectangle.width, "height": rectangle.height},
+                "person_id": candidate.person_id if candidate else None,
+                "name": person_cache.get_name(person_group_id, candidate.person_id) if candidate else None,
+                "confidence": candidate.confidence if candidate else None,
+            })
+        records.append(record)
+    return records
+
+def process_images(face_client, person_group_id, paths, output, max_workers=16, window_size=128, person_cache=None):
+    """
+    Detects and identifies faces in many images, writing one JSON line per image.
+
+    Images are handled in windows of window_size so results stream out while
+    later images are still being read. Person names come from the local
+    Person Group mirror, which is synced once up front.
+
+    Args:
+        face_client (FaceClient): Initialized FaceClient instance.
+        person_group_id (str): ID of the trained Person Group.
+        paths (iterable): Image paths, e.g. from iter_image_paths().
+        output (file): Text file the JSONL records are written to.
+        max_workers (int): Concurrent detect/identify calls.
+        window_size (int): Images per window.
+        person_cache (PersonGroupCache, optional): Local mirror of the group's persons;
+            one is opened and closed here when not given.
+
+    Returns:
+        tuple: (images processed, faces found, faces identified).
+    """
+    owns_cache = person_cache is None
+    if owns_cache:
+        person_cache = PersonGroupCache(face_client)
+    try:
+        person_cache.sync(person_group_id)
+        paths = iter(paths)
+        images = faces = identified = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                window = list(islice(paths, window_size))
+                if not window:
+                    break
+                for record in process_window(face_client, person_group_id, window, person_cache, executor):
+                    output.write(json.dumps(record) + "\n")
+                    images += 1
+                    faces += len(record["faces"])
+                    identified += sum(1 for face in record["faces"] if face["person_id"])
+                output.flush()
+        return images, faces, identified
+    finally:
+        if owns_cache:
+            person_cache.close()
+
+def main():
+    """
+    Usage: python face_batch.py <image directory or manifest> <person group ID> [output.jsonl]
+    """
+    if len(sys.argv) < 3:
+        print(main.__doc__.strip())
+        sys.exit(1)
+    source, person_group_id = sys.argv[1], sys.argv[2]
+    output_path = sys.argv[3] if len(sys.argv) > 3 else "face_results.jsonl"
+
+    load_dotenv()  # Load environment variables from .env file
+    subscription_key, endpoint = get_face_credentials()
+    face_client = initialize_face_client(subscription_key, endpoint)
+
+    started = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8") as output:
+        images, faces, identified = process_images(face_client, person_group_id, iter_image_paths(source), output)
+    elapsed = time.perf_counter() - started
+    print(f"Processed {images} images ({faces} faces, {identified} identified) in {elapsed:.1f}s, "
+          f"{images / elapsed * 60:.0f} images/min. Results written to {output_path}.")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,14 @@ from dotenv import load_dotenv
 from azure.cognitiveservices.vision.face import FaceClient
 from msrest.authentication import CognitiveServicesCredentials
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.image_preprocessing import preprocess_file
+from common.person_group_cache import PersonGroupCache
+from common.rate_limiter import get_rate_limiter
+
+# face.identify accepts at most 10 face IDs per call
+MAX_FACES_PER_IDENTIFY = 10
+
 def get_face_credentials():
     """
     Retrieves Azure Face API credentials from environment variables.
@@ -46,7 +54,8 @@ def detect_faces_with_url(face_client, image_url, face_attributes):
         list: List of detected face objects.
     """
     try:
-        detected_faces = face_client.face.detect_with_url(
+        detected_faces = get_rate_limiter(face_client.config.endpoint).call(
+            face_client.face.detect_with_url,
             url=image_url,
             return_face_attributes=face_attributes
         )
@@ -55,6 +64,37 @@ def detect_faces_with_url(face_client, image_url, face_attributes):
         print(f"An error occurred during face detection: {e}")
         return []
 
+def detect_faces_in_file(face_client, image_path, face_attributes=None):
+    """
+    Detects faces in a local image file, raising on errors.
+
+    The image is downscaled and recompressed before upload; face rectangles
+    are scaled back to the original image's pixel coordinates.
+
+    Args:
+        face_client (FaceClient): Initialized FaceClient instance.
+        image_path (str): Path to the image file to analyze.
+        face_attributes (list, optional): List of face attributes to return.
+
+    Returns:
+        list: List of detected face objects.
+    """
+    image_data, scale = preprocess_file(image_path, "face")
+
+    detected_faces = get_rate_limiter(face_client.config.endpoint).call(
+        face_client.face.detect_with_stream,
+        image=image_data,
+        return_face_attributes=face_attributes
+    )
+    if scale != 1.0:
+        for face in detected_faces:
+            rectangle = face.face_rectangle
+            rectangle.left = round(rectangle.left / scale)
+            rectangle.top = round(rectangle.top / scale)
+            rectangle.width = round(rectangle.width / scale)
+            rectangle.height = round(rectangle.height / scale)
+    return detected_faces
+
 def detect_faces_with_stream(face_client, image_path, face_attributes):
     """
     Detects faces in an image provided as a local file.
@@ -68,14 +108,7 @@ def detect_faces_with_stream(face_client, image_path, face_attributes):
         list: List of detected face objects.
     """
     try:
-        with open(image_path, "rb") as image_file:
-            image_data = image_file.read()
-
-        detected_faces = face_client.face.detect_with_stream(
-            image=image_data,
-            return_face_attributes=face_attributes
-        )
-        return detected_faces
+        return detect_faces_in_file(face_client, image_path, face_attributes)
     except Exception as e:
         print(f"An error occurred during face detection: {e}")
         return []
@@ -100,7 +133,21 @@ def analyze_detected_faces(detected_faces):
         for emotion, score in face.face_attributes.emotion.as_dict().items():
             print(f"    {emotion.capitalize()}: {score:.2f}")
 
-def identify_faces(face_client, person_group_id, face_ids):
+def identify_face_ids(face_client, person_group_id, face_ids):
+    """
+    Identifies any number of faces, MAX_FACES_PER_IDENTIFY per call.
+
+    Returns:
+        list: Identification results, in face_ids order.
+    """
+    rate_limiter = get_rate_limiter(face_client.config.endpoint)
+    results = []
+    for start in range(0, len(face_ids), MAX_FACES_PER_IDENTIFY):
+        chunk = face_ids[start:start + MAX_FACES_PER_IDENTIFY]
+        results.extend(rate_limiter.call(face_client.face.identify, chunk, person_group_id))
+    return results
+
+def identify_faces(face_client, person_group_id, face_ids, person_cache=None):
     """
     Identifies faces by matching them against a Person Group.
 
@@ -108,12 +155,18 @@ def identify_faces(face_client, person_group_id, face_ids):
         face_client (FaceClient): Initialized FaceClient instance.
         person_group_id (str): ID of the Person Group.
         face_ids (list): List of face IDs to identify.
+        person_cache (PersonGroupCache, optional): Local mirror of the group's persons;
+            one is opened and closed here when not given.
 
     Returns:
         list: List of identification results.
     """
+    owns_cache = person_cache is None
     try:
-        results = face_client.face.identify(face_ids, person_group_id)
+        # Names come from the local mirror, so the only round trip per face is identify itself
+        if owns_cache:
+            person_cache = PersonGroupCache(face_client)
+        results = identify_face_ids(face_client, person_group_id, face_ids)
 
         for result in results:
             print(f"\nFace ID: {result.face_id}")
@@ -123,10 +176,13 @@ def identify_faces(face_client, person_group_id, face_ids):
             top_candidate = result.candidates[0]
             person_id = top_candidate.person_id
             confidence = top_candidate.confidence
-            person = face_client.person_group_person.get(person_group_id, person_id)
-            print(f"  Person identified: {person.name} with confidence {confidence:.2f}")
+            print(f"  Person identified: {person_cache.get_name(person_group_id, person_id)} with confidence {confidence:.2f}")
+        return results
     except Exception as e:
         print(f"An error occurred during face identification: {e}")
+    finally:
+        if owns_cache and person_cache is not None:
+            person_cache.close()
 
 def main():
     """
@@ -6,6 +6,13 @@ import uuid
 import requests
 import json
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.async_http import AsyncHttpClient, gather_limited
+from common.rate_limiter import get_rate_limiter
+from common.translator_bulk import read_lines, translate_bulk
+from common.translation_memory import TranslationMemory
+from common.translator_segment import DEFAULT_SEGMENT_CHARACTERS, translate_document
+
 def get_translator_credentials():
     """
     Retrieves Azure Translator credentials from environment variables.
@@ -20,7 +27,7 @@ def get_translator_credentials():
 
     return subscription_key, endpoint, region
 
-def translate_text(subscription_key, endpoint, region, text, from_lang, to_langs, category_id=None):
+def translate_text(subscription_key, endpoint, region, text, from_lang, to_langs, category_id=None, memory=None):
     """
     Translates text from a source language to one or multiple target languages using Azure Translator Text API with a custom model.
 
@@ -28,11 +35,31 @@ def translate_text(subscription_key, endpoint, region, text, from_lang, to_langs
         subscription_key (str): Azure Translator subscription key.
         endpoint (str): Azure Translator endpoint URL.
         region (str): Azure service region.
-        text (str): The text to translate.
+        text (str): The text to translate. Texts longer than one segment are split and
+            translated concurrently.
         from_lang (str): Source language code (e.g., 'en').
         to_langs (list): List of target language codes (e.g., ['de', 'es']).
         category_id (str, optional): Custom model's category ID. Defaults to None.
+        memory (TranslationMemory, optional): Translation memory checked before calling the service.
     """
+    remembered = memory.lookup(text, from_lang, to_langs, category_id) if memory is not None else {}
+    if remembered:
+        print("\nTranslation Memory Results:")
+        for lang, translated in remembered.items():
+            print(f"Translated into {lang}: {translated}")
+    to_langs = [lang for lang in to_langs if lang not in remembered]
+    if not to_langs:
+        return
+
+    if len(text) > DEFAULT_SEGMENT_CHARACTERS:
+        # Long documents are split into paragraphs/sentences and translated concurrently
+        documents = translate_document(subscription_key, region, text, from_lang, to_langs, endpoint=endpoint,
+                                       category_id=category_id, memory=memory)
+        print("\nTranslation Results:")
+        for lang, translated in documents.items():
+            print(f"Translated into {lang}: {translated}")
+        return
+
     path = '/translate?api-version=3.0'
     params = f"&from={from_lang}" + ''.join([f"&to={lang}" for lang in to_langs])
 
@@ -56,13 +83,15 @@ def translate_text(subscription_key, endpoint, region, text, from_lang, to_langs
     }]
 
     try:
-        response = requests.post(constructed_url, headers=headers, json=body)
+        response = get_rate_limiter(endpoint).send(lambda: requests.post(constructed_url, headers=headers, json=body))
         response.raise_for_status()
         result = response.json()
 
         print("\nTranslation Results:")
         for translation in result[0]['translations']:
             print(f"Translated into {translation['to']}: {translation['text']}")
+        if memory is not None:
+            memory.store(text, from_lang, {translation['to']: translation['text'] for translation in result[0]['translations']}, category_id)
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err} - {response.text}")
     except requests.exceptions.RequestException as req_err:
@@ -72,6 +101,94 @@ def translate_text(subscription_key, endpoint, region, text, from_lang, to_langs
     except Exception as e:
         print(f"An error occurred: {e}")
 
+async def translate_text_async(client, subscription_key, endpoint, region, text, from_lang, to_langs, category_id=None):
+    """
+    Async version of translate_text() that returns the translations instead of printing them.
+
+    Args:
+        client (AsyncHttpClient): Shared async HTTP client.
+        subscription_key (str): Azure Translator subscription key.
+        endpoint (str): Azure Translator endpoint URL.
+        region (str): Azure service region.
+        text (str): The text to translate.
+        from_lang (str): Source language code (e.g., 'en').
+        to_langs (list): List of target language codes (e.g., ['de', 'es']).
+        category_id (str, optional): Custom model's category ID. Defaults to None.
+
+    Returns:
+        list: The 'translations' list for the text.
+    """
+    path = '/translate?api-version=3.0'
+    params = f"&from={from_lang}" + ''.join([f"&to={lang}" for lang in to_langs])
+
+    if category_id:
+        # Ensure the category parameter starts with a '/'
+        if not category_id.startswith('/'):
+            category_id = f'/{category_id}'
+        params += f"&category={category_id}"
+
+    constructed_url = endpoint + path + params
+
+    headers = {
+        'Ocp-Apim-Subscription-Key': subscription_key,
+        'Ocp-Apim-Subscription-Region': region,
+        'Content-type': 'application/json',
+        'X-ClientTraceId': str(uuid.uuid4())
+    }
+
+    result = await client.post_json(constructed_url, headers=headers, json=[{'text': text}])
+    return result[0]['translations']
+
+async def translate_texts_async(subscription_key, endpoint, region, texts, from_lang, to_langs, category_id=None, max_in_flight=100):
+    """
+    Async entry point that translates many texts with up to max_in_flight requests at once.
+
+    Args:
+        subscription_key (str): Azure Translator subscription key.
+        endpoint (str): Azure Translator endpoint URL.
+        region (str): Azure service region.
+        texts (list): The texts to translate.
+        from_lang (str): Source language code (e.g., 'en').
+        to_langs (list): List of target language codes (e.g., ['de', 'es']).
+        category_id (str, optional): Custom model's category ID. Defaults to None.
+        max_in_flight (int): Maximum number of requests in flight at once.
+
+    Returns:
+        list: One 'translations' list per input text, in input order.
+    """
+    async with AsyncHttpClient(max_per_host=max_in_flight, rate_limiter=get_rate_limiter(endpoint)) as client:
+        return await gather_limited(
+            (translate_text_async(client, subscription_key, endpoint, region, text, from_lang, to_langs, category_id) for text in texts),
+            max_in_flight
+        )
+
+def translate_catalog(subscription_key, endpoint, region, input_path, from_lang, to_langs, category_id=None, memory=None):
+    """
+    Translates a string catalog (one string per line) in bulk and writes the results as JSONL.
+
+    Args:
+        subscription_key (str): Azure Translator subscription key.
+        endpoint (str): Azure Translator endpoint URL.
+        region (str): Azure service region.
+        input_path (str): Path to the catalog file.
+        from_lang (str): Source language code (e.g., 'en').
+        to_langs (list): List of target language codes (e.g., ['de', 'es']).
+        category_id (str, optional): Custom model's category ID. Defaults to None.
+        memory (TranslationMemory, optional): Translation memory checked before calling the service.
+
+    Returns:
+        str: Path of the JSONL output file.
+    """
+    texts = read_lines(input_path)
+    translations = translate_bulk(subscription_key, region, texts, from_lang, to_langs, endpoint=endpoint, category_id=category_id, memory=memory)
+
+    output_path = os.path.splitext(input_path)[0] + '.translations.jsonl'
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for text, translated in zip(texts, translations):
+            f.write(json.dumps({'text': text, 'translations': translated}, ensure_ascii=False) + '\n')
+    print(f"Translated {len(texts)} strings into {', '.join(to_langs)}. Results written to {output_path}.")
+    return output_path
+
 def main():
     """
     Main function to prompt user for input and perform text translation using a custom model.
@@ -79,7 +196,7 @@ def main():
     subscription_key, endpoint, region = get_translator_credentials()
 
     print("Azure Custom Translator Demo")
-    text = input("Enter the text you want to translate: ").strip()
+    text = input("Enter the text you want to translate (or @path to translate a file with one string per line): ").strip()
     if not text:
         print("No text entered. Exiting.")
         sys.exit(1)
@@ -102,7 +219,13 @@ def main():
             print("No category ID entered. Proceeding with default model.")
             category_id = None
 
-    translate_text(subscription_key, endpoint, region, text, from_lang, to_langs, category_id)
+    memory = TranslationMemory()
+    if text.startswith('@'):
+        translate_catalog(subscription_key, endpoint, region, text[1:], from_lang, to_langs, category_id, memory)
+    else:
+        translate_text(subscription_key, endpoint, region, text, from_lang, to_langs, category_id, memory)
+    memory.print_stats()
+    memory.close()
 
 if __name__ == "__main__":
     main()
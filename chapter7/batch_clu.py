@@ -0,0 +1,174 @@
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.async_http import AsyncHttpClient
+from common.latency import percentile
+from common.rate_limiter import get_rate_limiter
+from test_travel_chatbot import build_request, deployment_name, headers, project_name, url
+
+RESULT_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("deployment", pa.string()),
+    ("text", pa.string()),
+    ("top_intent", pa.string()),
+    ("confidence", pa.float64()),
+    ("entities", pa.list_(pa.struct([
+        ("category", pa.string()),
+        ("text", pa.string()),
+        ("offset", pa.int64()),
+        ("length", pa.int64()),
+        ("confidence", pa.float64()),
+    ]))),
+    ("latency_ms", pa.float64()),
+    ("error", pa.string()),
+])
+
+def iter_utterances(path, text_field="text", id_field="id"):
+    """
+    Streams utterances from a JSONL or CSV file without loading it whole.
+
+    Args:
+        path (str): A .jsonl file with one object per line, or a .csv file with a header row.
+        text_field (str): Field or column holding the utterance.
+        id_field (str): Field or column holding its ID; the line number is used if missing.
+
+    Yields:
+        tuple: (utterance ID, text).
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = csv.DictReader(f) if path.lower().endswith(".csv") else (json.loads(line) for line in f if line.strip())
+        for number, row in enumerate(rows, start=1):
+            text = row.get(text_field)
+            if text:
+                yield str(row.get(id_field) or number), text
+
+def extract_prediction(result):
+    """
+    Picks the top intent, its confidence and the entities out of an analyze-conversations response.
+    """
+    prediction = result["result"]["prediction"]
+    top_intent = prediction.get("topIntent")
+    confidence = next((intent["confidenceScore"] for intent in prediction.get("intents", [])
+                       if intent["category"] == top_intent), None)
+    entities = [{"category": entity.get("category"), "text": entity.get("text"), "offset": entity.get("offset"),
+                 "length": entity.get("length"), "confidence": entity.get("confidenceScore")}
+                for entity in prediction.get("entities", [])]
+    return top_intent, confidence, entities
+
+async def analyze_one(client, utterance_id, text, project, deployment):
+    started = time.perf_counter()
+    record = {"id": utterance_id, "deployment": deployment, "text": text, "top_intent": None,
+              "confidence": None, "entities": [], "error": None}
+    try:
+        result = await client.post_json(url, headers=headers, json=build_request(text, utterance_id, project=project,
+                                                                                  deployment=deployment))
+        record["top_intent"], record["confidence"], record["entities"] = extract_prediction(result)
+    except Exception as e:
+        record["error"] = str(e)
+    record["latency_ms"] = (time.perf_counter() - started) * 1000
+    return record
+
+async def run_batch_async(utterances, output_path, deployments=(deployment_name,), project=project_name,
+                          max_in_flight=100, flush_rows=10000):
+    """
+    Sends every utterance to every deployment concurrently and writes the predictions to Parquet.
+
+    Utterances are read lazily and at most max_in_flight requests are open at
+    once over one connection pool, so memory stays flat however large the
+    input is. Results are written in completion order, flush_rows at a time.
+
+    Args:
+        utterances (iterable): (ID, text) pairs, e.g. from iter_utterances().
+        output_path (str): Parquet file to write, one row per utterance and deployment.
+        deployments (iterable): Deployment names to send each utterance to.
+        project (str): CLU project name.
+        max_in_flight (int): Maximum requests in flight at once.
+        flush_rows (int): Rows buffered before they are written out.
+
+    Returns:
+        dict: Per-deployment report from deployment_report().
+    """
+    deployments = list(deployments)
+    latencies = {deployment: [] for deployment in deployments}
+    errors = {deployment: 0 for deployment in deployments}
+    buffer = []
+    writer = pq.ParquetWriter(output_path, RESULT_SCHEMA)
+    semaphore = asyncio.Semaphore(max_in_flight)
+    pending = set()
+
+    def collect(task):
+        record = task.result()
+        latencies[record["deployment"]].append(record["latency_ms"])
+        errors[record["deployment"]] += record["error"] is not None
+        buffer.append(record)
+        semaphore.release()
+
+    def flush():
+        if buffer:
+            writer.write_table(pa.Table.from_pylist(buffer, schema=RESULT_SCHEMA))
+            buffer.clear()
+
+    started = time.perf_counter()
+    try:
+        async with AsyncHttpClient(max_per_host=max_in_flight, rate_limiter=get_rate_limiter(url)) as client:
+            for utterance_id, text in utterances:
+                for deployment in deployments:
+                    # Waiting here is what keeps the reader from running ahead of the service
+                    await semaphore.acquire()
+                    task = asyncio.ensure_future(analyze_one(client, utterance_id, text, project, deployment))
+                    task.add_done_callback(collect)
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                if len(buffer) >= flush_rows:
+                    flush()
+            if pending:
+                await asyncio.wait(pending)
+        flush()
+    finally:
+        writer.close()
+    return deployment_report(latencies, errors, time.perf_counter() - started)
+
+def deployment_report(latencies, errors, elapsed):
+    """
+    Summarizes a run per deployment: requests, errors, requests/sec and p50/p99 latency.
+    """
+    return {
+        deployment: {
+            "requests": len(values),
+            "errors": errors[deployment],
+            "requests_per_sec": len(values) / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": percentile(values, 50),
+            "p99_ms": percentile(values, 99),
+        }
+        for deployment, values in latencies.items()
+    }
+
+def print_deployment_report(report):
+    for deployment, stats in report.items():
+        print(f"{deployment}: {stats['requests']} requests ({stats['errors']} errors), "
+              f"{stats['requests_per_sec']:.1f} req/sec, p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms")
+
+def main():
+    """
+    Usage: python batch_clu.py <utterances.jsonl|csv> <results.parquet> [deployment ...]
+    """
+    if len(sys.argv) < 3:
+        print(main.__doc__.strip())
+        sys.exit(1)
+    input_path, output_path = sys.argv[1], sys.argv[2]
+    deployments = sys.argv[3:] or [deployment_name]
+
+    report = asyncio.run(run_batch_async(iter_utterances(input_path), output_path, deployments))
+    print_deployment_report(report)
+    print(f"Results written to {output_path}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.latency import percentile
+from common.qna_answer_cache import QnAAnswerCache, fetch_last_deployed
+from mock_language_service import MockLanguageService
+import test_customer_support_qa as qa
+
+TOPICS = ["track my shipment", "get a refund", "cancel my order", "check baggage rules", "change my address"]
+PREFIXES = ["How can I", "how do i", "HOW CAN I", "Where can I", "Can I"]
+SUFFIXES = ["?", "", "??", " please?", "."]
+
+def make_traffic(num_questions, seed=7):
+    """
+    Generates support traffic: a few hundred phrasings, with popular ones asked far more often.
+    """
+    rng = random.Random(seed)
+    phrasings = [f"{prefix} {topic} {variant}{suffix}".replace("  ", " ")
+                 for prefix in PREFIXES for topic in TOPICS for variant in ("", "now", "today", "online")
+                 for suffix in SUFFIXES]
+    weights = [1 / (rank + 1) for rank in range(len(phrasings))]
+    return rng.choices(phrasings, weights=weights, k=num_questions)
+
+def run(questions, cache):
+    latencies = []
+    for question in questions:
+        started = time.perf_counter()
+        qa.ask_question(question, cache=cache)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+def main():
+    num_questions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    service = MockLanguageService({qa.deployment_name: {"latency_ms": 30.0}})
+    qa.endpoint = service.start()
+    qa.url = f"{qa.endpoint}/language/:query-knowledgebases?api-version=2021-10-01"
+    questions = make_traffic(num_questions)
+
+    uncached = run(questions, None)
+    print(f"No cache:   p50={percentile(uncached, 50):.2f}ms p99={percentile(uncached, 99):.2f}ms, "
+          f"{len(questions)} service calls")
+
+    with tempfile.TemporaryDirectory() as folder:
+        cache = QnAAnswerCache(lambda project, deployment: fetch_last_deployed(qa.endpoint, qa.api_key, project, deployment),
+                               os.path.join(folder, "cache.sqlite"), check_interval=0.5)
+        before = service.requests
+        cached = run(questions, cache)
+        print(f"With cache: p50={percentile(cached, 50):.2f}ms p99={percentile(cached, 99):.2f}ms, "
+              f"{service.requests - before} service calls")
+        cache.print_stats()
+
+        # A redeploy must drop every cached answer once the next check runs
+        service.redeploy(qa.deployment_name)
+        time.sleep(0.5)
+        before = service.requests
+        run(questions[:200], cache)
+        print(f"After redeploy: {service.requests - before} service calls for 200 questions")
+        cache.print_stats()
+        print("Most asked:")
+        for _, _, question, _, hits in cache.top_entries(5):
+            print(f"  {hits:>5}  {question}")
+        cache.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.latency import percentile
+from mock_language_service import MockLanguageService
+from qna_sessions import QnASessionManager
+import test_flight_agency_qna as qna
+
+THINK_TIME = 0.3
+
+def conversation(manager, user_id):
+    """
+    One user asks a question, reads the answer, then clicks its first follow-up prompt.
+
+    Returns:
+        float: Milliseconds the prompt click took.
+    """
+    manager.ask(user_id, "How can I cancel a reservation?")
+    time.sleep(THINK_TIME)
+    prompt = manager.follow_ups(user_id)[0]
+    started = time.perf_counter()
+    result = manager.ask(user_id, prompt)
+    elapsed = (time.perf_counter() - started) * 1000
+    assert result["answers"][0]["id"] == 5, result
+    return elapsed
+
+def main():
+    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    service = MockLanguageService({qna.deployment_name: {"latency_ms": 60.0}})
+    qna.url = f"{service.start()}/language/:query-knowledgebases?api-version=2021-10-01"
+
+    for prefetch_prompts in (0, 2):
+        manager = QnASessionManager(prefetch_prompts=prefetch_prompts, max_workers=16)
+        with ThreadPoolExecutor(max_workers=50) as users:
+            clicks = list(users.map(lambda user: conversation(manager, f"user{user}"), range(num_users)))
+        label = "prefetch" if prefetch_prompts else "no prefetch"
+        print(f"{label:>11}: prompt click p50={percentile(clicks, 50):.2f}ms p99={percentile(clicks, 99):.2f}ms")
+        manager.print_stats()
+        manager.close()
+
+if __name__ == "__main__":
+    main()
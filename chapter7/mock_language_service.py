@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from aiohttp import web
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from shadow_compare import SERVICES, print_report, run_shadow_async
+
+# Keyword -> intent for the travel chatbot's CLU model
+INTENTS = {"book": "BookFlight", "flight": "BookFlight", "cancel": "CancelBooking",
+           "weather": "GetWeather", "hotel": "BookHotel"}
+
+# A tiny knowledge base shared by both question answering projects: keyword -> (answer ID, answer)
+KNOWLEDGE_BASE = {
+    "track": (1, "You can track your shipment from the Orders page."),
+    "cancel": (2, "Reservations can be cancelled up to 24 hours before departure."),
+    "refund": (3, "Refunds are issued to the original payment method within 5 days."),
+    "baggage": (4, "Each passenger may check one bag of up to 23 kg."),
+}
+
+# Answer ID -> follow-up prompts (display text, answer ID); prompt answers are reached by qnaId only
+FOLLOW_UPS = {
+    2: [("Cancel with a refund", 5), ("Cancel without a refund", 6)],
+    4: [("Extra baggage fees", 7)],
+}
+PROMPT_ANSWERS = {
+    5: "Refundable fares are refunded in full when cancelled online.",
+    6: "Non-refundable fares can be converted to travel credit.",
+    7: "Each extra bag costs 40 USD when added online.",
+}
+
+def _fraction(*parts):
+    """
+    Maps its arguments to a stable number in [0, 1), so every run gives the same answers.
+    """
+    digest = hashlib.sha256("|".join(map(str, parts)).encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+class MockLanguageService:
+    """
+    Local stand-in for the analyze-conversations and query-knowledgebases endpoints.
+
+    Each deployment has its own behaviour: latency_ms (mean service time),
+    drift (share of queries it answers differently from the reference model)
+    and confidence_shift (added to every confidence score). Unknown
+    deployments behave like the reference model. redeploy() changes the
+    lastDeployedDateTime the project deployments listing reports.
+    """
+
+    def __init__(self, deployments):
+        self.deployments = deployments
+        self.requests = 0
+        self.base_url = None
+        self.deployed_at = {}
+
+    def redeploy(self, deployment):
+        self.deployed_at[deployment] = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + f".{time.time_ns() % 10**9:09d}Z"
+
+    def _profile(self, deployment):
+        return dict({"latency_ms": 20.0, "drift": 0.0, "confidence_shift": 0.0}, **self.deployments.get(deployment, {}))
+
+    def _confidence(self, profile, text):
+        return round(min(1.0, max(0.0, 0.6 + 0.35 * _fraction("confidence", text) + profile["confidence_shift"])), 4)
+
+    def analyze_conversation(self, body, profile, deployment):
+        text = body["analysisInput"]["conversationItem"]["text"]
+        words = text.lower().split()
+        intent = next((INTENTS[word] for word in words if word in INTENTS), "None")
+        if _fraction(deployment, text) < profile["drift"]:
+            choices = sorted(set(INTENTS.values()) - {intent})
+            intent = choices[int(_fraction("intent", deployment, text) * len(choices))]
+        entities = [{"category": "Destination", "text": match.group(1), "offset": match.start(1),
+                     "length": len(match.group(1)), "confidenceScore": 1}
+                    for match in re.finditer(r"\bto ([A-Z][a-z]+(?: [A-Z][a-z]+)*)", text)]
+        return {"kind": "ConversationResult", "result": {"query": text, "prediction": {
+            "topIntent": intent, "projectKind": "Conversation",
+            "intents": [{"category": intent, "confidenceScore": self._confidence(profile, text)}],
+            "entities": entities}}}
+
+    def query_knowledgebase(self, body, profile, deployment):
+        question = body["question"]
+        if body.get("qnaId") in PROMPT_ANSWERS:
+            return {"answers": [{"id": body["qnaId"], "answer": PROMPT_ANSWERS[body["qnaId"]],
+                                 "confidenceScore": 1.0, "questions": [question], "context": {"isContextOnly": False, "prompts": []}}]}
+        match = next((entry for keyword, entry in KNOWLEDGE_BASE.items() if keyword in question.lower()), None)
+        if _fraction(deployment, question) < profile["drift"]:
+            entries = list(KNOWLEDGE_BASE.values())
+            match = entries[int(_fraction("answer", deployment, question) * len(entries))]
+        if match is None:
+            return {"answers": [{"id": -1, "answer": "No good match found in KB.", "confidenceScore": 0.0}]}
+        answer_id, answer = match
+        return {"answers": [{"id": answer_id, "answer": answer, "confidenceScore": self._confidence(profile, question),
+                             "questions": [question], "context": {"isContextOnly": False, "prompts": [
+                                 {"displayOrder": order, "qnaId": qna_id, "displayText": text}
+                                 for order, (text, qna_id) in enumerate(FOLLOW_UPS.get(answer_id, []))]}}]}
+
+    async def handle(self, request):
+        self.requests += 1
+        body = await request.json()
+        deployment = body.get("deploymentName") or body.get("parameters", {}).get("deploymentName")
+        profile = self._profile(deployment)
+        # Service time varies per request, with an occasional slow one as in production
+        latency = profile["latency_ms"] * random.uniform(0.5, 1.5) * (5 if random.random() < 0.01 else 1)
+        await asyncio.sleep(latency / 1000)
+        if request.path.endswith(":analyze-conversations"):
+            return web.json_response(self.analyze_conversation(body, profile, deployment))
+        if request.path.endswith(":query-knowledgebases"):
+            return web.json_response(self.query_knowledgebase(body, profile, deployment))
+        return web.json_response({"error": {"code": "NotFound", "message": request.path}}, status=404)
+
+    async def list_deployments(self, request):
+        return web.json_response({"value": [
+            {"deploymentName": deployment, "lastDeployedDateTime": self.deployed_at.get(deployment, "2024-01-01T00:00:00Z")}
+            for deployment in self.deployments
+        ]})
+
+    def start(self):
+        """
+        Serves the mock on a free local port in a background thread.
+
+        Returns:
+            str: Base URL to pass as the endpoint.
+        """
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        app = web.Application()
+        app.router.add_get('/language/query-knowledgebases/projects/{project}/deployments', self.list_deployments)
+        app.router.add_post('/{tail:.*}', self.handle)
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port, backlog=1024).start())
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self.base_url
+
+SAMPLE_QUERIES = {
+    "clu": ["I want to book a flight to New York next Monday", "Cancel my booking to Paris",
+            "What is the weather in Seattle", "Find me a hotel near the airport", "Hello there"],
+    "customer_support": ["How can I track my shipment?", "When will I get my refund?", "Do you sell gift cards?"],
+    "flight_agency": ["How can I cancel a reservation?", "How much baggage can I bring?", "Can I change seats?"],
+}
+
+def main():
+    """
+    Usage: python mock_language_service.py [queries per service]
+
+    Replays sample traffic for every chapter7 service against a local mock with
+    two deployments: a baseline and a faster candidate that answers 10% of
+    queries differently.
+    """
+    num_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    service = MockLanguageService({
+        "baseline": {"latency_ms": 40.0},
+        "candidate": {"latency_ms": 25.0, "drift": 0.1, "confidence_shift": 0.03},
+    })
+    endpoint = service.start()
+
+    with tempfile.TemporaryDirectory() as folder:
+        for name in SERVICES:
+            samples = SAMPLE_QUERIES[name]
+            queries = ((str(i), f"{samples[i % len(samples)]} #{i}") for i in range(num_queries))
+            aligned_path = os.path.join(folder, f"{name}_aligned.jsonl")
+            report = asyncio.run(run_shadow_async(name, queries, ["baseline", "candidate"], aligned_path, endpoint=endpoint))
+            print(f"\n== {name} ==")
+            print_report(report)
+            with open(aligned_path, encoding="utf-8") as f:
+                print("First aligned record:", json.dumps(json.loads(f.readline()))[:300])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.qna_answer_cache import make_answer_key, normalize_question
+import test_flight_agency_qna as qna
+
+class SessionState:
+    """
+    Dialog state of one user: the last answer, the question it answered, and its follow-up prompts.
+    """
+
+    __slots__ = ("qna_id", "previous_question", "prompts", "last_seen")
+
+    def __init__(self):
+        self.qna_id = None
+        self.previous_question = None
+        # Normalized display text -> (request body, prefetch future or None)
+        self.prompts = {}
+        self.last_seen = time.monotonic()
+
+def build_follow_up_request(prompt_text, prompt_qna_id, previous_qna_id, previous_question):
+    """
+    Builds the request for a clicked follow-up prompt.
+
+    qnaId selects the prompt's own answer; the context tells the service which
+    answer and question the prompt was offered under.
+    """
+    body = qna.build_request(prompt_text)
+    if prompt_qna_id is not None:
+        body["qnaId"] = prompt_qna_id
+    body["context"] = {"previousQnAId": previous_qna_id, "previousUserQuery": previous_question}
+    return body
+
+def get_prompts(result):
+    """
+    Returns the follow-up prompts of a response's top answer, in display order.
+    """
+    answers = result.get("answers") or []
+    if not answers:
+        return []
+    prompts = (answers[0].get("context") or {}).get("prompts") or []
+    return sorted(prompts, key=lambda prompt: prompt.get("displayOrder", 0))
+
+class QnASessionManager:
+    """
+    Keeps per-user multi-turn state for a question answering deployment.
+
+    ask(user_id, question) sends the question with the user's context
+    (previousQnAId and previousUserQuery), remembers the answer, and starts
+    fetching the answers to its first prefetch_prompts follow-up prompts in
+    the background. If the user then asks one of those prompts, the prefetched
+    answer is returned without another round trip. Prefetches of the same
+    request by several users are shared, and go through the answer cache when
+    one is given. Prefetches are never cancelled: another user may be waiting
+    on the same one, and with a cache the answer is kept for later.
+
+    At most max_sessions sessions are kept; the least recently active one is
+    evicted first, and sessions idle for longer than ttl seconds expire.
+    """
+
+    def __init__(self, send=None, max_sessions=100000, ttl=1800.0, prefetch_prompts=2, max_workers=8, cache=None):
+        self.send = send or self._post
+        self.local = threading.local()
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.prefetch_prompts = prefetch_prompts
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = threading.Lock()
+        self.sessions = OrderedDict()
+        self.inflight = {}
+        self.stats = {"questions": 0, "prompt_clicks": 0, "prefetch_hits": 0, "prefetch_waits": 0,
+                      "prefetches": 0, "evicted": 0}
+
+    def _post(self, body):
+        # One session per thread, so each worker reuses its own keep-alive connection
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        response = session.post(qna.url, headers=qna.headers, json=body)
+        response.raise_for_status()
+        return response.json()
+
+    def _query(self, body):
+        return self.send(body) if self.cache is None else self.cache.query(body, self.send)
+
+    def _session(self, user_id):
+        now = time.monotonic()
+        with self.lock:
+            state = self.sessions.pop(user_id, None)
+            if state is None or now - state.last_seen > self.ttl:
+                state = SessionState()
+            state.last_seen = now
+            self.sessions[user_id] = state
+            # Sessions are ordered by last activity, so expired ones are always at the front
+            while self.sessions:
+                oldest_id, oldest = next(iter(self.sessions.items()))
+                if len(self.sessions) <= self.max_sessions and now - oldest.last_seen <= self.ttl:
+                    break
+                del self.sessions[oldest_id]
+                self.stats["evicted"] += 1
+            return state
+
+    def _prefetch(self, body):
+        key = make_answer_key(body)[0]
+        with self.lock:
+            future = self.inflight.get(key)
+            if future is not None:
+                return future
+            future = self.executor.submit(self._query, body)
+            self.inflight[key] = future
+            self.stats["prefetches"] += 1
+        # Registered outside the lock: a future that is already done runs the callback right here,
+        # and _forget() takes the lock itself
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return future
+
+    def _forget(self, key, future):
+        with self.lock:
+            if self.inflight.get(key) is future:
+                del self.inflight[key]
+
+    def ask(self, user_id, question):
+        """
+        Answers a user's question in the context of their conversation so far.
+
+        Returns:
+            dict: The query-knowledgebases response.
+        """
+        state = self._session(user_id)
+        prompt = state.prompts.get(normalize_question(question))
+        future = None
+        if prompt is not None:
+            body, future = prompt
+        else:
+            body = qna.build_request(question)
+            if state.qna_id is not None:
+                body["context"] = {"previousQnAId": state.qna_id, "previousUserQuery": state.previous_question}
+        with self.lock:
+            self.stats["questions"] += 1
+            if prompt is not None:
+                self.stats["prompt_clicks"] += 1
+            if future is not None:
+                self.stats["prefetch_hits" if future.done() else "prefetch_waits"] += 1
+
+        result = None
+        if future is not None:
+            try:
+                result = future.result()
+            except Exception:
+                result = None  # Fall back to asking directly
+        if result is None:
+            result = self._query(body)
+
+        answers = result.get("answers") or []
+        state.qna_id = answers[0].get("id") if answers else None
+        state.previous_question = question
+        state.prompts = {}
+        for index, item in enumerate(get_prompts(result)):
+            prompt_body = build_follow_up_request(item["displayText"], item.get("qnaId"), state.qna_id, question)
+            prefetched = self._prefetch(prompt_body) if index < self.prefetch_prompts else None
+            state.prompts[normalize_question(item["displayText"])] = (prompt_body, prefetched)
+        return result
+
+    def follow_ups(self, user_id):
+        """
+        Returns the display texts of the follow-up prompts currently offered to a user.
+        """
+        with self.lock:
+            state = self.sessions.get(user_id)
+            return [] if state is None else [body["question"] for body, _ in state.prompts.values()]
+
+    def end_session(self, user_id):
+        with self.lock:
+            self.sessions.pop(user_id, None)
+
+    def print_stats(self):
+        stats = self.stats
+        print(f"Sessions: {len(self.sessions)} active, {stats['evicted']} evicted; {stats['questions']} questions, "
+              f"{stats['prompt_clicks']} prompt clicks ({stats['prefetch_hits']} answered from prefetch, "
+              f"{stats['prefetch_waits']} waited on a prefetch), {stats['prefetches']} prefetches sent")
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.async_http import AsyncHttpClient
+from common.latency import percentile
+from batch_clu import iter_utterances
+import test_customer_support_qa
+import test_flight_agency_qna
+import test_travel_chatbot
+
+# Service name -> the sample module whose url, headers and build_request() are replayed
+SERVICES = {
+    "clu": test_travel_chatbot,
+    "customer_support": test_customer_support_qa,
+    "flight_agency": test_flight_agency_qna,
+}
+
+def summarize_response(service, result):
+    """
+    Reduces a response to what is compared across deployments.
+
+    Returns:
+        dict: label (top intent, or ID of the top answer), confidence, and
+            entities (CLU) or answer text (question answering).
+    """
+    if service == "clu":
+        prediction = result["result"]["prediction"]
+        label = prediction.get("topIntent")
+        confidence = next((intent["confidenceScore"] for intent in prediction.get("intents", [])
+                           if intent["category"] == label), None)
+        entities = sorted({(entity["category"], entity["text"]) for entity in prediction.get("entities", [])})
+        return {"label": label, "confidence": confidence, "entities": entities}
+
+    answers = result.get("answers") or []
+    if not answers:
+        return {"label": None, "confidence": None, "answer": None}
+    answer = answers[0]
+    return {"label": answer.get("id"), "confidence": answer.get("confidenceScore"), "answer": answer.get("answer")}
+
+def service_url(service, endpoint=None):
+    """
+    Returns the URL a service's requests go to, optionally on a different host (e.g. a local mock).
+    """
+    module = SERVICES[service]
+    return module.url if endpoint is None else module.url.replace(module.endpoint, endpoint.rstrip("/"), 1)
+
+async def query_deployment(client, service, url, text, deployment):
+    module = SERVICES[service]
+    started = time.perf_counter()
+    try:
+        result = await client.post_json(url, headers=module.headers, json=module.build_request(text, deployment=deployment))
+        summary = summarize_response(service, result)
+    except Exception as e:
+        summary = {"label": None, "confidence": None, "error": str(e)}
+    summary["latency_ms"] = (time.perf_counter() - started) * 1000
+    return summary
+
+async def shadow_query(client, service, url, query_id, text, deployments):
+    """
+    Sends one query to every deployment at once and aligns the responses.
+
+    Returns:
+        dict: The query and a summary per deployment.
+    """
+    summaries = await asyncio.gather(*(query_deployment(client, service, url, text, deployment)
+                                       for deployment in deployments))
+    return {"id": query_id, "text": text, "responses": dict(zip(deployments, summaries))}
+
+class ComparisonReport:
+    """
+    Accumulates agreement and latency statistics of each deployment against a baseline.
+    """
+
+    def __init__(self, deployments):
+        self.baseline = deployments[0]
+        self.deployments = deployments
+        self.queries = 0
+        self.latencies = {deployment: [] for deployment in deployments}
+        self.errors = Counter()
+        self.agreements = Counter()
+        self.entity_agreements = Counter()
+        self.confidence_deltas = {deployment: [] for deployment in deployments[1:]}
+        self.disagreements = {deployment: Counter() for deployment in deployments[1:]}
+
+    def add(self, record):
+        self.queries += 1
+        responses = record["responses"]
+        baseline = responses[self.baseline]
+        for deployment, summary in responses.items():
+            self.latencies[deployment].append(summary["latency_ms"])
+            self.errors[deployment] += "error" in summary
+        for deployment in self.deployments[1:]:
+            candidate = responses[deployment]
+            if candidate["label"] == baseline["label"]:
+                self.agreements[deployment] += 1
+            else:
+                self.disagreements[deployment][(baseline["label"], candidate["label"])] += 1
+            if candidate.get("entities") == baseline.get("entities"):
+                self.entity_agreements[deployment] += 1
+            if candidate["confidence"] is not None and baseline["confidence"] is not None:
+                self.confidence_deltas[deployment].append(candidate["confidence"] - baseline["confidence"])
+
+    def to_dict(self, top_disagreements=10):
+        report = {"queries": self.queries, "baseline": self.baseline, "deployments": {}}
+        for deployment in self.deployments:
+            stats = {
+                "errors": self.errors[deployment],
+                "p50_ms": percentile(self.latencies[deployment], 50),
+                "p99_ms": percentile(self.latencies[deployment], 99),
+            }
+            if deployment != self.baseline:
+                deltas = self.confidence_deltas[deployment]
+                stats.update({
+                    "label_agreement": self.agreements[deployment] / max(1, self.queries),
+                    "entity_agreement": self.entity_agreements[deployment] / max(1, self.queries),
+                    "mean_confidence_delta": sum(deltas) / len(deltas) if deltas else None,
+                    "mean_abs_confidence_delta": sum(abs(delta) for delta in deltas) / len(deltas) if deltas else None,
+                    "top_disagreements": [{"baseline": baseline, "candidate": candidate, "count": count}
+                                          for (baseline, candidate), count
+                                          in self.disagreements[deployment].most_common(top_disagreements)],
+                })
+            report["deployments"][deployment] = stats
+        return report
+
+def print_report(report):
+    print(f"{report['queries']} queries, baseline {report['baseline']}")
+    for deployment, stats in report["deployments"].items():
+        line = f"{deployment}: p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms, {stats['errors']} errors"
+        if "label_agreement" in stats:
+            line += f", label agreement {stats['label_agreement']:.1%}"
+            if stats["mean_confidence_delta"] is not None:
+                line += f", confidence delta {stats['mean_confidence_delta']:+.3f}"
+        print(line)
+        for disagreement in stats.get("top_disagreements", [])[:3]:
+            print(f"    {disagreement['baseline']} -> {disagreement['candidate']}: {disagreement['count']}")
+
+async def run_shadow_async(service, queries, deployments, aligned_path, endpoint=None, max_in_flight=50):
+    """
+    Replays queries against several deployments side by side.
+
+    Each query goes to every deployment concurrently; at most max_in_flight
+    queries (each fanned out to all deployments) are open at once. The
+    aligned responses are written one JSON line per query as they complete,
+    and every deployment after the first is compared with the first.
+
+    Args:
+        service (str): "clu", "customer_support" or "flight_agency".
+        queries (iterable): (ID, text) pairs, e.g. from iter_utterances().
+        deployments (list): Deployment names; the first is the baseline.
+        aligned_path (str): JSONL file for the aligned responses.
+        endpoint (str, optional): Send to this host instead of the sample's endpoint, e.g. a local mock.
+        max_in_flight (int): Maximum queries in flight at once.
+
+    Returns:
+        dict: The agreement/latency report.
+    """
+    if len(deployments) < 2:
+        raise ValueError("At least two deployments are needed for a comparison.")
+    url = service_url(service, endpoint)
+    report = ComparisonReport(deployments)
+    semaphore = asyncio.Semaphore(max_in_flight)
+    pending = set()
+
+    with open(aligned_path, "w", encoding="utf-8") as aligned:
+        def collect(task):
+            record = task.result()
+            report.add(record)
+            aligned.write(json.dumps(record) + "\n")
+            semaphore.release()
+
+        async with AsyncHttpClient(max_per_host=max_in_flight * len(deployments)) as client:
+            for query_id, text in queries:
+                await semaphore.acquire()
+                task = asyncio.ensure_future(shadow_query(client, service, url, query_id, text, deployments))
+                task.add_done_callback(collect)
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+    return report.to_dict()
+
+def main():
+    """
+    Usage: python shadow_compare.py <clu|customer_support|flight_agency> <queries.jsonl|csv> <baseline> <candidate> [...]
+
+    Queries are read from the "text" field or column. Writes shadow_aligned.jsonl and shadow_report.json.
+    """
+    if len(sys.argv) < 5 or sys.argv[1] not in SERVICES:
+        print(main.__doc__.strip())
+        sys.exit(1)
+    service, queries_path, deployments = sys.argv[1], sys.argv[2], sys.argv[3:]
+
+    report = asyncio.run(run_shadow_async(service, iter_utterances(queries_path), deployments, "shadow_aligned.jsonl"))
+    with open("shadow_report.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
+import os
+import sys
 import requests
 import json
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.async_http import AsyncHttpClient, gather_limited
+from common.qna_answer_cache import QnAAnswerCache, fetch_last_deployed
+
 # Replace the placeholders with your actual values
 endpoint = "https://<your-resource-name>.cognitiveservices.azure.com"
 api_key = "<your-api-key>"
@@ -16,34 +22,56 @@ headers = {
     "Content-Type": "application/json"
 }
 
-# The question to ask
-question = "How can I track my shipment?"
-
-# The data to send in the request
-data = {
-    "question": question,
-    "top": 1,
-    "confidenceScoreThreshold": 0.2,
-    "includeUnstructuredSources": True,
-    "shortAnswerOptions": {
-        "confidenceScoreThreshold": 0.2,
+def build_request(question, project=None, deployment=None):
+    # The data to send in the request
+    return {
+        "question": question,
         "top": 1,
-        "answerSpanRequest": {
-            "enable": True,
+        "confidenceScoreThreshold": 0.2,
+        "includeUnstructuredSources": True,
+        "shortAnswerOptions": {
             "confidenceScoreThreshold": 0.2,
-            "topAnswersWithSpan": 1
-        }
-    },
-    "knowledgeBaseQuestionAnsweringOptions": {
-        "enable": True
-    },
-    "projectName": project_name,
-    "deploymentName": deployment_name
-}
+            "top": 1,
+            "answerSpanRequest": {
+                "enable": True,
+                "confidenceScoreThreshold": 0.2,
+                "topAnswersWithSpan": 1
+            }
+        },
+        "knowledgeBaseQuestionAnsweringOptions": {
+            "enable": True
+        },
+        "projectName": project or project_name,
+        "deploymentName": deployment or deployment_name
+    }
+
+def get_answer_cache(db_path="qna_answer_cache.sqlite"):
+    # Answer cache that is cleared whenever the project is redeployed
+    return QnAAnswerCache(lambda project, deployment: fetch_last_deployed(endpoint, api_key, project, deployment), db_path)
+
+def ask_question(question, cache=None):
+    def send(body):
+        return requests.post(url, headers=headers, json=body).json()
+    body = build_request(question)
+    return send(body) if cache is None else cache.query(body, send)
+
+async def ask_question_async(client, question, cache=None):
+    async def send(body):
+        return await client.post_json(url, headers=headers, json=body)
+    body = build_request(question)
+    return await (send(body) if cache is None else cache.query_async(body, send))
+
+async def ask_questions_async(questions, max_in_flight=100, cache=None):
+    # Async entry point: keeps up to max_in_flight questions in flight over one connection pool
+    async with AsyncHttpClient(max_per_host=max_in_flight) as client:
+        return await gather_limited((ask_question_async(client, question, cache) for question in questions), max_in_flight)
+
+if __name__ == "__main__":
+    # The question to ask
+    question = "How can I track my shipment?"
 
-# Send the request
-response = requests.post(url, headers=headers, json=data)
-result = response.json()
+    # Send the request
+    result = ask_question(question)
 
-# Print the result
-print(json.dumps(result, indent=2))
+    # Print the result
+    print(json.dumps(result, indent=2))
@@ -1,6 +1,12 @@
+import os
+import sys
 import requests
 import json
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.async_http import AsyncHttpClient, gather_limited
+from common.qna_answer_cache import QnAAnswerCache, fetch_last_deployed
+
 # Replace the placeholders with your actual values
 endpoint = "https://<your-resource-name>.cognitiveservices.azure.com"
 api_key = "<your-api-key>"
@@ -16,55 +22,77 @@ headers = {
     "Content-Type": "application/json"
 }
 
-# Initial question
-question = "How can I cancel a reservation?"
-
-# The data to send in the initial request
-data = {
-    "question": question,
-    "top": 1,
-    "userId": "Default",
-    "isTest": False,
-    "context": {},
-    "projectName": project_name,
-    "deploymentName": deployment_name
-}
-
-# Send the initial request
-response = requests.post(url, headers=headers, json=data)
-initial_result = response.json()
-
-# Print the initial result
-print("Initial Response:")
-print(json.dumps(initial_result, indent=2))
-
-# Check if there are follow-up prompts
-if initial_result["answers"] and initial_result["answers"][0]["context"] and initial_result["answers"][0]["context"]["prompts"]:
-    # Get the first follow-up prompt
-    follow_up_prompt = initial_result["answers"][0]["context"]["prompts"][0]["displayText"]
-    qna_id = initial_result["answers"][0]["id"]
-    
-    # Prepare follow-up request data
-    follow_up_data = {
-        "question": follow_up_prompt,
+def build_request(question, qna_id=None, previous_question=None, project=None, deployment=None):
+    # The data to send; follow-up requests carry the previous answer's ID and question as context
+    data = {
+        "question": question,
         "top": 1,
         "userId": "Default",
         "isTest": False,
-        "qnaId": qna_id,
-        "context": {
-            "previousQnAId": qna_id,
-            "previousUserQuery": question
-        },
-        "projectName": project_name,
-        "deploymentName": deployment_name
+        "context": {},
+        "projectName": project or project_name,
+        "deploymentName": deployment or deployment_name
     }
-    
-    # Send the follow-up request
-    follow_up_response = requests.post(url, headers=headers, json=follow_up_data)
-    follow_up_result = follow_up_response.json()
-    
-    # Print the follow-up result
-    print("\nFollow-Up Response:")
-    print(json.dumps(follow_up_result, indent=2))
-else:
-    print("No follow-up prompts available.")
+    if qna_id is not None:
+        data["qnaId"] = qna_id
+        data["context"] = {
+            "previousQnAId": qna_id,
+            "previousUserQuery": previous_question
+        }
+    return data
+
+def get_follow_up(result):
+    # Returns the first follow-up prompt and the answer ID it belongs to, or None
+    answers = result.get("answers")
+    if answers and answers[0].get("context") and answers[0]["context"].get("prompts"):
+        return answers[0]["context"]["prompts"][0]["displayText"], answers[0]["id"]
+    return None
+
+def get_answer_cache(db_path="qna_answer_cache.sqlite"):
+    # Answer cache that is cleared whenever the project is redeployed
+    return QnAAnswerCache(lambda project, deployment: fetch_last_deployed(endpoint, api_key, project, deployment), db_path)
+
+def ask_question(question, qna_id=None, previous_question=None, cache=None):
+    def send(body):
+        return requests.post(url, headers=headers, json=body).json()
+    body = build_request(question, qna_id, previous_question)
+    return send(body) if cache is None else cache.query(body, send)
+
+async def ask_question_async(client, question, qna_id=None, previous_question=None, cache=None):
+    async def send(body):
+        return await client.post_json(url, headers=headers, json=body)
+    body = build_request(question, qna_id, previous_question)
+    return await (send(body) if cache is None else cache.query_async(body, send))
+
+async def ask_questions_async(questions, max_in_flight=100, cache=None):
+    # Async entry point: keeps up to max_in_flight questions in flight over one connection pool
+    async with AsyncHttpClient(max_per_host=max_in_flight) as client:
+        return await gather_limited((ask_question_async(client, question, cache=cache) for question in questions), max_in_flight)
+
+def main():
+    # Initial question
+    question = "How can I cancel a reservation?"
+
+    # Send the initial request
+    initial_result = ask_question(question)
+
+    # Print the initial result
+    print("Initial Response:")
+    print(json.dumps(initial_result, indent=2))
+
+    # Check if there are follow-up prompts
+    follow_up = get_follow_up(initial_result)
+    if follow_up:
+        follow_up_prompt, qna_id = follow_up
+
+        # Send the follow-up request
+        follow_up_result = ask_question(follow_up_prompt, qna_id, question)
+
+        # Print the follow-up result
+        print("\nFollow-Up Response:")
+        print(json.dumps(follow_up_result, indent=2))
+    else:
+        print("No follow-up prompts available.")
+
+if __name__ == "__main__":
+    main()
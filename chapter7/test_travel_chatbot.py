@@ -1,6 +1,11 @@
+import os
+import sys
 import requests
 import json
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.async_http import AsyncHttpClient, gather_limited
+
 # Replace the placeholders with your actual values
 endpoint = "https://<your-resource-name>.cognitiveservices.azure.com"
 api_key = "<your-api-key>"
@@ -16,26 +21,42 @@ headers = {
     "Content-Type": "application/json"
 }
 
-# The data to send in the request
-data = {
-    "kind": "Conversation",
-    "analysisInput": {
-        "conversationItem": {
-            "text": "I want to book a flight to New York next Monday",
-            "id": "1",
-            "participantId": "user1"
+def build_request(text, item_id="1", participant_id="user1", project=None, deployment=None):
+    # The data to send in the request
+    return {
+        "kind": "Conversation",
+        "analysisInput": {
+            "conversationItem": {
+                "text": text,
+                "id": item_id,
+                "participantId": participant_id
+            }
+        },
+        "parameters": {
+            "projectName": project or project_name,
+            "deploymentName": deployment or deployment_name,
+            "stringIndexType": "TextElement_V8"
         }
-    },
-    "parameters": {
-        "projectName": project_name,
-        "deploymentName": deployment_name,
-        "stringIndexType": "TextElement_V8"
     }
-}
 
-# Send the request
-response = requests.post(url, headers=headers, json=data)
-result = response.json()
+def analyze_conversation(text):
+    response = requests.post(url, headers=headers, json=build_request(text))
+    return response.json()
+
+async def analyze_conversation_async(client, text, item_id="1"):
+    return await client.post_json(url, headers=headers, json=build_request(text, item_id))
+
+async def analyze_conversations_async(texts, max_in_flight=100):
+    # Async entry point: keeps up to max_in_flight utterances in flight over one connection pool
+    async with AsyncHttpClient(max_per_host=max_in_flight) as client:
+        return await gather_limited(
+            (analyze_conversation_async(client, text, str(i + 1)) for i, text in enumerate(texts)),
+            max_in_flight
+        )
+
+if __name__ == "__main__":
+    # Send the request
+    result = analyze_conversation("I want to book a flight to New York next Monday")
 
-# Print the result
-print(json.dumps(result, indent=2))
+    # Print the result
+    print(json.dumps(result, indent=2))
@@ -1,28 +1,174 @@
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 from azure.core.credentials import AzureKeyCredential
 from azure.ai.formrecognizer import DocumentAnalysisClient
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.rate_limiter import get_rate_limiter
+
 # Replace with your endpoint, key, and composed model ID
 endpoint = "<your-endpoint>"
 key = "<your-key>"
 model_id = "<your-composed-model-id>"
 
-# Initialize the client
-document_analysis_client = DocumentAnalysisClient(
-    endpoint=endpoint, credential=AzureKeyCredential(key)
-)
-
 # List of document file names
 document_files = ["TestInvoice.pdf", "TestReceipt.pdf", "TestPurchaseOrder.pdf"]
 
-for document_file in document_files:
-    with open(document_file, "rb") as doc:
-        poller = document_analysis_client.begin_analyze_document(
-            model_id, doc
+DOCUMENT_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+def serialize_value(value):
+    """
+    Converts a field value (dates, currency and address objects, nested fields) to plain JSON types.
+    """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    if isinstance(value, list):
+        return [serialize_value(item) for item in value]
+    if isinstance(value, dict):
+        return {name: serialize_value(item) for name, item in value.items()}
+    if hasattr(value, "value_type") and hasattr(value, "content"):
+        # A nested DocumentField, as found in list and dictionary fields
+        return serialize_value(value.value if value.value is not None else value.content)
+    if hasattr(value, "__dict__"):
+        return {name: serialize_value(item) for name, item in vars(value).items()}
+    return str(value)
+
+def normalize_result(document_file, result, elapsed):
+    """
+    Builds the record written for one analyzed file.
+
+    Returns:
+        dict: file, status, pages, elapsed seconds, and per document its type,
+            confidence and fields (value, content and confidence).
+    """
+    return {
+        "file": document_file,
+        "status": "succeeded",
+        "model_id": result.model_id,
+        "pages": len(result.pages or []),
+        "elapsed": round(elapsed, 2),
+        "documents": [
+            {
+                "doc_type": analyzed_doc.doc_type,
+                "confidence": analyzed_doc.confidence,
+                "fields": {
+                    name: {
+                        "value": serialize_value(field.value if field.value is not None else field.content),
+                        "content": field.content,
+                        "confidence": field.confidence,
+                    }
+                    for name, field in (analyzed_doc.fields or {}).items()
+                },
+            }
+            for analyzed_doc in result.documents or []
+        ],
+    }
+
+def analyze_document(client, model_id, document_file, polling_interval=1):
+    """
+    Analyzes one file and waits for its result.
+
+    Errors are returned in the record rather than raised, so one bad file
+    does not stop a batch.
+    """
+    started = time.perf_counter()
+    try:
+        with open(document_file, "rb") as doc:
+            data = doc.read()
+        # Submissions share the endpoint's limiter, so a large batch backs off together on 429s
+        poller = get_rate_limiter(endpoint).call(
+            client.begin_analyze_document, model_id, data, polling_interval=polling_interval
         )
-        result = poller.result()
+        return normalize_result(document_file, poller.result(), time.perf_counter() - started)
+    except Exception as e:
+        return {"file": document_file, "status": "failed", "error": str(e),
+                "elapsed": round(time.perf_counter() - started, 2), "documents": []}
+
+def analyze_documents(client, model_id, document_files, max_in_flight=16, polling_interval=1):
+    """
+    Analyzes many files concurrently, yielding each record as soon as it is ready.
+
+    At most max_in_flight analyses (submission plus polling) run at once, and
+    files are only read when a slot frees up, so a folder of any size streams
+    through with throughput set by the concurrency limit, not by the slowest file.
+
+    Args:
+        client (DocumentAnalysisClient): Initialized client.
+        model_id (str): Model to analyze with.
+        document_files (iterable): File paths.
+        max_in_flight (int): Maximum analyses in progress at once.
+        polling_interval (float): Seconds between status checks of each analysis.
+
+    Yields:
+        dict: One normalized record per file, in completion order.
+    """
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        pending = set()
+        for document_file in document_files:
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(analyze_document, client, model_id, document_file, polling_interval))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+def iter_document_files(source):
+    """
+    Lists the documents in a folder, recursively.
+    """
+    for root, _, files in os.walk(source):
+        for file_name in sorted(files):
+            if file_name.lower().endswith(DOCUMENT_EXTENSIONS):
+                yield os.path.join(root, file_name)
+
+def print_record(record):
+    if record["status"] != "succeeded":
+        print(f"----- {record['file']} failed: {record['error']} -----")
+        return
+    for idx, analyzed_doc in enumerate(record["documents"]):
+        print(f"----- {record['file']} Document {idx + 1} -----")
+        for name, field in analyzed_doc["fields"].items():
+            print(f"{name}: {field['value']} (Confidence: {field['confidence']})")
+
+def main():
+    """
+    Usage: python document_processor.py [document folder] [results.jsonl]
+
+    Without arguments, analyzes the sample document_files.
+    """
+    # Initialize the client
+    document_analysis_client = DocumentAnalysisClient(
+        endpoint=endpoint, credential=AzureKeyCredential(key)
+    )
+    files = iter_document_files(sys.argv[1]) if len(sys.argv) > 1 else document_files
+    output_path = sys.argv[2] if len(sys.argv) > 2 else None
+
+    started = time.perf_counter()
+    analyzed = failed = 0
+    output = open(output_path, "w", encoding="utf-8") if output_path else None
+    try:
+        for record in analyze_documents(document_analysis_client, model_id, files):
+            if output is not None:
+                output.write(json.dumps(record) + "\n")
+            else:
+                print_record(record)
+            analyzed += 1
+            failed += record["status"] != "succeeded"
+    finally:
+        if output is not None:
+            output.close()
+    elapsed = time.perf_counter() - started
+    print(f"Analyzed {analyzed} files ({failed} failed) in {elapsed:.1f}s, {analyzed / elapsed * 60:.0f} files/min.")
 
-        for idx, analyzed_doc in enumerate(result.documents):
-            print(f"----- {document_file} Document {idx + 1} -----")
-            for name, field in analyzed_doc.fields.items():
-                field_value = field.value if field.value else field.content
-                print(f"{name}: {field_value} (Confidence: {field.confidence})")
+if __name__ == "__main__":
+    main()
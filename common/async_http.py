@@ -0,0 +1,172 @@
+import asyncio
+import json
+import random
+
+from common.rate_limiter import retry_after_seconds
+
+# Statuses worth retrying: throttling and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class HttpError(Exception):
+    """
+    Raised by HttpResponse.raise_for_status() for 4xx/5xx responses.
+    """
+
+    def __init__(self, status, url, body):
+        super().__init__(f"HTTP {status} from {url}: {body[:500]!r}")
+        self.status = status
+        self.url = url
+        self.body = body
+
+class HttpResponse:
+    """
+    A fully read response, so callers never hold a pooled connection open.
+    """
+
+    def __init__(self, status, headers, body, url):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+
+    @property
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise HttpError(self.status, self.url, self.body)
+
+class AsyncHttpClient:
+    """
+    Shared asyncio HTTP client for the REST samples.
+
+    Keeps one keep-alive connection pool for the lifetime of the client, caps
+    the number of connections in total and per host, and retries throttled or
+    transient failures, waiting as long as the service asks through Retry-After.
+
+    When a rate_limiter (common.rate_limiter.AdaptiveRateLimiter) is given, every
+    attempt waits for admission and every response is fed back to it, so 429s
+    slow all callers down instead of each one retrying on its own schedule.
+
+    Use it as an async context manager:
+        async with AsyncHttpClient() as client:
+            response = await client.post(url, headers=headers, json=body)
+    """
+
+    def __init__(self, max_connections=200, max_per_host=100, max_retries=4, timeout=60,
+                 backoff_base=0.5, backoff_max=30, rate_limiter=None):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        if self.session is None:
+            # Imported here so the synchronous samples that share this module run without aiohttp
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_per_host)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, delay)
+
+    async def request(self, method, url, **kwargs):
+        """
+        Sends a request, retrying throttled and transient failures.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            **kwargs: Passed to aiohttp (headers, params, json, data). data may also be
+                a zero-argument callable returning the body; it is called once per
+                attempt, for bodies such as file uploads that cannot be sent twice.
+
+        Returns:
+            HttpResponse: The final response. Error statuses are returned, not raised,
+                once retries are exhausted; call raise_for_status() to raise them.
+        """
+        await self.open()
+        import aiohttp
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            attempt_kwargs = dict(kwargs, data=kwargs["data"]()) if callable(kwargs.get("data")) else kwargs
+            try:
+                async with self.session.request(method, url, **attempt_kwargs) as response:
+                    body = await response.read()
+                    result = HttpResponse(response.status, response.headers, body, url)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if self.rate_limiter is not None:
+                self.rate_limiter.record_response(result.status, result.headers)
+            if result.status not in RETRY_STATUSES or attempt >= self.max_retries:
+                return result
+            if result.status == 429 and self.rate_limiter is not None:
+                # The limiter already holds every caller back for Retry-After
+                attempt += 1
+                continue
+            delay = retry_after_seconds(result.headers)
+            await asyncio.sleep(delay if delay is not None else self._backoff(attempt))
+            attempt += 1
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def get_json(self, url, **kwargs):
+        response = await self.get(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def post_json(self, url, **kwargs):
+        response = await self.post(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+async def gather_limited(coroutines, limit):
+    """
+    Awaits coroutines with at most limit of them running at once.
+
+    Args:
+        coroutines (iterable): Coroutines to run.
+        limit (int): Maximum number running concurrently.
+
+    Returns:
+        list: Results in the same order as the coroutines.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+import requests
+from aiohttp import web
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.async_http import AsyncHttpClient, gather_limited
+
+SERVICE_TIME = 0.05
+
+async def handle(request):
+    """
+    Mock Language/Translator endpoint: echoes the request after a fixed service time.
+    """
+    payload = await request.json()
+    await asyncio.sleep(SERVICE_TIME)
+    return web.json_response({"echo": payload})
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_mock_server(port):
+    """
+    Runs the mock server on its own event loop in a background thread.
+    """
+    app = web.Application()
+    app.router.add_post('/{tail:.*}', handle)
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port, backlog=1024).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+def run_sync(url, num_requests):
+    # The current scripts' pattern: one blocking requests.post per call, a new connection each time
+    for i in range(num_requests):
+        response = requests.post(url, json={"id": i})
+        response.raise_for_status()
+
+async def run_async(url, num_requests, max_in_flight):
+    async with AsyncHttpClient(max_per_host=max_in_flight) as client:
+        await gather_limited((client.post_json(url, json={"id": i}) for i in range(num_requests)), max_in_flight)
+
+def main():
+    num_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    port = free_port()
+    start_mock_server(port)
+    url = f"http://127.0.0.1:{port}/language/:analyze-text"
+
+    started = time.perf_counter()
+    run_sync(url, num_requests)
+    sync_elapsed = time.perf_counter() - started
+    print(f"sync requests.post: {num_requests} requests in {sync_elapsed:.2f}s ({num_requests / sync_elapsed:.0f} req/s)")
+
+    for max_in_flight in (10, 100, 300):
+        started = time.perf_counter()
+        asyncio.run(run_async(url, num_requests, max_in_flight))
+        elapsed = time.perf_counter() - started
+        print(f"async, {max_in_flight} in flight: {num_requests} requests in {elapsed:.2f}s "
+              f"({num_requests / elapsed:.0f} req/s, {sync_elapsed / elapsed:.1f}x)")
+
+if __name__ == "__main__":
+    main()
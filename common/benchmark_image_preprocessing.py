@@ -0,0 +1,111 @@
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from aiohttp import web
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.image_preprocessing import SERVICE_PROFILES, get_process_pool, preprocess_file, preprocess_files
+
+# Uplink the mock endpoint reads request bodies at: 20 Mbit/s
+UPLINK_BYTES_PER_SECOND = 2.5e6
+SERVICE_TIME = 0.05
+
+async def handle(request):
+    """
+    Mock Vision/Face endpoint that reads the upload at a fixed uplink rate.
+    """
+    received = 0
+    async for chunk in request.content.iter_chunked(64 * 1024):
+        received += len(chunk)
+        await asyncio.sleep(len(chunk) / UPLINK_BYTES_PER_SECOND)
+    await asyncio.sleep(SERVICE_TIME)
+    return web.json_response({"received": received})
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_mock_server(port):
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post('/{tail:.*}', handle)
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+def make_corpus(folder, num_images):
+    """
+    Writes camera-resolution JPEGs with EXIF, like unprocessed phone photos.
+    """
+    paths = []
+    exif = Image.Exif()
+    exif[0x010f] = "Benchmark Camera"
+    exif[0x0112] = 1
+    for i in range(num_images):
+        # Blurred noise compresses like a real photo: neither flat nor pure noise
+        image = Image.effect_noise((1008, 756), 60 + i).convert("RGB").resize((4032, 3024), Image.BICUBIC)
+        path = os.path.join(folder, f"photo_{i + 1}.jpg")
+        image.save(path, "JPEG", quality=95, exif=exif)
+        paths.append(path)
+    return paths
+
+def main():
+    """
+    Compares raw uploads with preprocessed uploads over a simulated uplink.
+
+    Pass a folder of images to use a real corpus; otherwise a synthetic one is generated.
+    """
+    port = free_port()
+    start_mock_server(port)
+    url = f"http://127.0.0.1:{port}/face/v1.0/detect"
+    session = requests.Session()
+
+    with tempfile.TemporaryDirectory() as folder:
+        if len(sys.argv) > 1:
+            folder = sys.argv[1]
+            paths = sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                           if name.lower().endswith((".jpg", ".jpeg", ".png")))
+        else:
+            paths = make_corpus(folder, 12)
+
+        pool = get_process_pool()
+        for service in SERVICE_PROFILES:
+            raw_latencies = []
+            processed_latencies = []
+            raw_bytes = 0
+            processed_bytes = 0
+            for path in paths:
+                started = time.perf_counter()
+                with open(path, "rb") as f:
+                    data = f.read()
+                session.post(url, data=data).raise_for_status()
+                raw_latencies.append(time.perf_counter() - started)
+                raw_bytes += len(data)
+
+                started = time.perf_counter()
+                data, _ = preprocess_file(path, service)
+                session.post(url, data=data).raise_for_status()
+                processed_latencies.append(time.perf_counter() - started)
+                processed_bytes += len(data)
+
+            started = time.perf_counter()
+            list(preprocess_files(paths, service, pool))
+            pool_elapsed = time.perf_counter() - started
+
+            print(f"{service}: {len(paths)} images, {raw_bytes / 1e6:.1f} MB -> {processed_bytes / 1e6:.1f} MB "
+                  f"({1 - processed_bytes / raw_bytes:.0%} saved); per image raw {statistics.mean(raw_latencies):.2f}s, "
+                  f"preprocessed {statistics.mean(processed_latencies):.2f}s end to end; "
+                  f"process pool preprocesses {len(paths) / pool_elapsed:.1f} images/s")
+
+if __name__ == "__main__":
+    main()
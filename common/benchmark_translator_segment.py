@@ -0,0 +1,91 @@
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from urllib.parse import parse_qs
+
+import requests
+from aiohttp import web
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.translator_bulk import MAX_CHARACTERS_PER_REQUEST, build_translate_url
+from common.translator_segment import translate_document
+
+# Mock service time: fixed overhead plus a per-character cost, like a real translation model
+BASE_SERVICE_TIME = 0.02
+SERVICE_TIME_PER_CHARACTER = 0.00002
+
+PARAGRAPH = ("The quarterly report covers <b>revenue</b>, costs and outlook. Sales grew in every region. "
+             "Customers asked for faster delivery! Did the new warehouse help? It did, by two days. ") * 3
+
+async def handle(request):
+    """
+    Mock Translator /translate endpoint: echoes every text back per target language.
+    """
+    targets = parse_qs(request.query_string).get("to", [])
+    payload = await request.json()
+    characters = sum(len(item["text"]) for item in payload) * len(targets)
+    await asyncio.sleep(BASE_SERVICE_TIME + characters * SERVICE_TIME_PER_CHARACTER)
+    return web.json_response([{"translations": [{"to": lang, "text": item["text"]} for lang in targets]}
+                              for item in payload])
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_mock_server(port):
+    app = web.Application()
+    app.router.add_post('/{tail:.*}', handle)
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port, backlog=1024).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+# Paragraph breaks, some with trailing whitespace before them, which reassembly must keep
+BREAKS = ["\n\n", " \n\n", "\t\n\n", "  \n \n"]
+
+def make_document(num_characters):
+    parts = []
+    while sum(len(p) for p in parts) < num_characters:
+        if parts:
+            parts.append(BREAKS[len(parts) // 2 % len(BREAKS)])
+        # Numbered so no two paragraphs are identical and nothing is deduplicated
+        parts.append(f"Section {len(parts) // 2 + 1}. {PARAGRAPH.strip()}")
+    return "".join(parts)
+
+def translate_whole(endpoint, text, to_langs):
+    # The current scripts' pattern: the whole document as one element of one request
+    url = build_translate_url(endpoint, "en", to_langs) + "&textType=html"
+    response = requests.post(url, json=[{"text": text}])
+    response.raise_for_status()
+    return {t["to"]: t["text"] for t in response.json()[0]["translations"]}
+
+def main():
+    to_langs = ["de", "fr"]
+    port = free_port()
+    start_mock_server(port)
+    endpoint = f"http://127.0.0.1:{port}"
+
+    for num_characters in (2000, 10000, 24000, 100000, 400000):
+        text = make_document(num_characters)
+        line = f"{len(text):>7} characters:"
+        if len(text) * len(to_langs) <= MAX_CHARACTERS_PER_REQUEST:
+            started = time.perf_counter()
+            translate_whole(endpoint, text, to_langs)
+            line += f" single request {time.perf_counter() - started:.2f}s,"
+        else:
+            line += " single request over the limit,"
+
+        started = time.perf_counter()
+        documents = translate_document("key", "region", text, "en", to_langs, endpoint=endpoint)
+        elapsed = time.perf_counter() - started
+        # The mock echoes its input, so reassembly must give back the original document
+        assert all(document == text for document in documents.values())
+        print(f"{line} segmented {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.video_insights_store import InsightsStore
+
+TOPICS = ["Economics", "Sports", "Weather", "Politics", "Technology"]
+FACES = ["Jane Doe", "John Smith", "Ana Lopez", "Wei Chen"]
+
+def make_video_index(video_id, rng, topics=None, faces=None, duration=600):
+    """
+    Builds a Video Indexer index with random topic and face appearances, or the ones given.
+    """
+    def instances(count):
+        result = []
+        for _ in range(count):
+            start = rng.uniform(0, duration - 30)
+            result.append({"start": f"0:00:{start:.1f}", "end": f"0:00:{start + rng.uniform(5, 30):.1f}"})
+        return result
+
+    topics = topics if topics is not None else [(name, instances(3)) for name in rng.sample(TOPICS, 2)]
+    faces = faces if faces is not None else [(name, instances(4)) for name in rng.sample(FACES, 2)]
+    return {"id": video_id, "name": f"Video {video_id}", "durationInSeconds": duration, "videos": [{"id": video_id, "insights": {
+        "topics": [{"name": name, "confidence": 0.9, "instances": spans} for name, spans in topics],
+        "faces": [{"name": name, "confidence": 0.8, "instances": spans} for name, spans in faces],
+    }}]}
+
+def main():
+    num_videos = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = random.Random(7)
+    criteria = {"topics": "Economics", "faces": "Jane Doe"}
+    span = [{"start": "0:00:10", "end": "0:00:40"}]
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = InsightsStore(folder)
+        started = time.perf_counter()
+        store.add([make_video_index(f"v{i}", rng) for i in range(num_videos)])
+        # Only one of the two criteria matches in each of these, so neither may be reported
+        store.add(make_video_index("topic-only", rng, topics=[("Economics", span)], faces=[("Wei Chen", span)]))
+        store.add(make_video_index("face-only", rng, topics=[("Sports", span)], faces=[("Jane Doe", span)]))
+        store.add(make_video_index("both", rng, topics=[("Economics", span)], faces=[("Jane Doe", span)]))
+        # Re-adding a video straight away must still supersede its earlier rows
+        store.add(make_video_index("both", rng, topics=[("Economics", span)], faces=[("Jane Doe", [])]))
+        store.add(make_video_index("both", rng, topics=[("Economics", span)], faces=[("Jane Doe", span)]))
+        store.compact()
+        print(f"Stored {num_videos + 3} videos in {time.perf_counter() - started:.2f}s")
+
+        store.videos()
+        started = time.perf_counter()
+        matches = store.co_occurrences(criteria)
+        elapsed = time.perf_counter() - started
+        video_ids = set(matches["video_id"].to_pylist())
+        assert "both" in video_ids and not video_ids & {"topic-only", "face-only"}, video_ids
+        assert matches["video_id"].to_pylist().count("both") == 1
+        print(f"{matches.num_rows} co-occurrences in {len(video_ids)} videos in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from azure.cognitiveservices.vision.customvision.training.models import ImageFileCreateBatch, ImageFileCreateEntry
+
+from common.image_preprocessing import get_process_pool, preprocess_files
+from common.rate_limiter import get_rate_limiter
+
+# Custom Vision accepts at most 64 images per create_images_from_files call
+MAX_IMAGES_PER_BATCH = 64
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif")
+
+# Per-image statuses worth retrying; format, size and limit errors will fail again
+RETRYABLE_STATUSES = {"ErrorStorage", "ErrorUnknown"}
+
+def iter_folder_images(images_folder, regions=None):
+    """
+    Lazily walks a folder for images, without reading them.
+
+    Args:
+        images_folder (str): Folder to walk.
+        regions (callable or list, optional): Regions for every image, or a function
+            from file name to regions.
+
+    Yields:
+        tuple: (name, path, regions); the name is the path relative to the folder,
+            so images with the same file name in different subfolders stay apart.
+    """
+    for root, _, files in os.walk(images_folder):
+        for file_name in sorted(files):
+            if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                image_path = os.path.join(root, file_name)
+                yield (os.path.relpath(image_path, images_folder).replace(os.sep, "/"), image_path,
+                       regions(file_name) if callable(regions) else regions)
+
+def iter_numbered_images(images_folder, num_images, regions=None):
+    """
+    Lazily yields image_1.jpg ... image_N.jpg from a folder, skipping missing files.
+
+    Yields:
+        tuple: (file name, path, regions).
+    """
+    for image_num in range(1, num_images + 1):
+        file_name = f"image_{image_num}.jpg"
+        image_path = os.path.join(images_folder, file_name)
+        if not os.path.exists(image_path):
+            print(f"Warning: {image_path} does not exist. Skipping.")
+            continue
+        yield file_name, image_path, regions(file_name) if callable(regions) else regions
+
+def _read_file(path):
+    with open(path, "rb") as image_file:
+        return image_file.read()
+
+def _create_entries(images, preprocess=None):
+    paths = [image_path for _, image_path, _ in images]
+    if preprocess:
+        # Regions are normalized to the image size, so they stay valid after resizing
+        contents = [data for data, _ in preprocess_files(paths, preprocess)]
+    else:
+        contents = [_read_file(path) for path in paths]
+    return [ImageFileCreateEntry(name=file_name, contents=data, regions=regions)
+            for (file_name, _, regions), data in zip(images, contents)]
+
+def _normalize_name(name):
+    return os.path.basename(str(name or "").replace("\\", "/")).lower()
+
+def _match_results(images, results):
+    """
+    Pairs each uploaded image with its status in a create_images_from_files result.
+
+    The service does not promise result order, so results are matched on the
+    entry name first, then on the normalized file name; only when no result
+    name matches at all are they taken in request order. An image still
+    without a result is treated like a transient failure.
+
+    Returns:
+        list: One status per image, in images order.
+    """
+    statuses = [None] * len(images)
+    unclaimed = dict(enumerate(results))
+    for match_key in (str, _normalize_name):
+        by_name = {}
+        for position, result in unclaimed.items():
+            by_name.setdefault(match_key(result.source_url), []).append(position)
+        keys = [match_key(file_name) for file_name, _, _ in images]
+        for index, key in enumerate(keys):
+            positions = by_name.get(key)
+            # Only unambiguous pairs: one result and one image with this name
+            if (statuses[index] is None and positions and len(positions) == 1 and positions[0] in unclaimed
+                    and keys.count(key) == 1):
+                statuses[index] = unclaimed.pop(positions[0]).status
+    if len(unclaimed) == len(results) == len(images):
+        # No result carries a recognizable name; a full set of them lines up by position
+        statuses = [result.status for result in results]
+    return [status or "ErrorUnknown" for status in statuses]
+
+def upload_batch(trainer, project_id, images, max_retries=3, retry_delay=2.0, preprocess=None):
+    """
+    Uploads one batch, retrying only the images that came back with a transient error status.
+
+    Image files are read here, so only the batches in flight are held in memory.
+
+    Args:
+        trainer (CustomVisionTrainingClient): Initialized training client.
+        project_id (str): ID of the project.
+        images (list): (file name, path, regions) tuples, at most 64, with unique file names.
+        max_retries (int): Retries for images with a retryable status.
+        retry_delay (float): Seconds before the first retry; doubles on each retry.
+        preprocess (str, optional): SERVICE_PROFILES key to resize and recompress images with.
+
+    Returns:
+        dict: Image path to its final status.
+    """
+    rate_limiter = get_rate_limiter(trainer.config.endpoint)
+    statuses = {}
+    pending = list(images)
+    for attempt in range(max_retries + 1):
+        batch = ImageFileCreateBatch(images=_create_entries(pending, preprocess))
+        upload_result = rate_limiter.call(trainer.create_images_from_files, project_id, batch=batch)
+        retry = []
+        for image, status in zip(pending, _match_results(pending, upload_result.images or [])):
+            statuses[image[1]] = status
+            if status in RETRYABLE_STATUSES:
+                retry.append(image)
+        pending = retry
+        if not pending:
+            break
+        time.sleep(retry_delay * 2 ** attempt)
+    return statuses
+
+def upload_images_parallel(trainer, project_id, images, batch_size=MAX_IMAGES_PER_BATCH, max_workers=4, preprocess=None):
+    """
+    Uploads a stream of images in service-sized batches, several batches at once.
+
+    At most 2 * max_workers batches are read and in flight at any time, so memory
+    stays bounded however many images the stream yields.
+
+    Args:
+        trainer (CustomVisionTrainingClient): Initialized training client.
+        project_id (str): ID of the project.
+        images (iterable): (file name, path, regions) tuples, e.g. from iter_folder_images().
+        batch_size (int): Images per request, at most 64.
+        max_workers (int): Batches uploaded concurrently.
+        preprocess (str, optional): SERVICE_PROFILES key, e.g. 'custom_vision', to resize
+            and recompress images on the shared process pool before upload.
+
+    Returns:
+        dict: Counts of uploaded, duplicate and failed images, and the failed (path, status) pairs.
+    """
+    batch_size = min(batch_size, MAX_IMAGES_PER_BATCH)
+    images = iter(images)
+    summary = {"uploaded": 0, "duplicates": 0, "failed": 0, "failures": []}
+    if preprocess:
+        # Start the decoding processes before any upload thread exists
+        get_process_pool()
+
+    def collect(future):
+        for image_path, status in future.result().items():
+            if status == "OK":
+                summary["uploaded"] += 1
+            elif status == "OKDuplicate":
+                summary["duplicates"] += 1
+            else:
+                summary["failed"] += 1
+                summary["failures"].append((image_path, status))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = set()
+        while True:
+            batch = list(islice(images, batch_size))
+            if batch:
+                in_flight.add(executor.submit(upload_batch, trainer, project_id, batch, preprocess=preprocess))
+            if in_flight and (not batch or len(in_flight) >= 2 * max_workers):
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+            if not batch and not in_flight:
+                break
+    return summary
+
+def print_upload_summary(summary):
+    print(f"Uploaded {summary['uploaded']} images ({summary['duplicates']} duplicates skipped).")
+    for image_path, status in summary["failures"]:
+        print(f"Image {image_path} failed to upload. Error: {status}")
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+DEFAULT_DB_PATH = "image_index.sqlite"
+
+# dHash distance at or below which two images count as the same frame.
+# Must stay below 8 so the byte-bucket lookup in PerceptualIndex finds every match.
+DEFAULT_MAX_DISTANCE = 4
+
+def content_hash(path):
+    """
+    Returns the SHA-256 of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def perceptual_hash(path):
+    """
+    Returns the 64-bit difference hash (dHash) of an image.
+
+    The image is reduced to 9x8 grayscale and each bit records whether a pixel
+    is brighter than its right-hand neighbour, so re-encodes, resizes and
+    near-identical frames get the same or a very close hash.
+    """
+    with Image.open(path) as image:
+        image.draft("L", (64, 64))
+        pixels = list(image.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+class PerceptualIndex:
+    """
+    In-memory near-duplicate lookup over 64-bit perceptual hashes.
+
+    Each hash is filed under its 8 bytes. Two hashes within 7 bits of each other
+    share at least one byte, so only those buckets need comparing.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+
+    def add(self, value, item):
+        for position in range(8):
+            self.buckets.setdefault((position, (value >> (8 * position)) & 0xFF), []).append((value, item))
+
+    def find(self, value, max_distance=DEFAULT_MAX_DISTANCE):
+        """
+        Returns the item of the closest stored hash within max_distance, or None.
+        """
+        best, best_distance = None, max_distance + 1
+        for position in range(8):
+            for other, item in self.buckets.get((position, (value >> (8 * position)) & 0xFF), ()):
+                distance = hamming_distance(value, other)
+                if distance < best_distance:
+                    best, best_distance = item, distance
+        return best
+
+class ImageIndex:
+    """
+    Local record of the images already uploaded to one Custom Vision project.
+
+    Content and perceptual hashes are stored in SQLite per project, so later
+    runs skip images the project already has. Hashes of a run are staged and
+    only written once the upload has succeeded.
+    """
+
+    def __init__(self, project_id, db_path=DEFAULT_DB_PATH):
+        self.project_id = str(project_id)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            "project_id TEXT NOT NULL, sha256 TEXT NOT NULL, dhash TEXT, name TEXT NOT NULL, "
+            "uploaded_at REAL NOT NULL, PRIMARY KEY (project_id, sha256))"
+        )
+        self.connection.commit()
+        self.content = {}
+        self.perceptual = PerceptualIndex()
+        # dHash is stored as hex text because SQLite integers are signed 64-bit
+        for sha256, dhash, name in self.connection.execute(
+                "SELECT sha256, dhash, name FROM images WHERE project_id = ?", (self.project_id,)):
+            self.content[sha256] = name
+            if dhash is not None:
+                self.perceptual.add(int(dhash, 16), name)
+        self.staged = {}
+
+    def find(self, sha256, dhash, max_distance=DEFAULT_MAX_DISTANCE):
+        """
+        Returns the name of a matching image already in the project, or None.
+        """
+        if sha256 in self.content:
+            return self.content[sha256]
+        return self.perceptual.find(dhash, max_distance) if dhash is not None else None
+
+    def stage(self, name, path, sha256, dhash):
+        self.staged[path] = (name, sha256, dhash)
+
+    def commit_uploaded(self, failed_paths=()):
+        """
+        Records every staged image except those that failed to upload.
+
+        Args:
+            failed_paths (iterable): Paths of the images that failed, as reported by upload_images_parallel().
+
+        Returns:
+            int: Number of images recorded.
+        """
+        failed_paths = set(failed_paths)
+        now = time.time()
+        rows = [(self.project_id, sha256, format(dhash, "016x") if dhash is not None else None, name, now)
+                for path, (name, sha256, dhash) in self.staged.items() if path not in failed_paths]
+        self.connection.executemany("INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?)", rows)
+        self.connection.commit()
+        for _, sha256, dhash, name, _ in rows:
+            self.content[sha256] = name
+            if dhash is not None:
+                self.perceptual.add(int(dhash, 16), name)
+        self.staged = {}
+        return len(rows)
+
+    def close(self):
+        self.connection.close()
+
+def _region_key(region):
+    return (region.tag_id, region.left, region.top, region.width, region.height)
+
+def _hash_image(image):
+    name, path, regions = image
+    try:
+        dhash = perceptual_hash(path)
+    except OSError:
+        # Not decodable by Pillow; exact matching still applies
+        dhash = None
+    return name, path, regions, content_hash(path), dhash
+
+def _hash_in_order(executor, images, ahead):
+    """
+    Hashes images on the executor, at most ahead at a time, yielding results in input order.
+    """
+    pending = deque()
+    for image in images:
+        pending.append(executor.submit(_hash_image, image))
+        if len(pending) >= ahead:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def dedupe_images(images, index=None, max_distance=DEFAULT_MAX_DISTANCE, max_workers=8, window=256):
+    """
+    Drops or merges duplicate images before upload, streaming its input.
+
+    Exact copies and near-identical frames within the input are merged into
+    one entry that carries every region of the group. Kept entries are held
+    back for window further images so later copies can still add their
+    regions; a copy that turns up after its entry has been passed on, or that
+    matches something already in the project index, is dropped and its new
+    regions are reported in stats["unmerged"] (see save_unmerged_regions()). Only hashes, regions and
+    names are kept in memory, never image contents.
+
+    Args:
+        images (iterable): (file name, path, regions) tuples.
+        index (ImageIndex, optional): Project index; the kept images are staged in it.
+        max_distance (int): Maximum dHash distance for near duplicates (below 8).
+        max_workers (int): Threads used for hashing.
+        window (int): Kept entries held back for merging before they are yielded.
+
+    Returns:
+        tuple: (iterator of (file name, path, regions) to upload, dict of counts and bytes saved
+            that is filled in as the iterator is consumed).
+    """
+    stats = {"input": 0, "exact_duplicates": 0, "near_duplicates": 0, "already_uploaded": 0, "bytes_saved": 0,
+             "unmerged": []}
+
+    def report_unmerged(name, path, regions, match):
+        if regions:
+            # (dropped image, its path, regions it would have added, image it matched)
+            stats["unmerged"].append((name, path, list(regions), match))
+
+    def generate():
+        kept = {}
+        held = OrderedDict()
+        content = {}
+        perceptual = PerceptualIndex()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for name, path, regions, sha256, dhash in _hash_in_order(executor, images, 2 * max_workers):
+                stats["input"] += 1
+                if index is not None:
+                    existing = index.find(sha256, dhash, max_distance)
+                    if existing is not None:
+                        stats["already_uploaded"] += 1
+                        stats["bytes_saved"] += os.path.getsize(path)
+                        report_unmerged(name, path, regions, existing)
+                        continue
+
+                match = content.get(sha256)
+                if match is not None:
+                    stats["exact_duplicates"] += 1
+                elif dhash is not None:
+                    match = perceptual.find(dhash, max_distance)
+                    if match is not None:
+                        stats["near_duplicates"] += 1
+                if match is not None:
+                    # Same picture: attach this copy's tag regions to the kept entry instead of uploading it again
+                    stats["bytes_saved"] += os.path.getsize(path)
+                    match_name, seen = kept[match]
+                    new_regions = [region for region in regions or [] if _region_key(region) not in seen]
+                    if match in held:
+                        held[match][2].extend(new_regions)
+                        seen.update(_region_key(region) for region in new_regions)
+                    else:
+                        report_unmerged(name, path, new_regions, match_name)
+                    continue
+
+                kept[path] = (name, {_region_key(region) for region in regions or []})
+                held[path] = (name, path, list(regions or []))
+                content[sha256] = path
+                if dhash is not None:
+                    perceptual.add(dhash, path)
+                if index is not None:
+                    index.stage(name, path, sha256, dhash)
+                if len(held) > window:
+                    yield held.popitem(last=False)[1]
+        while held:
+            yield held.popitem(last=False)[1]
+
+    return generate(), stats
+
+def save_unmerged_regions(stats, path):
+    """
+    Writes the regions of dropped duplicates to a JSONL file, so they can be added to the kept images later.
+
+    Each line holds the dropped image's name and path, the name of the image it
+    matched (kept in this run or already in the project) and its regions.
+
+    Returns:
+        int: Number of images written.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for name, image_path, regions, match in stats["unmerged"]:
+            f.write(json.dumps({
+                "name": name, "path": image_path, "matched": match,
+                "regions": [dict(zip(("tag_id", "left", "top", "width", "height"), _region_key(region)))
+                            for region in regions],
+            }) + "\n")
+    return len(stats["unmerged"])
+
+def print_dedup_stats(stats):
+    print(f"Deduplication: {stats['input']} images in, {stats['exact_duplicates']} exact and "
+          f"{stats['near_duplicates']} near duplicates merged, {stats['already_uploaded']} already in the project, "
+          f"{stats['bytes_saved'] / 1e6:.1f} MB not uploaded")
+    if stats["unmerged"]:
+        print(f"{len(stats['unmerged'])} dropped duplicates had regions that could not be merged:")
+        for name, _, regions, match in stats["unmerged"]:
+            print(f"  {name} ({len(regions)} regions), a copy of {match}")
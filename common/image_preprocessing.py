@@ -0,0 +1,105 @@
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from PIL import Image, ImageOps
+
+ORIENTATION_TAG = 0x0112
+
+# Longest side each service gets any benefit from, and the JPEG quality to recompress at.
+# Face detection and Custom Vision work on downscaled copies anyway; Read keeps more
+# pixels so small print stays legible.
+SERVICE_PROFILES = {
+    "face": {"max_side": 1920, "quality": 85},
+    "read": {"max_side": 4200, "quality": 90},
+    "custom_vision": {"max_side": 1600, "quality": 85},
+}
+
+def preprocess_image(data, max_side, quality=85):
+    """
+    Resizes and recompresses an image, dropping EXIF and other metadata.
+
+    The EXIF orientation is applied to the pixels first, so the result is
+    upright without its metadata. If the image is already small enough and
+    re-encoding would not shrink it, the original bytes are kept unless they
+    carry EXIF.
+
+    Args:
+        data (bytes): Encoded image.
+        max_side (int): Maximum width or height in pixels.
+        quality (int): JPEG quality for the output.
+
+    Returns:
+        tuple: (encoded JPEG bytes, scale applied to the pixel coordinates).
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        has_exif = bool(image.info.get("exif"))
+        width, height = image.size
+        # Orientations 5-8 are rotated by 90 degrees, so the upright width is the stored height
+        if image.getexif().get(ORIENTATION_TAG, 1) in (5, 6, 7, 8):
+            width, height = height, width
+        # For JPEGs, draft() lets the decoder skip straight to a reduced scale
+        image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=quality, optimize=True)
+        scale = image.size[0] / width
+
+    processed = output.getvalue()
+    if scale == 1.0 and not has_exif and len(processed) >= len(data):
+        return data, 1.0
+    return processed, scale
+
+def preprocess_file(path, service):
+    """
+    Reads and preprocesses an image file for one service profile.
+
+    Args:
+        path (str): Image file path.
+        service (str): Key of SERVICE_PROFILES, e.g. 'face'.
+
+    Returns:
+        tuple: (encoded bytes, scale applied to the pixel coordinates).
+    """
+    profile = SERVICE_PROFILES[service]
+    with open(path, "rb") as f:
+        data = f.read()
+    return preprocess_image(data, profile["max_side"], profile["quality"])
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_process_pool(max_workers=None):
+    """
+    Returns the shared process pool for image decoding, starting it on first use.
+
+    Call it once from the main thread before starting worker threads: the
+    workers are started here, so they are never forked from a busy
+    multi-threaded process.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count())
+            _pool.submit(int).result()
+        return _pool
+
+def preprocess_files(paths, service, executor=None):
+    """
+    Preprocesses many image files across a process pool, in input order.
+
+    Args:
+        paths (iterable): Image file paths.
+        service (str): Key of SERVICE_PROFILES.
+        executor (Executor, optional): Pool to use; defaults to the shared process pool.
+
+    Returns:
+        iterator: (encoded bytes, scale) per path.
+    """
+    executor = executor or get_process_pool()
+    return executor.map(preprocess_file, paths, repeat(service))
@@ -0,0 +1,136 @@
+import asyncio
+import random
+import time
+
+class OperationFailed(Exception):
+    """
+    Raised when a long-running operation reaches a failure state.
+
+    The last polled result is kept in .result.
+    """
+
+    def __init__(self, status, result):
+        super().__init__(f"Operation ended with status '{status}'.")
+        self.status = status
+        self.result = result
+
+class OperationTimeout(Exception):
+    """
+    Raised when a long-running operation is still running at its deadline.
+    """
+
+    def __init__(self, status, result, elapsed):
+        super().__init__(f"Operation still '{status}' after {elapsed:.0f}s.")
+        self.status = status
+        self.result = result
+
+class PollSchedule:
+    """
+    Poll delays that grow exponentially with jitter, up to a cap.
+
+    Short operations are still seen finishing quickly, while long ones are
+    polled a few times per cap interval instead of once per second. A delay
+    never passes the deadline.
+    """
+
+    def __init__(self, initial_delay=1.0, max_delay=30.0, backoff=1.5, jitter=0.1, timeout=None):
+        self.delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.jitter = jitter
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout if timeout is not None else None
+        self.attempts = 0
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def next_delay(self, hint=None):
+        """
+        Returns the seconds to wait before the next poll.
+
+        Args:
+            hint (float, optional): Delay the service asked for (e.g. Retry-After); used as a floor.
+        """
+        delay = self.delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+        if hint is not None:
+            delay = max(delay, hint)
+        self.delay = min(self.max_delay, self.delay * self.backoff)
+        if self.deadline is not None:
+            delay = min(delay, max(0.0, self.deadline - time.monotonic()))
+        return delay
+
+def _normalize(status):
+    # SDK status enums subclass str, and str() of one gives 'Class.member' rather than its value
+    return str(getattr(status, "value", status)).lower()
+
+def _check(status, result, success_states, failure_states):
+    normalized = _normalize(status)
+    if normalized in success_states:
+        return True
+    if normalized in failure_states:
+        raise OperationFailed(status, result)
+    return False
+
+def wait_for_operation(poll, get_status, success_states, failure_states=(), initial_delay=1.0, max_delay=30.0,
+                       backoff=1.5, jitter=0.1, timeout=None, on_progress=None, get_retry_after=None):
+    """
+    Polls a long-running operation until it reaches a terminal state.
+
+    Args:
+        poll (callable): Fetches the current state of the operation.
+        get_status (callable): Extracts the status string from a poll result.
+        success_states (iterable): Statuses that mean done (case-insensitive).
+        failure_states (iterable): Statuses that mean failed (case-insensitive).
+        initial_delay (float): Seconds before the second poll.
+        max_delay (float): Longest wait between polls.
+        backoff (float): Factor the delay grows by after each poll.
+        jitter (float): Random +/- fraction applied to each delay, so many waiters do not poll in lockstep.
+        timeout (float, optional): Seconds after which OperationTimeout is raised.
+        on_progress (callable, optional): Called as on_progress(status, result, elapsed) after every poll.
+        get_retry_after (callable, optional): Extracts a service-requested delay from a poll result.
+
+    Returns:
+        The poll result with a success status.
+
+    Raises:
+        OperationFailed: If the operation reaches a failure state.
+        OperationTimeout: If the timeout passes first.
+    """
+    success_states = {_normalize(state) for state in success_states}
+    failure_states = {_normalize(state) for state in failure_states}
+    schedule = PollSchedule(initial_delay, max_delay, backoff, jitter, timeout)
+    while True:
+        result = poll()
+        schedule.attempts += 1
+        status = get_status(result)
+        if on_progress is not None:
+            on_progress(status, result, schedule.elapsed())
+        if _check(status, result, success_states, failure_states):
+            return result
+        if schedule.expired():
+            raise OperationTimeout(status, result, schedule.elapsed())
+        time.sleep(schedule.next_delay(get_retry_after(result) if get_retry_after else None))
+
+async def wait_for_operation_async(poll, get_status, success_states, failure_states=(), initial_delay=1.0, max_delay=30.0,
+                                   backoff=1.5, jitter=0.1, timeout=None, on_progress=None, get_retry_after=None):
+    """
+    Async version of wait_for_operation(); poll is a coroutine function.
+    """
+    success_states = {_normalize(state) for state in success_states}
+    failure_states = {_normalize(state) for state in failure_states}
+    schedule = PollSchedule(initial_delay, max_delay, backoff, jitter, timeout)
+    while True:
+        result = await poll()
+        schedule.attempts += 1
+        status = get_status(result)
+        if on_progress is not None:
+            on_progress(status, result, schedule.elapsed())
+        if _check(status, result, success_states, failure_states):
+            return result
+        if schedule.expired():
+            raise OperationTimeout(status, result, schedule.elapsed())
+        await asyncio.sleep(schedule.next_delay(get_retry_after(result) if get_retry_after else None))
@@ -0,0 +1,173 @@
+import sqlite3
+import threading
+import time
+
+from common.rate_limiter import get_rate_limiter
+
+DEFAULT_DB_PATH = "person_groups.sqlite"
+
+def list_persons(face_client, person_group_id, page_size=1000):
+    """
+    Lists every person of a Person Group, one page per call.
+
+    Returns:
+        list: Person objects with person_id, name and user_data.
+    """
+    rate_limiter = get_rate_limiter(face_client.config.endpoint)
+    persons = []
+    start = None
+    while True:
+        page = rate_limiter.call(face_client.person_group_person.list, person_group_id, start=start, top=page_size)
+        persons.extend(page)
+        if len(page) < page_size:
+            return persons
+        start = page[-1].person_id
+
+class PersonGroupCache:
+    """
+    Local mirror of Person Group metadata (person names and user data).
+
+    identify() can only return persons that were part of the group's last
+    training, so the mirror is keyed on the last successful training time:
+    while it is unchanged the local copy is complete and name lookups need no
+    service call. The training status is checked at most once per
+    check_interval, and the time of the last check is stored with the mirror,
+    so a new process reuses a recent check; when the training time changed,
+    the person list is fetched and only the differences are written.
+    Service calls are made without holding the lock. A person missing locally (e.g. renamed or added
+    since) is fetched on its own and stored.
+    """
+
+    def __init__(self, face_client, db_path=DEFAULT_DB_PATH, check_interval=300.0):
+        self.face_client = face_client
+        self.rate_limiter = get_rate_limiter(face_client.config.endpoint)
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.persons = {}
+        self.checked = {}
+
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS person_groups ("
+            "person_group_id TEXT PRIMARY KEY, trained_at TEXT, synced_at REAL NOT NULL, checked_at REAL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS persons ("
+            "person_group_id TEXT NOT NULL, person_id TEXT NOT NULL, name TEXT, user_data TEXT, "
+            "PRIMARY KEY (person_group_id, person_id))"
+        )
+        self.connection.commit()
+
+    def _trained_at(self, person_group_id):
+        status = self.rate_limiter.call(self.face_client.person_group.get_training_status, person_group_id)
+        trained_at = getattr(status, "last_successful_training", None) or getattr(status, "last_action", None)
+        return str(trained_at) if trained_at is not None else None
+
+    def _load(self, person_group_id):
+        rows = self.connection.execute(
+            "SELECT person_id, name, user_data FROM persons WHERE person_group_id = ?", (person_group_id,)
+        ).fetchall()
+        self.persons[person_group_id] = {person_id: (name, user_data) for person_id, name, user_data in rows}
+
+    def sync(self, person_group_id, force=False):
+        """
+        Brings the local mirror of a group up to date.
+
+        Args:
+            person_group_id (str): ID of the Person Group.
+            force (bool): Re-list the persons even if the group was not retrained.
+
+        Returns:
+            int: Number of persons added, changed or removed locally.
+        """
+        trained_at = self._trained_at(person_group_id)
+        with self.lock:
+            now = time.time()
+            self.checked[person_group_id] = now
+            row = self.connection.execute(
+                "SELECT trained_at FROM person_groups WHERE person_group_id = ?", (person_group_id,)
+            ).fetchone()
+            if person_group_id not in self.persons:
+                self._load(person_group_id)
+            if row is not None and row[0] == trained_at and not force:
+                self.connection.execute("UPDATE person_groups SET checked_at = ? WHERE person_group_id = ?",
+                                        (now, person_group_id))
+                self.connection.commit()
+                return 0
+
+        remote = {person.person_id: (person.name, person.user_data)
+                  for person in list_persons(self.face_client, person_group_id)}
+        with self.lock:
+            local = self.persons[person_group_id]
+            changed = [(person_group_id, person_id, name, user_data)
+                       for person_id, (name, user_data) in remote.items() if local.get(person_id) != (name, user_data)]
+            removed = [(person_group_id, person_id) for person_id in local if person_id not in remote]
+
+            self.connection.executemany("INSERT OR REPLACE INTO persons VALUES (?, ?, ?, ?)", changed)
+            self.connection.executemany("DELETE FROM persons WHERE person_group_id = ? AND person_id = ?", removed)
+            self.connection.execute("INSERT OR REPLACE INTO person_groups VALUES (?, ?, ?, ?)",
+                                    (person_group_id, trained_at, time.time(), self.checked[person_group_id]))
+            self.connection.commit()
+            self.persons[person_group_id] = remote
+            return len(changed) + len(removed)
+
+    def _ensure_fresh(self, person_group_id):
+        with self.lock:
+            if person_group_id not in self.checked:
+                # The last check of any process, so a restart does not re-check a fresh mirror
+                row = self.connection.execute(
+                    "SELECT checked_at FROM person_groups WHERE person_group_id = ?", (person_group_id,)
+                ).fetchone()
+                self.checked[person_group_id] = row[0] if row is not None else None
+            checked = self.checked[person_group_id]
+            if checked is not None and time.time() - checked < self.check_interval:
+                if person_group_id not in self.persons:
+                    self._load(person_group_id)
+                return
+        self.sync(person_group_id)
+
+    def get(self, person_group_id, person_id):
+        """
+        Returns (name, user_data) for a person, fetching it only if it is not mirrored.
+        """
+        self._ensure_fresh(person_group_id)
+        person = self.persons[person_group_id].get(person_id)
+        if person is None:
+            fetched = self.rate_limiter.call(self.face_client.person_group_person.get, person_group_id, person_id)
+            person = (fetched.name, fetched.user_data)
+            with self.lock:
+                self.persons[person_group_id][person_id] = person
+                self.connection.execute("INSERT OR REPLACE INTO persons VALUES (?, ?, ?, ?)",
+                                        (person_group_id, person_id) + person)
+                self.connection.commit()
+        return person
+
+    def get_name(self, person_group_id, person_id):
+        return self.get(person_group_id, person_id)[0]
+
+    def names(self, person_group_id):
+        """
+        Returns the person ID to name map of a group.
+        """
+        self._ensure_fresh(person_group_id)
+        return {person_id: name for person_id, (name, _) in self.persons[person_group_id].items()}
+
+    def invalidate(self, person_group_id):
+        """
+        Forces the next lookup to check the training status again, e.g. after starting a training.
+        """
+        with self.lock:
+            self.checked[person_group_id] = None
+            self.connection.execute("UPDATE person_groups SET checked_at = NULL WHERE person_group_id = ?",
+                                    (person_group_id,))
+            self.connection.commit()
+
+    def train(self, person_group_id):
+        """
+        Starts training a Person Group and invalidates its mirror.
+        """
+        self.rate_limiter.call(self.face_client.person_group.train, person_group_id)
+        self.invalidate(person_group_id)
+
+    def close(self):
+        self.connection.close()
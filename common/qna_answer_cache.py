@@ -0,0 +1,285 @@
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import requests
+
+DEFAULT_DB_PATH = "qna_answer_cache.sqlite"
+DEFAULT_MEMORY_SIZE = 10000
+
+# Request fields that do not change the answer, so they are left out of the key
+UNKEYED_FIELDS = ("question", "context", "qnaId", "userId", "projectName", "deploymentName")
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+# Default of QnAAnswerCache.set(), as None is a valid deployment time (not deployed)
+_UNKNOWN = object()
+
+def normalize_question(question):
+    """
+    Normalizes a question so different phrasings of the same text share a cache entry.
+
+    Question answering ignores case and punctuation when matching, so these are
+    folded away along with Unicode compatibility forms and extra whitespace.
+    """
+    text = unicodedata.normalize("NFKC", question).casefold()
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+def make_answer_key(body):
+    """
+    Builds the cache key of a query-knowledgebases request body.
+
+    Returns:
+        tuple: (key, project, deployment, normalized question, previous QnA ID).
+    """
+    project = body.get("projectName", "")
+    deployment = body.get("deploymentName", "")
+    question = normalize_question(body.get("question", ""))
+    previous_qna_id = (body.get("context") or {}).get("previousQnAId", body.get("qnaId"))
+    options = json.dumps({k: v for k, v in body.items() if k not in UNKEYED_FIELDS}, sort_keys=True)
+    raw_key = "\x1f".join([project, deployment, str(previous_qna_id or ""), question, options])
+    return hashlib.sha256(raw_key.encode("utf-8")).hexdigest(), project, deployment, question, previous_qna_id
+
+def fetch_last_deployed(endpoint, api_key, project, deployment):
+    """
+    Returns the lastDeployedDateTime of a question answering deployment, or None if it is not deployed.
+    """
+    url = f"{endpoint.rstrip('/')}/language/query-knowledgebases/projects/{project}/deployments"
+    response = requests.get(url, headers={"Ocp-Apim-Subscription-Key": api_key}, params={"api-version": "2021-10-01"})
+    response.raise_for_status()
+    for item in response.json().get("value", []):
+        if item.get("deploymentName") == deployment:
+            return item.get("lastDeployedDateTime")
+    return None
+
+class QnAAnswerCache:
+    """
+    Answer cache in front of the query-knowledgebases endpoint.
+
+    Entries are keyed on the normalized question, project, deployment,
+    conversation context (previousQnAId) and the remaining request options,
+    and kept in memory in front of an SQLite table. A knowledge base only
+    changes when it is redeployed, so entries carry the deployment's
+    lastDeployedDateTime: it is re-read at most once per check_interval
+    (when get_deployed_at is given), and when it changed every entry of that
+    deployment is dropped. New entries and each entry's hit count are
+    written to disk in batches of flush_every, and by flush().
+    """
+
+    def __init__(self, get_deployed_at=None, db_path=DEFAULT_DB_PATH, check_interval=60.0,
+                 memory_size=DEFAULT_MEMORY_SIZE, flush_every=100):
+        self.get_deployed_at = get_deployed_at
+        self.check_interval = check_interval
+        self.memory_size = memory_size
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+        self.memory = {}
+        self.pending_hits = {}
+        self.pending_answers = {}
+        self.deployed_at = {}
+        self.checked = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, project TEXT NOT NULL, deployment TEXT NOT NULL, question TEXT NOT NULL, "
+            "previous_qna_id TEXT, value TEXT NOT NULL, deployed_at TEXT, created_at REAL NOT NULL, "
+            "hits INTEGER NOT NULL DEFAULT 0, last_hit_at REAL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS deployments ("
+            "project TEXT NOT NULL, deployment TEXT NOT NULL, deployed_at TEXT, PRIMARY KEY (project, deployment))"
+        )
+        self.connection.commit()
+        for project, deployment, deployed_at in self.connection.execute("SELECT project, deployment, deployed_at FROM deployments"):
+            self.deployed_at[(project, deployment)] = deployed_at
+
+    def _check_due(self, project, deployment):
+        return (self.get_deployed_at is not None and
+                time.monotonic() - self.checked.get((project, deployment), float("-inf")) >= self.check_interval)
+
+    def check_deployment(self, project, deployment, force=False):
+        """
+        Drops a deployment's entries if it was redeployed since they were cached.
+
+        Returns:
+            bool: True if entries were invalidated.
+        """
+        if not force and not self._check_due(project, deployment):
+            return False
+        deployed_at = self.get_deployed_at(project, deployment)
+        with self.lock:
+            self.checked[(project, deployment)] = time.monotonic()
+            if self.deployed_at.get((project, deployment)) == deployed_at:
+                return False
+            known = (project, deployment) in self.deployed_at
+            self.deployed_at[(project, deployment)] = deployed_at
+            self.connection.execute("DELETE FROM answers WHERE project = ? AND deployment = ?", (project, deployment))
+            self.connection.execute("INSERT OR REPLACE INTO deployments (project, deployment, deployed_at) VALUES (?, ?, ?)",
+                                    (project, deployment, deployed_at))
+            self.connection.commit()
+            for key in [key for key, entry in self.memory.items() if entry[1:3] == (project, deployment)]:
+                del self.memory[key]
+                self.pending_hits.pop(key, None)
+            for key in [key for key, row in self.pending_answers.items() if row[1:3] == (project, deployment)]:
+                del self.pending_answers[key]
+            if known:
+                self.invalidations += 1
+            return known
+
+    def get(self, body):
+        """
+        Looks up the cached response to a request body.
+
+        Returns:
+            dict: The cached response, or None on a miss.
+        """
+        key, project, deployment, _, _ = make_answer_key(body)
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None and key in self.pending_answers:
+                # Dropped from memory before its batch was written
+                entry = (json.loads(self.pending_answers[key][5]), project, deployment)
+                self._remember(key, entry)
+            if entry is None:
+                row = self.connection.execute("SELECT value FROM answers WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = (json.loads(row[0]), project, deployment)
+                    self._remember(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.pending_hits[key] = self.pending_hits.get(key, 0) + 1
+            if sum(self.pending_hits.values()) >= self.flush_every:
+                self._flush()
+            return entry[0]
+
+    def set(self, body, result, deployed_at=_UNKNOWN):
+        """
+        Caches the response to a request body.
+
+        The entry is served from memory at once and written to disk with the next batch.
+
+        Args:
+            body (dict): query-knowledgebases request body.
+            result (dict): The response.
+            deployed_at (str, optional): Deployment time known when the request was sent;
+                if the deployment has changed since, the answer is stale and not cached.
+
+        Returns:
+            bool: True if the answer was cached.
+        """
+        key, project, deployment, question, previous_qna_id = make_answer_key(body)
+        with self.lock:
+            if deployed_at is not _UNKNOWN and self.deployed_at.get((project, deployment)) != deployed_at:
+                return False
+            self._remember(key, (result, project, deployment))
+            self.pending_answers[key] = (key, project, deployment, question,
+                                         None if previous_qna_id is None else str(previous_qna_id),
+                                         json.dumps(result), self.deployed_at.get((project, deployment)), time.time())
+            if len(self.pending_answers) >= self.flush_every:
+                self._flush()
+            return True
+
+    def _remember(self, key, entry):
+        if len(self.memory) >= self.memory_size and key not in self.memory:
+            # Drop the oldest entry; dicts keep insertion order
+            del self.memory[next(iter(self.memory))]
+        self.memory[key] = entry
+
+    def _flush(self):
+        # New entries first, so hits on them are counted; both in one transaction
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO answers (key, project, deployment, question, previous_qna_id, value, deployed_at, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", list(self.pending_answers.values())
+        )
+        self.connection.executemany("UPDATE answers SET hits = hits + ?, last_hit_at = ? WHERE key = ?",
+                                    [(count, now, key) for key, count in self.pending_hits.items()])
+        self.connection.commit()
+        self.pending_answers.clear()
+        self.pending_hits.clear()
+
+    def flush(self):
+        """
+        Writes the entries and hit counts gathered since the last flush to disk.
+        """
+        with self.lock:
+            self._flush()
+
+    def query(self, body, send):
+        """
+        Returns the answer to a request body, calling send(body) only on a miss.
+
+        Args:
+            body (dict): query-knowledgebases request body.
+            send (callable): Sends the request and returns the response JSON.
+        """
+        project, deployment = body.get("projectName", ""), body.get("deploymentName", "")
+        self.check_deployment(project, deployment)
+        result = self.get(body)
+        if result is None:
+            # A redeploy seen while the request is in flight makes its answer stale
+            deployed_at = self.deployed_at.get((project, deployment))
+            result = send(body)
+            if "answers" in result:
+                self.set(body, result, deployed_at)
+        return result
+
+    async def query_async(self, body, send_async):
+        """
+        Async version of query(); send_async(body) is awaited on a miss.
+        """
+        project, deployment = body.get("projectName", ""), body.get("deploymentName", "")
+        if self._check_due(project, deployment):
+            await asyncio.to_thread(self.check_deployment, project, deployment)
+        # Lookups may read SQLite and both may write a batch to it, which must not block the event loop
+        result = await asyncio.to_thread(self.get, body)
+        if result is None:
+            deployed_at = self.deployed_at.get((project, deployment))
+            result = await send_async(body)
+            if "answers" in result:
+                await asyncio.to_thread(self.set, body, result, deployed_at)
+        return result
+
+    def top_entries(self, limit=20):
+        """
+        Returns the most frequently hit cached questions.
+
+        Returns:
+            list: (project, deployment, normalized question, previous QnA ID, hits) tuples.
+        """
+        self.flush()
+        with self.lock:
+            return self.connection.execute(
+                "SELECT project, deployment, question, previous_qna_id, hits FROM answers ORDER BY hits DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.memory),
+            "invalidations": self.invalidations,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"Answer cache: {stats['hits']} hits, {stats['misses']} misses, hit rate {stats['hit_rate']:.1%}, "
+              f"{stats['invalidations']} redeploy invalidations")
+
+    def close(self):
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+from aiohttp import web
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.async_http import AsyncHttpClient, gather_limited
+from common.rate_limiter import AdaptiveRateLimiter
+
+class QuotaSimulator:
+    """
+    Local stand-in for a throttled Azure AI endpoint.
+
+    Enforces a per-second quota with a one-second fixed window, answering
+    requests over the quota with 429 and a Retry-After until the window ends.
+    """
+
+    def __init__(self, requests_per_second, service_time=0.02):
+        self.requests_per_second = requests_per_second
+        self.service_time = service_time
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.accepted = 0
+        self.rejected = 0
+
+    async def handle(self, request):
+        now = time.monotonic()
+        if now - self.window_start >= 1.0:
+            self.window_start = now
+            self.window_count = 0
+        if self.window_count >= self.requests_per_second:
+            self.rejected += 1
+            retry_after = 1.0 - (now - self.window_start)
+            return web.json_response(
+                {"error": {"code": "429", "message": "Rate limit is exceeded."}},
+                status=429,
+                headers={"Retry-After": str(max(1, round(retry_after))), "retry-after-ms": str(int(retry_after * 1000))}
+            )
+        self.window_count += 1
+        self.accepted += 1
+        await asyncio.sleep(self.service_time)
+        return web.json_response({"documents": [], "errors": []})
+
+    def start(self, port):
+        app = web.Application()
+        app.router.add_post('/{tail:.*}', self.handle)
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port, backlog=1024).start())
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+async def run_load(url, num_requests, max_in_flight, rate_limiter):
+    async with AsyncHttpClient(max_per_host=max_in_flight, max_retries=20, backoff_base=0.05, rate_limiter=rate_limiter) as client:
+        responses = await gather_limited((client.post(url, json={"id": i}) for i in range(num_requests)), max_in_flight)
+    return sum(1 for response in responses if response.status < 400)
+
+def benchmark(label, quota, num_requests, max_in_flight, rate_limiter):
+    simulator = QuotaSimulator(quota)
+    port = free_port()
+    simulator.start(port)
+    url = f"http://127.0.0.1:{port}/language/:analyze-text"
+
+    started = time.perf_counter()
+    succeeded = asyncio.run(run_load(url, num_requests, max_in_flight, rate_limiter))
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {succeeded}/{num_requests} succeeded in {elapsed:.1f}s, "
+          f"{succeeded / elapsed:.1f} req/s against a quota of {quota} req/s "
+          f"({succeeded / elapsed / quota:.0%}), {simulator.rejected} throttled responses")
+
+def main():
+    """
+    Compares retry-only clients with the adaptive limiter against a simulated quota.
+    """
+    quota = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    num_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    max_in_flight = 100
+
+    benchmark("retry with backoff only", quota, num_requests, max_in_flight, None)
+    benchmark("adaptive rate limiter", quota, num_requests, max_in_flight, AdaptiveRateLimiter(initial_rate=quota / 5))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+import asyncio
+import email.utils
+import threading
+import time
+from urllib.parse import urlparse
+
+# Headers services use to tell clients how long to back off, in seconds or milliseconds
+RETRY_AFTER_MS_HEADERS = ("retry-after-ms", "x-ms-retry-after-ms")
+
+def _header(headers, name):
+    if headers is None:
+        return None
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+def _float_header(headers, name):
+    value = _header(headers, name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header given either in seconds or as an HTTP date.
+
+    Args:
+        value (str): The header value, or None.
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+def retry_after_seconds(headers):
+    """
+    Reads the back-off a service asked for.
+
+    Checks retry-after-ms / x-ms-retry-after-ms first, then Retry-After in seconds or as an HTTP date.
+
+    Args:
+        headers (Mapping): Response headers.
+
+    Returns:
+        float: Seconds to wait, or None if no back-off was requested.
+    """
+    for name in RETRY_AFTER_MS_HEADERS:
+        value = _float_header(headers, name)
+        if value is not None:
+            return value / 1000.0
+    return parse_retry_after(_header(headers, "retry-after"))
+
+def quota_rate(headers):
+    """
+    Estimates the remaining allowed request rate from rate-limit headers.
+
+    Understands the x-ratelimit-remaining-requests / x-ratelimit-reset-requests
+    pair and the RateLimit-Remaining / RateLimit-Reset pair.
+
+    Args:
+        headers (Mapping): Response headers.
+
+    Returns:
+        float: Requests per second the quota still allows, or None if unknown.
+    """
+    for remaining_name, reset_name in (("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+                                       ("ratelimit-remaining", "ratelimit-reset")):
+        remaining = _float_header(headers, remaining_name)
+        reset = _float_header(headers, reset_name)
+        if remaining is not None and reset:
+            return remaining / reset
+    return None
+
+def status_from_exception(exc):
+    """
+    Extracts the HTTP status and headers from an SDK or HTTP exception.
+
+    Works with azure.core HttpResponseError, msrest errors carrying a response,
+    requests.HTTPError and common.async_http.HttpError.
+
+    Returns:
+        tuple: (status, headers), with None for anything not present.
+    """
+    status = getattr(exc, "status_code", None) or getattr(exc, "status", None)
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None) or getattr(response, "status", None)
+    return status, headers
+
+class RateLimitedError(Exception):
+    """
+    Raised by AdaptiveRateLimiter.call() when a call is still throttled after all retries.
+    """
+
+class AdaptiveRateLimiter:
+    """
+    Token-bucket admission control whose rate adapts to the service (AIMD).
+
+    Every call waits for a token before it is sent. Until the first 429 the rate
+    grows by one request/second per success (doubling roughly every second);
+    after that, successful responses raise it additively. A 429 cuts the rate
+    multiplicatively and pauses all callers for as long as Retry-After asks,
+    so throttled callers do not retry at once.
+    Rate-limit headers, when present, cap the rate at what the quota still allows.
+
+    One limiter is shared by every caller of the same resource key, from threads
+    (acquire) or asyncio tasks (acquire_async).
+    """
+
+    def __init__(self, initial_rate=10.0, min_rate=0.5, max_rate=1000.0, burst=None,
+                 additive_increase=2.0, multiplicative_decrease=0.7, default_retry_after=1.0):
+        self.rate = float(initial_rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.burst = burst
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.default_retry_after = default_retry_after
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.slow_start = True
+        self.lock = threading.Lock()
+        self.admitted = 0
+        self.throttled = 0
+
+    def _capacity(self):
+        return self.burst if self.burst is not None else max(1.0, self.rate / 10.0)
+
+    def _reserve(self):
+        """
+        Takes a token if one is available.
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds to wait before trying again.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.tokens = min(self._capacity(), self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                self.admitted += 1
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+    def acquire(self):
+        """
+        Blocks the calling thread until the request may be sent.
+        """
+        while True:
+            wait = self._reserve()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+        Waits, without blocking the event loop, until the request may be sent.
+        """
+        while True:
+            wait = self._reserve()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def record_response(self, status, headers=None):
+        """
+        Adjusts the rate from a response.
+
+        Args:
+            status (int): HTTP status code.
+            headers (Mapping, optional): Response headers.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if status == 429:
+                self.throttled += 1
+                retry_after = retry_after_seconds(headers)
+                pause = retry_after if retry_after is not None else self.default_retry_after
+                self.paused_until = max(self.paused_until, now + pause)
+                # Only cut the rate once per throttling episode, not once per throttled in-flight call
+                if now >= self.updated:
+                    self.rate = max(self.min_rate, self.rate * self.multiplicative_decrease)
+                self.slow_start = False
+                self.tokens = 0.0
+                self.updated = self.paused_until
+            elif status is not None and status < 400:
+                increase = 1.0 if self.slow_start else self.additive_increase / self.rate
+                self.rate = min(self.max_rate, self.rate + increase)
+
+            allowed = quota_rate(headers)
+            if allowed is not None:
+                self.rate = max(self.min_rate, min(self.rate, allowed))
+
+    def record_exception(self, exc):
+        """
+        Adjusts the rate from an exception raised by an SDK or HTTP call.
+
+        Returns:
+            bool: True if the exception was a 429.
+        """
+        status, headers = status_from_exception(exc)
+        if status == 429:
+            self.record_response(status, headers)
+            return True
+        return False
+
+    def call(self, func, *args, max_retries=5, **kwargs):
+        """
+        Runs an SDK call under the limiter, retrying it when it is throttled.
+
+        Args:
+            func (callable): The SDK method to call.
+            *args: Positional arguments for func.
+            max_retries (int): How many throttled attempts to retry.
+            **kwargs: Keyword arguments for func.
+
+        Returns:
+            The result of func.
+
+        Raises:
+            RateLimitedError: If every attempt was throttled.
+        """
+        for attempt in range(max_retries + 1):
+            self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as exc:
+                if not self.record_exception(exc):
+                    raise
+                continue
+            self.record_response(200)
+            return result
+        raise RateLimitedError(f"Still throttled after {max_retries} retries.")
+
+    def send(self, send_request, max_retries=5):
+        """
+        Sends a REST request under the limiter, retrying it while it gets 429.
+
+        Args:
+            send_request (callable): Sends the request and returns a requests.Response,
+                e.g. lambda: session.post(url, headers=headers, json=body).
+            max_retries (int): How many throttled attempts to retry.
+
+        Returns:
+            requests.Response: The first response that was not a 429, or the last 429.
+        """
+        for attempt in range(max_retries + 1):
+            self.acquire()
+            response = send_request()
+            self.record_response(response.status_code, response.headers)
+            if response.status_code != 429:
+                break
+        return response
+
+    def stats(self):
+        return {"rate": self.rate, "admitted": self.admitted, "throttled": self.throttled}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(key, **kwargs):
+    """
+    Returns the process-wide limiter for a resource, creating it on first use.
+
+    Callers that pass the same key (REST or SDK, threads or asyncio) share one
+    limiter and therefore one view of the quota.
+
+    Args:
+        key (str): Identifies the quota, e.g. an endpoint URL; only its host is used.
+        **kwargs: AdaptiveRateLimiter arguments used when the limiter is created.
+
+    Returns:
+        AdaptiveRateLimiter: The shared limiter.
+    """
+    key = urlparse(key).netloc or key
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = AdaptiveRateLimiter(**kwargs)
+        return _limiters[key]
@@ -0,0 +1,146 @@
+import base64
+import json
+import os
+import random
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import quote, urlsplit, urlunsplit
+
+import requests
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+BLOB_API_VERSION = "2021-08-06"
+
+# Statuses worth retrying a chunk for; anything else is a real error
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+def _with_query(url, extra):
+    parts = urlsplit(url)
+    query = f"{parts.query}&{extra}" if parts.query else extra
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, parts.fragment))
+
+def _strip_query(url):
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+def block_id(index):
+    """
+    Returns the Put Block ID of a chunk. All IDs of a blob must have the same length.
+    """
+    return base64.b64encode(f"{index:08d}".encode()).decode()
+
+class ResumableBlobUpload:
+    """
+    Uploads a large file to a block blob in fixed-size chunks, resumably.
+
+    Each chunk is sent with Put Block and recorded in a sidecar state file
+    (<file>.upload.json) as soon as it is stored. If the upload is
+    interrupted, running it again skips the recorded chunks; the state is
+    discarded if the file, chunk size or target blob changed. Uncommitted
+    blocks are kept by the service for 7 days. The final Put Block List makes
+    the blob visible in one step, and the state file is removed.
+
+    Args:
+        file_path (str): File to upload.
+        blob_sas_url (str): Blob URL with a SAS token allowing writes.
+        chunk_size (int): Bytes per Put Block request.
+        content_type (str): Content type stored on the committed blob.
+        on_progress (callable, optional): Called as on_progress(uploaded_bytes, total_bytes).
+        max_retries (int): Attempts per chunk for connection errors and 5xx/429.
+        state_path (str, optional): Sidecar file; defaults to <file>.upload.json.
+        session (requests.Session, optional): Session to send the requests with.
+    """
+
+    def __init__(self, file_path, blob_sas_url, chunk_size=DEFAULT_CHUNK_SIZE, content_type="application/octet-stream",
+                 on_progress=None, max_retries=5, state_path=None, session=None):
+        self.file_path = file_path
+        self.blob_sas_url = blob_sas_url
+        self.chunk_size = chunk_size
+        self.content_type = content_type
+        self.on_progress = on_progress
+        self.max_retries = max_retries
+        self.state_path = state_path or f"{file_path}.upload.json"
+        self.session = session or requests.Session()
+        self.size = os.path.getsize(file_path)
+        self.num_chunks = max(1, -(-self.size // chunk_size))
+
+    def _fingerprint(self):
+        stat = os.stat(self.file_path)
+        return {"blob": _strip_query(self.blob_sas_url), "size": stat.st_size,
+                "mtime": stat.st_mtime, "chunk_size": self.chunk_size}
+
+    def load_state(self):
+        """
+        Returns the indexes of chunks already uploaded by an earlier, interrupted run.
+        """
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return set()
+        if state.get("fingerprint") != self._fingerprint():
+            return set()
+        return set(state.get("uploaded", []))
+
+    def _save_state(self, uploaded):
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": self._fingerprint(), "uploaded": sorted(uploaded)}, f)
+        # Replace in one step so an interruption never leaves a half-written state file
+        os.replace(temp_path, self.state_path)
+
+    def _send(self, method, url, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.request(method, url, timeout=(10, 120), **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response
+            time.sleep(random.uniform(0, min(30.0, 0.5 * 2 ** attempt)))
+
+    def _read_chunk(self, index):
+        with open(self.file_path, "rb") as f:
+            f.seek(index * self.chunk_size)
+            return f.read(self.chunk_size)
+
+    def upload(self):
+        """
+        Uploads the missing chunks and commits the blob.
+
+        Returns:
+            str: The blob URL without its SAS token.
+        """
+        headers = {"x-ms-version": BLOB_API_VERSION}
+        uploaded = self.load_state()
+        done_bytes = sum(min(self.chunk_size, self.size - index * self.chunk_size) for index in uploaded)
+        if self.on_progress is not None:
+            self.on_progress(done_bytes, self.size)
+
+        for index in range(self.num_chunks):
+            if index in uploaded:
+                continue
+            chunk = self._read_chunk(index)
+            self._send("PUT", _with_query(self.blob_sas_url, f"comp=block&blockid={quote(block_id(index))}"),
+                       headers=headers, data=chunk)
+            uploaded.add(index)
+            self._save_state(uploaded)
+            done_bytes += len(chunk)
+            if self.on_progress is not None:
+                self.on_progress(done_bytes, self.size)
+
+        block_list = ET.Element("BlockList")
+        for index in range(self.num_chunks):
+            ET.SubElement(block_list, "Latest").text = block_id(index)
+        self._send("PUT", _with_query(self.blob_sas_url, "comp=blocklist"),
+                   headers=dict(headers, **{"x-ms-blob-content-type": self.content_type, "Content-Type": "application/xml"}),
+                   data=ET.tostring(block_list, encoding="utf-8", xml_declaration=True))
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        return _strip_query(self.blob_sas_url)
+
+def print_progress(uploaded_bytes, total_bytes):
+    print(f"Uploaded {uploaded_bytes / 1e6:.1f} of {total_bytes / 1e6:.1f} MB ({uploaded_bytes / max(1, total_bytes):.0%})")
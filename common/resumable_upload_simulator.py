@@ -0,0 +1,105 @@
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.resumable_upload import ResumableBlobUpload
+
+class FlakyBlobServer(ThreadingHTTPServer):
+    """
+    Local stand-in for Blob Storage's Put Block / Put Block List.
+
+    Every fail_every-th Put Block request reads half of the body and then
+    drops the connection, like a network failure mid-transfer.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, fail_every):
+        super().__init__(('127.0.0.1', 0), FlakyBlobHandler)
+        self.fail_every = fail_every
+        self.lock = threading.Lock()
+        self.block_requests = 0
+        self.dropped = 0
+        self.blocks = {}
+        self.blobs = {}
+
+class FlakyBlobHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_PUT(self):
+        server = self.server
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length", 0))
+
+        if query.get("comp") == ["block"]:
+            with server.lock:
+                server.block_requests += 1
+                fail = server.fail_every and server.block_requests % server.fail_every == 0
+            if fail:
+                self.rfile.read(length // 2)
+                with server.lock:
+                    server.dropped += 1
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            server.blocks[(url.path, query["blockid"][0])] = self.rfile.read(length)
+            return self._reply(201)
+
+        if query.get("comp") == ["blocklist"]:
+            block_ids = [element.text for element in ET.fromstring(self.rfile.read(length))]
+            server.blobs[url.path] = b"".join(server.blocks[(url.path, block_id)] for block_id in block_ids)
+            return self._reply(201)
+        self._reply(400)
+
+def main():
+    """
+    Uploads a file through a connection that keeps dropping, then checks the blob matches.
+
+    The first run is stopped part-way (no retries) to show that the second run
+    resumes from the sidecar state instead of starting over.
+    """
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    chunk_size = 4 * 1024 * 1024
+    server = FlakyBlobServer(fail_every=5)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    blob_url = f"http://127.0.0.1:{server.server_address[1]}/videos/recording.mp4?sv=2021-08-06&sig=test"
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "recording.mp4")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size_mb * 1024 * 1024))
+
+        try:
+            ResumableBlobUpload(path, blob_url, chunk_size=chunk_size, max_retries=0).upload()
+        except requests.ConnectionError:
+            resumed_from = len(ResumableBlobUpload(path, blob_url, chunk_size=chunk_size).load_state())
+            print(f"First run interrupted after {resumed_from} of {-(-size_mb * 1024 * 1024 // chunk_size)} chunks")
+
+        requests_before = server.block_requests
+        ResumableBlobUpload(path, blob_url, chunk_size=chunk_size, max_retries=5).upload()
+        with open(path, "rb") as f:
+            expected = hashlib.sha256(f.read()).hexdigest()
+        actual = hashlib.sha256(server.blobs["/videos/recording.mp4"]).hexdigest()
+        print(f"Second run sent {server.block_requests - requests_before} Put Block requests "
+              f"({server.dropped} connections dropped in total); blob matches file: {actual == expected}; "
+              f"state file removed: {not os.path.exists(path + '.upload.json')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+DEFAULT_DB_PATH = "text_analytics_cache.sqlite"
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MEMORY_SIZE = 10000
+
+def normalize_text(text):
+    """
+    Normalizes text so trivially different copies share a cache entry.
+
+    Applies Unicode NFC normalization, collapses runs of whitespace and trims
+    the ends. Case is preserved because it can change the service's answer.
+
+    Args:
+        text (str): The text to normalize.
+
+    Returns:
+        str: The normalized text.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def make_cache_key(operation, model_version, language, text):
+    """
+    Builds the cache key for one document.
+
+    Args:
+        operation (str): Text Analytics operation (e.g., 'sentiment', 'keyPhrases').
+        model_version (str): API and model version the result came from (e.g., 'v3.1/latest').
+        language (str): Language hint sent with the document, or None.
+        text (str): The document text.
+
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    text_hash = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    raw_key = "\x1f".join([operation, model_version, language or "", text_hash])
+    return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+class TextAnalyticsCache:
+    """
+    Two-tier result cache for Text Analytics calls.
+
+    Results are kept in an in-memory LRU tier in front of an SQLite tier on
+    disk. Disk entries expire after ttl_seconds. Values must be JSON serializable.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, memory_size=DEFAULT_MEMORY_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+        self.purge_expired()
+
+    def get(self, operation, model_version, language, text):
+        """
+        Looks up a cached result.
+
+        Args:
+            operation (str): Text Analytics operation.
+            model_version (str): API and model version.
+            language (str): Language hint, or None.
+            text (str): The document text.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        key = make_cache_key(operation, model_version, language, text)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and entry[1] > now:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return entry[0]
+
+            row = self.connection.execute("SELECT value, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] > now:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+
+            self.misses += 1
+            return None
+
+    def set(self, operation, model_version, language, text, value):
+        """
+        Stores a result in both tiers.
+
+        Args:
+            operation (str): Text Analytics operation.
+            model_version (str): API and model version.
+            language (str): Language hint, or None.
+            text (str): The document text.
+            value: JSON-serializable result to cache.
+        """
+        self.set_many(operation, model_version, [(language, text, value)])
+
+    def set_many(self, operation, model_version, entries):
+        """
+        Stores many results with a single disk transaction.
+
+        Args:
+            operation (str): Text Analytics operation.
+            model_version (str): API and model version.
+            entries (iterable): (language, text, value) tuples.
+        """
+        expires_at = time.time() + self.ttl_seconds
+        rows = [(make_cache_key(operation, model_version, language, text), json.dumps(value), value)
+                for language, text, value in entries]
+        if not rows:
+            return
+        with self.lock:
+            for key, _, value in rows:
+                self._remember(key, value, expires_at)
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, serialized, expires_at) for key, serialized, _ in rows]
+            )
+            self.connection.commit()
+
+    def _remember(self, key, value, expires_at):
+        self.memory[key] = (value, expires_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def split_documents(self, operation, model_version, documents):
+        """
+        Separates REST-style documents into cached results and documents still to send.
+
+        Args:
+            operation (str): Text Analytics operation.
+            model_version (str): API and model version.
+            documents (list): Documents with 'id', 'text' and optional 'language' keys.
+
+        Returns:
+            tuple: A dict of document ID to cached result (with the ID rewritten
+                to match the request), and the list of documents that missed.
+        """
+        cached = {}
+        missing = []
+        for document in documents:
+            value = self.get(operation, model_version, document.get("language"), document["text"])
+            if value is None:
+                missing.append(document)
+            else:
+                cached[document["id"]] = dict(value, id=document["id"])
+        return cached, missing
+
+    def store_documents(self, operation, model_version, documents, results):
+        """
+        Caches the per-document results of a REST response.
+
+        Args:
+            operation (str): Text Analytics operation.
+            model_version (str): API and model version.
+            documents (list): The documents that were sent.
+            results (list): The 'documents' list of the response.
+        """
+        by_id = {document["id"]: document for document in documents}
+        self.set_many(operation, model_version, [
+            (by_id[result["id"]].get("language"), by_id[result["id"]]["text"], result)
+            for result in results if result["id"] in by_id
+        ])
+
+    def purge_expired(self):
+        """
+        Deletes expired entries from the disk tier.
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+            self.connection.commit()
+
+    def stats(self):
+        """
+        Returns hit/miss counters.
+
+        Returns:
+            dict: Total hits and misses, hits per tier, and the hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"Cache: {stats['hits']} hits ({stats['memory_hits']} memory, {stats['disk_hits']} disk), "
+              f"{stats['misses']} misses, hit rate {stats['hit_rate']:.1%}")
+
+    def close(self):
+        self.connection.close()
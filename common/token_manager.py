@@ -0,0 +1,178 @@
+import asyncio
+import base64
+import json
+import threading
+import time
+
+DEFAULT_LIFETIME = 3600.0
+DEFAULT_REFRESH_MARGIN = 300.0
+
+def token_expiry(token, default_lifetime=DEFAULT_LIFETIME):
+    """
+    Returns when a token expires, as a time.time() timestamp.
+
+    Reads the exp claim if the token is a JWT; otherwise assumes default_lifetime from now.
+    """
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return time.time() + default_lifetime
+
+class TokenManager:
+    """
+    Caches access tokens per key and refreshes them shortly before they expire.
+
+    fetch_token(*key) is called to get a token for a key, e.g.
+    (location, account_id, permission). The first request for a key fetches
+    it; after that a background thread refreshes every token refresh_margin
+    seconds before expiry, so callers normally get a cached token without
+    waiting. A failed refresh is retried with backoff while the old token is
+    still valid.
+
+    get() is safe to call from any thread; get_async() never blocks the event loop.
+    """
+
+    def __init__(self, fetch_token, refresh_margin=DEFAULT_REFRESH_MARGIN, default_lifetime=DEFAULT_LIFETIME):
+        self.fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self.default_lifetime = default_lifetime
+        self.tokens = {}
+        self.retry_at = {}
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        self.wakeup = threading.Condition(self.lock)
+        self.stopped = False
+        self.refresher = None
+        self.refreshes = 0
+
+    def _key_lock(self, key):
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def _fetch(self, key):
+        token = self.fetch_token(*key)
+        expires_at = token_expiry(token, self.default_lifetime)
+        with self.lock:
+            self.tokens[key] = (token, expires_at)
+            self.retry_at.pop(key, None)
+            self.refreshes += 1
+            self.wakeup.notify()
+        return token
+
+    def _valid(self, key):
+        with self.lock:
+            cached = self.tokens.get(key)
+        # A token this close to expiry may lapse while a request is in flight
+        if cached is not None and cached[1] - time.time() > min(60.0, self.refresh_margin / 2):
+            return cached[0]
+        return None
+
+    def get(self, *key):
+        """
+        Returns a valid token for key, fetching it only if none is cached.
+        """
+        token = self._valid(key)
+        if token is not None:
+            return token
+        # One fetch per key at a time; other callers wait for it instead of fetching too
+        with self._key_lock(key):
+            token = self._valid(key)
+            if token is None:
+                token = self._fetch(key)
+        self._start_refresher()
+        return token
+
+    async def get_async(self, *key):
+        """
+        Async version of get(); a fetch, when needed, runs in a worker thread.
+        """
+        token = self._valid(key)
+        if token is not None:
+            return token
+        return await asyncio.to_thread(self.get, *key)
+
+    def invalidate(self, *key):
+        """
+        Drops a cached token, e.g. after the service rejected it with 401.
+        """
+        with self.lock:
+            self.tokens.pop(key, None)
+
+    def provider(self, *key):
+        """
+        Returns a TokenProvider bound to key, to pass where a token string would go.
+        """
+        return TokenProvider(self, key)
+
+    def _start_refresher(self):
+        with self.lock:
+            if self.refresher is None and not self.stopped:
+                self.refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+                self.refresher.start()
+
+    def _next_due(self):
+        due = [(max(expires_at - self.refresh_margin, self.retry_at.get(key, 0.0)), key)
+               for key, (_, expires_at) in self.tokens.items()]
+        return min(due, default=(None, None))
+
+    def _refresh_loop(self):
+        while True:
+            with self.lock:
+                while True:
+                    if self.stopped:
+                        return
+                    due_at, key = self._next_due()
+                    wait = None if due_at is None else due_at - time.time()
+                    if wait is not None and wait <= 0:
+                        break
+                    self.wakeup.wait(wait)
+            try:
+                with self._key_lock(key):
+                    self._fetch(key)
+            except Exception:
+                with self.lock:
+                    # Back off, but keep trying while the current token is still usable
+                    expires_at = self.tokens.get(key, (None, time.time()))[1]
+                    self.retry_at[key] = time.time() + max(1.0, min(30.0, (expires_at - time.time()) / 4))
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            self.wakeup.notify()
+
+class TokenProvider:
+    """
+    Hands out the current token for one key of a TokenManager.
+
+    Long-running callers should hold one of these instead of a token string
+    and resolve it right before each request, so they always send a fresh token.
+    """
+
+    def __init__(self, manager, key):
+        self.manager = manager
+        self.key = key
+
+    def __call__(self):
+        return self.manager.get(*self.key)
+
+    async def get_async(self):
+        return await self.manager.get_async(*self.key)
+
+    def invalidate(self):
+        self.manager.invalidate(*self.key)
+
+def resolve_token(token):
+    """
+    Returns the token string for a token given either as a string or as a TokenProvider.
+    """
+    return token() if callable(token) else token
+
+async def resolve_token_async(token):
+    """
+    Async version of resolve_token() that never blocks the event loop on a fetch.
+    """
+    if isinstance(token, TokenProvider):
+        return await token.get_async()
+    return resolve_token(token)
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+from common.text_analytics_cache import normalize_text
+
+DEFAULT_DB_PATH = "translation_memory.sqlite"
+DEFAULT_MAX_ENTRIES = 500000
+# Source hashes per SELECT, well under SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+def source_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+class TranslationMemory:
+    """
+    Persistent exact-match translation memory for the Translator samples.
+
+    Entries are keyed by normalized source text, source language, target
+    language, custom-model category and text type (plain or html, which the
+    service translates differently), and stored in SQLite. When the store
+    grows past max_entries, the least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_characters = 0
+
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "source_hash TEXT NOT NULL, from_lang TEXT NOT NULL, to_lang TEXT NOT NULL, category TEXT NOT NULL, "
+            "text_type TEXT NOT NULL, source_text TEXT NOT NULL, target_text TEXT NOT NULL, last_used REAL NOT NULL, "
+            "hits INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (source_hash, from_lang, to_lang, category, text_type))"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self.connection.commit()
+        # Kept up to date on every write, so eviction never has to count the table
+        self.size = self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    @staticmethod
+    def _key(text, from_lang, to_lang, category_id, text_type="plain"):
+        return (source_hash(text), from_lang or "auto", to_lang, (category_id or "general").lstrip("/"), text_type or "plain")
+
+    def lookup(self, text, from_lang, to_langs, category_id=None, text_type="plain"):
+        """
+        Looks up a source text for several target languages.
+
+        Args:
+            text (str): Source text.
+            from_lang (str): Source language code, or None for auto-detect.
+            to_langs (list): Target language codes.
+            category_id (str, optional): Custom model's category ID.
+            text_type (str): 'plain' or 'html'.
+
+        Returns:
+            dict: Target language to translation, for the targets found.
+        """
+        return self.lookup_many([text], from_lang, to_langs, category_id, text_type)[0]
+
+    def lookup_many(self, texts, from_lang, to_langs, category_id=None, text_type="plain"):
+        """
+        Looks up many source texts at once, reading in chunks and marking the hits used in one transaction.
+
+        Returns:
+            list: One dict of target language to translation per text, for the targets found.
+        """
+        texts = list(texts)
+        hashes = [source_hash(text) for text in texts]
+        from_key, category, text_type = from_lang or "auto", (category_id or "general").lstrip("/"), text_type or "plain"
+        to_langs = list(to_langs)
+        rows = {}
+        if not texts or not to_langs:
+            return [{} for _ in texts]
+        with self.lock:
+            unique_hashes = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique_hashes), LOOKUP_CHUNK_SIZE):
+                chunk = unique_hashes[start:start + LOOKUP_CHUNK_SIZE]
+                rows.update(((hash_, to_lang), target_text) for hash_, to_lang, target_text in self.connection.execute(
+                    f"SELECT source_hash, to_lang, target_text FROM translations "
+                    f"WHERE from_lang = ? AND category = ? AND text_type = ? "
+                    f"AND to_lang IN ({', '.join('?' * len(to_langs))}) AND source_hash IN ({', '.join('?' * len(chunk))})",
+                    [from_key, category, text_type, *to_langs, *chunk]
+                ))
+
+            results = []
+            for text, hash_ in zip(texts, hashes):
+                found = {to_lang: rows[(hash_, to_lang)] for to_lang in to_langs if (hash_, to_lang) in rows}
+                self.hits += len(found)
+                self.misses += len(to_langs) - len(found)
+                self.saved_characters += len(text) * len(found)
+                results.append(found)
+            if rows:
+                now = time.time()
+                self.connection.executemany(
+                    "UPDATE translations SET last_used = ?, hits = hits + 1 "
+                    "WHERE source_hash = ? AND from_lang = ? AND to_lang = ? AND category = ? AND text_type = ?",
+                    [(now, hash_, from_key, to_lang, category, text_type) for hash_, to_lang in rows]
+                )
+                self.connection.commit()
+        return results
+
+    def store(self, text, from_lang, translations, category_id=None, text_type="plain"):
+        """
+        Stores the translations of one source text.
+
+        Args:
+            text (str): Source text.
+            from_lang (str): Source language code, or None for auto-detect.
+            translations (dict): Target language to translated text.
+            category_id (str, optional): Custom model's category ID.
+            text_type (str): 'plain' or 'html'.
+        """
+        self.store_many([(text, from_lang, translations, category_id, text_type)])
+
+    def store_many(self, entries):
+        """
+        Stores many (text, from_lang, translations, category_id[, text_type]) entries in one transaction.
+        """
+        now = time.time()
+        rows = []
+        for text, from_lang, translations, category_id, *text_type in entries:
+            for to_lang, target_text in translations.items():
+                rows.append(self._key(text, from_lang, to_lang, category_id, *text_type) + (text, target_text, now))
+        with self.lock:
+            # Insert only the new keys first, so the row count tells how much the table grew
+            inserted = self.connection.executemany(
+                "INSERT OR IGNORE INTO translations "
+                "(source_hash, from_lang, to_lang, category, text_type, source_text, target_text, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            ).rowcount
+            self.connection.executemany(
+                "UPDATE translations SET source_text = ?, target_text = ?, last_used = ? "
+                "WHERE source_hash = ? AND from_lang = ? AND to_lang = ? AND category = ? AND text_type = ?",
+                [row[5:] + row[:5] for row in rows]
+            )
+            self.size += inserted
+            self._evict()
+            self.connection.commit()
+
+    def _evict(self):
+        if self.size > self.max_entries:
+            self.size -= self.connection.execute(
+                "DELETE FROM translations WHERE rowid IN (SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+                (self.size - self.max_entries,)
+            ).rowcount
+
+    def export_jsonl(self, path):
+        """
+        Writes every entry as one JSON object per line.
+
+        Returns:
+            int: Number of entries written.
+        """
+        count = 0
+        with self.lock, open(path, "w", encoding="utf-8") as f:
+            for source_text, from_lang, to_lang, category, text_type, target_text in self.connection.execute(
+                    "SELECT source_text, from_lang, to_lang, category, text_type, target_text FROM translations"):
+                f.write(json.dumps({"source": source_text, "from": from_lang, "to": to_lang, "category": category,
+                                    "text_type": text_type, "target": target_text}, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+    def import_jsonl(self, path):
+        """
+        Loads entries written by export_jsonl().
+
+        Returns:
+            int: Number of entries imported.
+        """
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    entries.append((record["source"], record["from"], {record["to"]: record["target"]},
+                                    record.get("category"), record.get("text_type", "plain")))
+        self.store_many(entries)
+        return len(entries)
+
+    def export_tmx(self, path, category_id=None):
+        """
+        Writes the plain-text entries of one category as a TMX 1.4 file, one translation unit per entry.
+
+        Returns:
+            int: Number of translation units written.
+        """
+        category = (category_id or "general").lstrip("/")
+        tmx = ET.Element("tmx", version="1.4")
+        ET.SubElement(tmx, "header", {"creationtool": "translation_memory", "creationtoolversion": "1.0",
+                                      "datatype": "plaintext", "segtype": "sentence", "adminlang": "en",
+                                      "srclang": "*all*", "o-tmf": "sqlite"})
+        body = ET.SubElement(tmx, "body")
+        count = 0
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT source_text, from_lang, to_lang, target_text FROM translations "
+                "WHERE category = ? AND text_type = 'plain'", (category,)
+            ).fetchall()
+        for source_text, from_lang, to_lang, target_text in rows:
+            tu = ET.SubElement(body, "tu")
+            for lang, text in ((from_lang, source_text), (to_lang, target_text)):
+                tuv = ET.SubElement(tu, "tuv", {"xml:lang": lang})
+                ET.SubElement(tuv, "seg").text = text
+            count += 1
+        ET.ElementTree(tmx).write(path, encoding="utf-8", xml_declaration=True)
+        return count
+
+    def import_tmx(self, path, category_id=None):
+        """
+        Loads translation units from a TMX file. The first variant of each unit is the source.
+
+        Returns:
+            int: Number of entries imported.
+        """
+        lang_attribute = "{http://www.w3.org/XML/1998/namespace}lang"
+        entries = []
+        for tu in ET.parse(path).getroot().iter("tu"):
+            variants = [(tuv.get(lang_attribute) or tuv.get("lang"), tuv.findtext("seg") or "") for tuv in tu.iter("tuv")]
+            if len(variants) < 2:
+                continue
+            from_lang, source_text = variants[0]
+            translations = {to_lang: text for to_lang, text in variants[1:]}
+            entries.append((source_text, from_lang, translations, category_id))
+        self.store_many(entries)
+        return sum(len(entry[2]) for entry in entries)
+
+    def stats(self):
+        """
+        Returns lookup counters.
+
+        Returns:
+            dict: Hits, misses, hit rate and characters not sent for billing.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_characters": self.saved_characters,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"Translation memory: {stats['hits']} hits, {stats['misses']} misses, "
+              f"hit rate {stats['hit_rate']:.1%}, {stats['saved_characters']} characters saved")
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,177 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.rate_limiter import get_rate_limiter
+
+DEFAULT_ENDPOINT = "https://api.cognitive.microsofttranslator.com"
+
+# Translator v3.0 request limits: array elements per request, and characters per
+# request counted across every target language
+MAX_ELEMENTS_PER_REQUEST = 1000
+MAX_CHARACTERS_PER_REQUEST = 50000
+
+def build_translate_url(endpoint, from_lang, to_langs, category_id=None):
+    """
+    Builds the /translate URL once for a whole bulk run.
+
+    Args:
+        endpoint (str): Translator endpoint URL.
+        from_lang (str): Source language code, or None to auto-detect.
+        to_langs (list): Target language codes.
+        category_id (str, optional): Custom model's category ID.
+
+    Returns:
+        str: The request URL.
+    """
+    params = f"&from={from_lang}" if from_lang else ""
+    params += ''.join([f"&to={lang}" for lang in to_langs])
+    if category_id:
+        # Ensure the category parameter starts with a '/'
+        if not category_id.startswith('/'):
+            category_id = f'/{category_id}'
+        params += f"&category={category_id}"
+    return endpoint.rstrip('/') + '/translate?api-version=3.0' + params
+
+def pack_requests(texts, num_targets, max_elements=MAX_ELEMENTS_PER_REQUEST, max_characters=MAX_CHARACTERS_PER_REQUEST):
+    """
+    Packs texts into as few requests as the service limits allow, keeping input order.
+
+    Args:
+        texts (list): Texts to translate.
+        num_targets (int): Number of target languages; each character counts once per target.
+        max_elements (int): Maximum texts per request.
+        max_characters (int): Maximum billed characters per request.
+
+    Returns:
+        list: Batches, each a list of (input index, text) pairs.
+
+    Raises:
+        ValueError: If a single text is over the character limit on its own.
+    """
+    batches = []
+    batch = []
+    batch_characters = 0
+    for index, text in enumerate(texts):
+        characters = len(text) * num_targets
+        if characters > max_characters:
+            raise ValueError(f"Text {index} has {len(text)} characters, over the per-request limit "
+                             f"for {num_targets} target language(s). Split it first with split_document().")
+        if batch and (len(batch) >= max_elements or batch_characters + characters > max_characters):
+            batches.append(batch)
+            batch = []
+            batch_characters = 0
+        batch.append((index, text))
+        batch_characters += characters
+    if batch:
+        batches.append(batch)
+    return batches
+
+def read_lines(path):
+    """
+    Reads a string catalog with one string per line, skipping blank lines.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+def read_files(paths):
+    """
+    Reads whole text files, one text per file.
+    """
+    texts = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+    return texts
+
+def translate_bulk(subscription_key, region, texts, from_lang, to_langs, endpoint=DEFAULT_ENDPOINT,
+                   category_id=None, max_workers=8, text_type="plain", memory=None,
+                   max_request_characters=MAX_CHARACTERS_PER_REQUEST):
+    """
+    Translates many texts with packed, concurrent requests over one pooled session.
+
+    Args:
+        subscription_key (str): Azure Translator subscription key.
+        region (str): Azure service region.
+        texts (iterable): The texts to translate.
+        from_lang (str): Source language code, or None to auto-detect.
+        to_langs (list): Target language codes.
+        endpoint (str): Translator endpoint URL.
+        category_id (str, optional): Custom model's category ID.
+        max_workers (int): Maximum number of requests in flight at once.
+        text_type (str): 'plain' or 'html'.
+        memory (TranslationMemory, optional): Translation memory checked before any
+            request; only (text, target) pairs it does not hold are sent.
+        max_request_characters (int): Maximum billed characters per request.
+
+    Returns:
+        list: One dict of target language to translated text per input, in input order.
+    """
+    texts = list(texts)
+    results = [dict() for _ in texts]
+
+    # Group texts by the targets still missing from the memory; each group gets its own URL.
+    # Repeats of a text are sent once and copied afterwards.
+    groups = {}
+    first_index = {}
+    repeats = {}
+    for index, text in enumerate(texts):
+        if text in first_index:
+            repeats[index] = first_index[text]
+        else:
+            first_index[text] = index
+    if memory is not None:
+        remembered = memory.lookup_many(first_index, from_lang, to_langs, category_id, text_type)
+        for index, found in zip(first_index.values(), remembered):
+            results[index] = found
+    for index in first_index.values():
+        missing = tuple(lang for lang in to_langs if lang not in results[index])
+        if missing:
+            groups.setdefault(missing, []).append(index)
+
+    base_headers = {
+        'Ocp-Apim-Subscription-Key': subscription_key,
+        'Ocp-Apim-Subscription-Region': region,
+        'Content-type': 'application/json'
+    }
+    rate_limiter = get_rate_limiter(endpoint)
+
+    session = requests.Session()
+    session.mount(endpoint, HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+
+    def send(job):
+        url, batch = job
+        # A trace ID per request keeps each call traceable in service logs
+        headers = dict(base_headers, **{'X-ClientTraceId': str(uuid.uuid4())})
+        body = [{'text': texts[index]} for index in batch]
+        response = rate_limiter.send(lambda: session.post(url, headers=headers, json=body))
+        response.raise_for_status()
+        return batch, response.json()
+
+    jobs = []
+    for targets, indexes in groups.items():
+        url = build_translate_url(endpoint, from_lang, targets, category_id)
+        if text_type != "plain":
+            url += f"&textType={text_type}"
+        for batch in pack_requests([texts[index] for index in indexes], len(targets),
+                                   max_characters=max_request_characters):
+            jobs.append((url, [indexes[position] for position, _ in batch]))
+
+    learned = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch, translated in executor.map(send, jobs):
+                for index, item in zip(batch, translated):
+                    new_translations = {translation['to']: translation['text'] for translation in item['translations']}
+                    results[index].update(new_translations)
+                    learned.append((texts[index], from_lang, new_translations, category_id, text_type))
+    finally:
+        session.close()
+
+    for index, source_index in repeats.items():
+        results[index] = dict(results[source_index])
+    if memory is not None and learned:
+        memory.store_many(learned)
+    return results
@@ -0,0 +1,197 @@
+import re
+
+from common.translator_bulk import MAX_CHARACTERS_PER_REQUEST, translate_bulk
+
+# Segments are kept well under the request limit so a long document becomes many parallel requests
+DEFAULT_SEGMENT_CHARACTERS = 2000
+DEFAULT_REQUEST_CHARACTERS = 10000
+
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+SENTENCE_END = re.compile(r"(?<=[.!?。！？])[\"')\]”’]*\s+")
+TAG = re.compile(r"<(/?)([A-Za-z][\w:-]*)[^>]*?(/?)>")
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "wbr", "area", "base", "col", "embed", "source", "track"}
+
+def contains_markup(text):
+    return TAG.search(text) is not None
+
+def _tag_spans(text):
+    """
+    Returns the character ranges that lie inside a tag or inside an open inline element.
+
+    Splitting anywhere in these ranges would break a tag or leave an element unbalanced.
+    """
+    protected = []
+    depth = 0
+    open_start = None
+    for match in TAG.finditer(text):
+        protected.append((match.start(), match.end()))
+        closing, name, self_closing = match.group(1), match.group(2).lower(), match.group(3)
+        if self_closing or name in VOID_TAGS:
+            continue
+        if closing:
+            depth = max(0, depth - 1)
+            if depth == 0 and open_start is not None:
+                protected.append((open_start, match.end()))
+                open_start = None
+        else:
+            if depth == 0:
+                open_start = match.start()
+            depth += 1
+    if open_start is not None:
+        protected.append((open_start, len(text)))
+    return protected
+
+def _is_protected(position, spans):
+    return any(start < position < end for start, end in spans)
+
+def _cut_position(text, max_chars):
+    """
+    Picks where to cut a piece that is longer than max_chars and has no usable sentence break.
+
+    Prefers the last whitespace outside any element, then the last whitespace
+    outside a tag (e.g. inside a paragraph-wide <p>), then the last tag
+    boundary. Only a single run of text longer than max_chars is cut
+    mid-word, and even then never inside a tag.
+    """
+    spans = _tag_spans(text)
+    tags = [(match.start(), match.end()) for match in TAG.finditer(text)]
+    whitespace = [match.start() for match in re.finditer(r"\s+", text[:max_chars + 1]) if match.start() > 0]
+
+    cut = max((position for position in whitespace if not _is_protected(position, spans)), default=0)
+    if not cut:
+        cut = max((position for position in whitespace if not _is_protected(position, tags)), default=0)
+    if not cut:
+        cut = max([start for start, _ in tags if 0 < start <= max_chars] +
+                  [end for _, end in tags if end <= max_chars], default=0)
+    if not cut:
+        cut = max_chars
+        for start, end in tags:
+            if start < cut < end:
+                # A tag longer than the limit is kept whole
+                cut = start or end
+    return cut
+
+def _split_long(text, max_chars):
+    """
+    Splits a paragraph into sentences, then packs sentences into pieces of at most max_chars.
+
+    Returns:
+        list: (piece, separator) pairs; joining them restores text exactly.
+    """
+    spans = _tag_spans(text)
+    boundaries = [match for match in SENTENCE_END.finditer(text) if not _is_protected(match.start(), spans)]
+
+    sentences = []
+    start = 0
+    for match in boundaries:
+        sentences.append((text[start:match.start()], match.group(0)))
+        start = match.end()
+    sentences.append((text[start:], ""))
+
+    pieces = []
+    current = ""
+    current_separator = ""
+    for sentence, separator in sentences:
+        if current and len(current) + len(current_separator) + len(sentence) > max_chars:
+            pieces.append((current, current_separator))
+            current, current_separator = sentence, separator
+        else:
+            current = current + current_separator + sentence if current else sentence
+            current_separator = separator
+        # A single sentence longer than the limit is cut at the best boundary before it
+        while len(current) > max_chars:
+            cut = _cut_position(current, max_chars)
+            whitespace = re.match(r"\s*", current[cut:]).group(0)
+            pieces.append((current[:cut], whitespace))
+            current = current[cut + len(whitespace):]
+    stripped = current.rstrip()
+    pieces.append((stripped, current[len(stripped):] + current_separator))
+    return pieces
+
+def split_document(text, max_chars=DEFAULT_SEGMENT_CHARACTERS):
+    """
+    Splits a document on paragraph, then sentence boundaries.
+
+    Inline markup is never split: boundaries inside a tag or inside an open
+    element are skipped. Whitespace between segments is kept as separators so
+    the original layout can be rebuilt.
+
+    Args:
+        text (str): The document.
+        max_chars (int): Maximum characters per segment.
+
+    Returns:
+        list: (segment, separator) pairs; joining every segment and separator restores text.
+    """
+    leading = re.match(r"\s*", text).group(0)
+    body = text[len(leading):]
+    segments = [("", leading)] if leading else []
+
+    start = 0
+    for match in PARAGRAPH_BREAK.finditer(body):
+        pieces = _split_long(body[start:match.start()], max_chars)
+        # The last piece's trailing whitespace belongs before the break
+        last, last_separator = pieces.pop()
+        segments.extend(pieces)
+        segments.append((last, last_separator + match.group(0)))
+        start = match.end()
+    segments.extend(_split_long(body[start:], max_chars))
+    return segments
+
+def reassemble(translated_segments, segments):
+    """
+    Rebuilds a document from translated segments and the original separators.
+
+    Args:
+        translated_segments (list): One translated string per segment.
+        segments (list): The (segment, separator) pairs from split_document().
+
+    Returns:
+        str: The translated document.
+    """
+    return "".join(translated + separator for translated, (_, separator) in zip(translated_segments, segments))
+
+def translate_document(subscription_key, region, text, from_lang, to_langs, endpoint=None, category_id=None,
+                       max_segment_chars=DEFAULT_SEGMENT_CHARACTERS, max_request_chars=DEFAULT_REQUEST_CHARACTERS,
+                       max_workers=8, memory=None):
+    """
+    Translates a document of any length by translating its segments concurrently.
+
+    Args:
+        subscription_key (str): Azure Translator subscription key.
+        region (str): Azure service region.
+        text (str): The document.
+        from_lang (str): Source language code, or None to auto-detect.
+        to_langs (list): Target language codes.
+        endpoint (str, optional): Translator endpoint URL.
+        category_id (str, optional): Custom model's category ID.
+        max_segment_chars (int): Maximum characters per segment; lowered when needed so a
+            segment fits one request for all target languages.
+        max_request_chars (int): Maximum billed characters per request; smaller values
+            spread a document over more parallel requests.
+        max_workers (int): Maximum number of requests in flight at once.
+        memory (TranslationMemory, optional): Translation memory for segments.
+
+    Returns:
+        dict: Target language to translated document.
+    """
+    request_chars = min(max_request_chars, MAX_CHARACTERS_PER_REQUEST)
+    # Every segment is billed once per target language, so it must fit a request that many times
+    segments = split_document(text, max(1, min(max_segment_chars, request_chars // len(to_langs))))
+    # Only segments with content go to the service; whitespace-only ones are copied as-is
+    indexes = [i for i, (segment, _) in enumerate(segments) if segment.strip()]
+    kwargs = {"endpoint": endpoint} if endpoint else {}
+    translated = translate_bulk(
+        subscription_key, region, [segments[i][0] for i in indexes], from_lang, to_langs,
+        category_id=category_id, max_workers=max_workers, memory=memory,
+        text_type="html" if contains_markup(text) else "plain",
+        max_request_characters=request_chars, **kwargs
+    )
+
+    documents = {}
+    for lang in to_langs:
+        pieces = [segment for segment, _ in segments]
+        for position, i in enumerate(indexes):
+            pieces[i] = translated[position][lang]
+        documents[lang] = reassemble(pieces, segments)
+    return documents
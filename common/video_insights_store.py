@@ -0,0 +1,332 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DEFAULT_STORE_PATH = "video_insights"
+
+# Insight type -> field holding the value queries match on (a face's name, a topic's name, ...)
+INSIGHT_FIELDS = {
+    "transcript": "text",
+    "ocr": "text",
+    "keywords": "text",
+    "topics": "name",
+    "faces": "name",
+    "labels": "name",
+    "brands": "name",
+    "namedPeople": "name",
+    "namedLocations": "name",
+    "emotions": "type",
+    "sentiments": "sentimentType",
+    "audioEffects": "type",
+}
+
+VIDEOS_SCHEMA = pa.schema([
+    ("video_id", pa.string()),
+    ("part", pa.int64()),
+    ("name", pa.string()),
+    ("duration", pa.float64()),
+])
+
+SEGMENTS_SCHEMA = pa.schema([
+    ("video_id", pa.string()),
+    ("part", pa.int64()),
+    ("name", pa.string()),
+    ("confidence", pa.float64()),
+    ("start", pa.float64()),
+    ("end", pa.float64()),
+])
+
+def parse_time(value):
+    """
+    Converts a Video Indexer time such as "0:01:02.5" to seconds.
+    """
+    if value is None:
+        return None
+    seconds = 0.0
+    for field in str(value).split(":"):
+        seconds = seconds * 60 + float(field)
+    return seconds
+
+def extract_segments(video_index):
+    """
+    Flattens a video index into one row per insight instance.
+
+    Returns:
+        tuple: (video row, {insight type: list of segment rows}).
+    """
+    video_id = video_index.get("id") or video_index["videos"][0]["id"]
+    video = {"video_id": video_id, "name": video_index.get("name"),
+             "duration": parse_time(video_index.get("durationInSeconds") or
+                                    (video_index.get("summarizedInsights") or {}).get("duration", {}).get("seconds"))}
+    segments = {insight: [] for insight in INSIGHT_FIELDS}
+    for indexed_video in video_index.get("videos", []):
+        insights = indexed_video.get("insights", {})
+        for insight, field in INSIGHT_FIELDS.items():
+            for item in insights.get(insight, []):
+                for instance in item.get("instances", []):
+                    segments[insight].append({
+                        "video_id": video_id,
+                        "name": item.get(field),
+                        "confidence": instance.get("confidence", item.get("confidence")),
+                        "start": parse_time(instance.get("start")),
+                        "end": parse_time(instance.get("end")),
+                    })
+    return video, segments
+
+class InsightsStore:
+    """
+    Columnar store of Video Indexer insights, one Parquet table per insight type.
+
+    Every row of every table is one insight instance keyed by video ID and
+    time range, so questions like "where do topic X and face Y appear
+    together" become vectorized joins over in-memory Arrow tables instead of
+    walking index JSON. add() writes a new part file per table; re-adding a
+    video supersedes its earlier rows, and compact() merges the parts and
+    drops superseded rows. Tables are loaded on first query and kept in memory
+    until the store changes.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_PATH):
+        self.root = root
+        self.lock = threading.Lock()
+        self.tables = None
+        self.last_part = None
+
+    def _table_dir(self, table):
+        return os.path.join(self.root, table)
+
+    def _next_part(self):
+        """
+        Returns a part number greater than any this store has written; call with the lock held.
+        """
+        if self.last_part is None:
+            # Parts written by earlier runs, so a clock that went back cannot reorder them
+            self.last_part = max((int(name.split("-")[1].split(".")[0])
+                                  for table in ["videos", *INSIGHT_FIELDS] if os.path.isdir(self._table_dir(table))
+                                  for name in os.listdir(self._table_dir(table)) if name.endswith(".parquet")),
+                                 default=0)
+        self.last_part = max(time.time_ns(), self.last_part + 1)
+        return self.last_part
+
+    def add(self, video_indexes):
+        """
+        Stores the insights of one video index (a dict) or of many.
+
+        Batches of videos are written as one part file per table, so bulk
+        imports should pass many indexes per call.
+        """
+        if isinstance(video_indexes, dict):
+            video_indexes = [video_indexes]
+        videos = []
+        segments = {insight: [] for insight in INSIGHT_FIELDS}
+        with self.lock:
+            # Strictly increasing, so later writes of a video always win over earlier ones
+            part = self._next_part()
+            for video_index in video_indexes:
+                video, video_segments = extract_segments(video_index)
+                videos.append(dict(video, part=part))
+                for insight, rows in video_segments.items():
+                    segments[insight].extend(dict(row, part=part) for row in rows)
+            if not videos:
+                return
+
+            self._write("videos", pa.Table.from_pylist(videos, schema=VIDEOS_SCHEMA), part)
+            for insight, rows in segments.items():
+                if rows:
+                    self._write(insight, pa.Table.from_pylist(rows, schema=SEGMENTS_SCHEMA), part)
+            self.tables = None
+
+    def _write(self, table, data, part):
+        os.makedirs(self._table_dir(table), exist_ok=True)
+        # The random suffix keeps parts apart when several processes write to one store
+        path = os.path.join(self._table_dir(table), f"part-{part}-{uuid.uuid4().hex}.parquet")
+        pq.write_table(data, path + ".tmp")
+        # Rename into place so readers never see a half-written part
+        os.replace(path + ".tmp", path)
+
+    def _parts(self, table):
+        directory = self._table_dir(table)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".parquet"))
+
+    def _read(self, paths, schema):
+        # An explicit file list, so parts still being written (.tmp) are never picked up
+        if not paths:
+            return schema.empty_table()
+        return ds.dataset(paths, format="parquet", schema=schema).to_table()
+
+    def _build(self, parts):
+        videos = self._read(parts["videos"], VIDEOS_SCHEMA)
+        # Only the latest part of each video counts
+        latest = videos.group_by("video_id").aggregate([("part", "max")]).rename_columns(["video_id", "part"])
+        tables = {"videos": videos.join(latest, ["video_id", "part"], join_type="inner")}
+        for insight in INSIGHT_FIELDS:
+            segments = self._read(parts[insight], SEGMENTS_SCHEMA).join(latest, ["video_id", "part"], join_type="left semi")
+            # Lower-cased once here so every query is a plain equality filter
+            tables[insight] = segments.append_column("key", pc.utf8_lower(segments["name"]))
+        return tables
+
+    def _load(self):
+        with self.lock:
+            if self.tables is None:
+                self.tables = self._build({table: self._parts(table) for table in ["videos", *INSIGHT_FIELDS]})
+            return self.tables
+
+    def compact(self):
+        """
+        Rewrites every table as a single part without superseded rows.
+
+        Only the parts listed when compaction starts are merged and removed;
+        parts written after that are left for the next compaction. Compaction
+        is not coordinated between processes, so run it while no other process
+        writes to or compacts the store.
+        """
+        with self.lock:
+            parts = {table: self._parts(table) for table in ["videos", *INSIGHT_FIELDS]}
+            tables = self._build(parts)
+            part = self._next_part()
+            for table, data in tables.items():
+                if not parts[table]:
+                    continue
+                self._write(table, data.drop_columns(["key"]) if "key" in data.column_names else data, part)
+                for path in parts[table]:
+                    os.remove(path)
+            self.tables = None
+
+    def videos(self):
+        """
+        Returns the stored videos as an Arrow table (video_id, part, name, duration).
+        """
+        return self._load()["videos"]
+
+    def segments(self, insight, name, video_ids=None):
+        """
+        Returns every instance of one insight value, e.g. segments("faces", "Satya Nadella").
+
+        Matching is case-insensitive and exact.
+
+        Returns:
+            pyarrow.Table: video_id, name, confidence, start and end columns.
+        """
+        table = self._load()[insight]
+        mask = pc.equal(table["key"], name.lower())
+        if video_ids is not None:
+            mask = pc.and_(mask, pc.is_in(table["video_id"], value_set=pa.array(list(video_ids), pa.string())))
+        return table.filter(mask).select(["video_id", "name", "confidence", "start", "end"])
+
+    def co_occurrences(self, criteria, video_ids=None, min_overlap=0.0):
+        """
+        Finds the time ranges where all given insight values appear together.
+
+        Args:
+            criteria (dict): Insight type -> value, e.g. {"topics": "Economics", "faces": "Jane Doe"}.
+            video_ids (iterable, optional): Restrict the search to these videos.
+            min_overlap (float): Shortest overlap, in seconds, worth reporting.
+
+        Returns:
+            pyarrow.Table: video_id, video name, start and end of every overlap,
+                ordered by video and start time.
+        """
+        result = None
+        for insight, name in criteria.items():
+            segments = self.segments(insight, name, video_ids).select(["video_id", "start", "end"])
+            if result is None:
+                result = segments
+                continue
+            # Inner, so videos missing either value drop out instead of matching against nulls
+            joined = result.join(segments.rename_columns(["video_id", "other_start", "other_end"]), "video_id",
+                                 join_type="inner")
+            start = pc.max_element_wise(joined["start"], joined["other_start"])
+            end = pc.min_element_wise(joined["end"], joined["other_end"])
+            overlapping = pc.greater(pc.subtract(end, start), min_overlap)
+            result = pa.table({"video_id": joined["video_id"], "start": start, "end": end}).filter(overlapping)
+            if result.num_rows == 0:
+                break
+
+        if result is None:
+            raise ValueError("At least one criterion is required.")
+        # Overlapping instances of the same value can yield the same range twice
+        result = result.group_by(["video_id", "start", "end"]).aggregate([])
+        videos = self.videos().select(["video_id", "name"]).rename_columns(["video_id", "video_name"])
+        return result.join(videos, "video_id").sort_by([("video_id", "ascending"), ("start", "ascending")])
+
+    def transcript(self, video_id, start=None, end=None):
+        """
+        Returns what was said in a video, optionally only between start and end seconds.
+        """
+        table = self._load()["transcript"]
+        mask = pc.equal(table["video_id"], video_id)
+        if start is not None:
+            mask = pc.and_(mask, pc.greater(table["end"], start))
+        if end is not None:
+            mask = pc.and_(mask, pc.less(table["start"], end))
+        return table.filter(mask).select(["start", "end", "name"]).sort_by("start").rename_columns(["start", "end", "text"])
+
+def import_insights(store, folder, batch_size=500):
+    """
+    Adds every <video>.json insight file in a folder (as written by batch_video_indexer.py) to a store.
+
+    Returns:
+        int: Number of videos imported.
+    """
+    batch = []
+    count = 0
+    for file_name in sorted(os.listdir(folder)):
+        if not file_name.endswith(".json"):
+            continue
+        with open(os.path.join(folder, file_name), encoding="utf-8") as f:
+            batch.append(json.load(f))
+        if len(batch) >= batch_size:
+            store.add(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        store.add(batch)
+        count += len(batch)
+    return count
+
+def main():
+    """
+    Usage:
+        python video_insights_store.py <store directory> import <insights directory>
+        python video_insights_store.py <store directory> query <insight>=<value> [<insight>=<value> ...]
+        python video_insights_store.py <store directory> compact
+    """
+    if len(sys.argv) < 3 or sys.argv[2] not in ("import", "query", "compact"):
+        print(main.__doc__.strip())
+        sys.exit(1)
+    store = InsightsStore(sys.argv[1])
+    command = sys.argv[2]
+
+    if command == "import":
+        count = import_insights(store, sys.argv[3])
+        store.compact()
+        print(f"Imported {count} videos into {sys.argv[1]}.")
+    elif command == "compact":
+        store.compact()
+        print("Compacted.")
+    else:
+        criteria = dict(argument.split("=", 1) for argument in sys.argv[3:])
+        unknown = set(criteria) - set(INSIGHT_FIELDS)
+        if unknown:
+            print(f"Error: unknown insight type(s) {', '.join(sorted(unknown))}; use one of {', '.join(INSIGHT_FIELDS)}.")
+            sys.exit(1)
+        store.videos()  # Load outside the timing, as a long-lived process would have
+        started = time.perf_counter()
+        matches = store.co_occurrences(criteria)
+        elapsed = time.perf_counter() - started
+        for row in matches.to_pylist():
+            print(f"{row['video_name']} ({row['video_id']}): {row['start']:.1f}s - {row['end']:.1f}s")
+        print(f"{matches.num_rows} segments in {len(set(matches['video_id'].to_pylist()))} videos ({elapsed * 1000:.1f} ms).")
+
+if __name__ == "__main__":
+    main()